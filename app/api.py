@@ -0,0 +1,381 @@
+"""
+API HTTP de AgriQuote para integraciones (ERP, sitio web)
+
+Expone clientes, catálogo y proformas (crear, buscar, descargar el PDF). Las
+entradas se validan con los esquemas de app/schemas.py.
+
+Uso:
+    python -m app.api [--host 127.0.0.1] [--port 8000] [--workers 1]
+    uvicorn app.api:app
+
+Documentación interactiva en /docs. Los endpoints son síncronos: FastAPI los
+ejecuta en su pool de hilos, cada petición abre y cierra su propia sesión de
+base de datos, y el PDF se envía en bloques desde el archivo.
+"""
+import argparse
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+
+from app import crud, export, metrics, quotes, schemas
+from app.db import SessionLocal, init_db
+from app.tracing import span
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    yield
+
+
+app = FastAPI(title="AgriQuote API", version="2.0", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Cada petición es una traza (app/tracing.py) con crud, SQL y PDF dentro"""
+    with span("api.request", method=request.method, path=request.url.path) as current:
+        response = await call_next(request)
+        if current is not None:
+            current.set_attribute("status_code", response.status_code)
+        return response
+
+
+def db_session() -> Iterator[Session]:
+    """Una sesión por petición; se cierra (y devuelve la conexión) al terminar"""
+    with SessionLocal() as db:
+        yield db
+
+
+@app.get("/health")
+def health() -> Dict:
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """Métricas de este proceso en formato de texto de Prometheus (app/metrics.py)"""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# ==================== SERIALIZACIÓN ====================
+
+def _customer_dict(customer) -> Dict:
+    return {
+        "id": customer.id,
+        "name": customer.name,
+        "company": customer.company or "",
+        "email": customer.email or "",
+        "phone": customer.phone or "",
+        "address": customer.address or "",
+        "active": customer.active,
+    }
+
+
+def _model_dict(model) -> Dict:
+    return {
+        "id": model.id,
+        "brand_id": model.brand_id,
+        "brand": model.brand.name,
+        "model": model.name,
+        "description": model.description or "",
+        "price": model.base_price,
+        "image_path": model.image_path or "",
+        "active": model.active,
+    }
+
+
+def _proforma_dict(document: Dict) -> Dict:
+    header = document["header"]
+    return {
+        "id": document["id"],
+        "number": document["number"],
+        "template": document["template"],
+        "date": header["date"],
+        "customer": header["customer_name"],
+        "advisor": header["advisor_name"],
+        "validity_days": header["validity_days"],
+        "items": document["items"],
+        "totals": document["totals"],
+        "pdf_url": app.url_path_for("download_proforma_pdf", proforma_id=document["id"]),
+    }
+
+
+# ==================== CLIENTES ====================
+
+@app.get("/customers")
+def list_customers(
+    search: Optional[str] = None,
+    active_only: bool = True,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(db_session)
+) -> List[Dict]:
+    customers = crud.list_customers(db, active_only=active_only, search=search, limit=limit, offset=offset)
+    return [_customer_dict(customer) for customer in customers]
+
+
+@app.get("/customers/{customer_id}")
+def get_customer(customer_id: int, db: Session = Depends(db_session)) -> Dict:
+    customer = crud.get_customer(db, customer_id)
+    if customer is None:
+        raise HTTPException(404, "Cliente no encontrado")
+    return _customer_dict(customer)
+
+
+@app.get("/customers/{customer_id}/proformas/pdf")
+def download_customer_proformas_pdf(
+    customer_id: int,
+    include_expired: bool = False,
+    db: Session = Depends(db_session)
+) -> FileResponse:
+    """Las proformas vigentes del cliente (todas con `include_expired`) en un solo PDF"""
+    customer = crud.get_customer(db, customer_id)
+    if customer is None:
+        raise HTTPException(404, "Cliente no encontrado")
+    ids = crud.list_customer_proforma_ids(db, customer_id, only_valid=not include_expired)
+    if not ids:
+        raise HTTPException(404, "El cliente no tiene proformas vigentes")
+    return _merged_pdf_response(db, ids, f"Proformas_{customer.name}")
+
+
+@app.post("/customers", status_code=201)
+def create_customer(data: schemas.CustomerCreate, db: Session = Depends(db_session)) -> Dict:
+    customer = crud.create_customer(
+        db,
+        name=data.name,
+        company=data.company,
+        email=data.email or "",
+        phone=data.phone,
+        address=data.address
+    )
+    return _customer_dict(customer)
+
+
+# ==================== CATÁLOGO ====================
+
+@app.get("/catalog/brands")
+def list_brands(
+    equipment_type: Optional[str] = Query(None, pattern="^(tractor|implement)$"),
+    active_only: bool = True,
+    db: Session = Depends(db_session)
+) -> List[Dict]:
+    return [
+        {"id": brand.id, "name": brand.name, "equipment_type": brand.equipment_type, "active": brand.active}
+        for brand in crud.list_brands(db, active_only=active_only, equipment_type=equipment_type)
+    ]
+
+
+@app.get("/catalog/models")
+def list_models(
+    brand_id: Optional[int] = None,
+    equipment_type: Optional[str] = Query(None, pattern="^(tractor|implement)$"),
+    active_only: bool = True,
+    db: Session = Depends(db_session)
+) -> List[Dict]:
+    models = crud.list_models(db, brand_id=brand_id, equipment_type=equipment_type, active_only=active_only)
+    return [_model_dict(model) for model in models]
+
+
+# ==================== PROFORMAS ====================
+
+@app.get("/proformas")
+def search_proformas(
+    customer: Optional[str] = None,
+    model: Optional[str] = None,
+    number: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    advisor_id: Optional[int] = None,
+    template: Optional[str] = Query(None, pattern="^(tractor|implement)$"),
+    sort: str = Query("date", pattern=f"^({'|'.join(crud.PROFORMA_SORTS)})$"),
+    descending: bool = True,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=200),
+    db: Session = Depends(db_session)
+) -> Dict:
+    """Una página de la búsqueda (mismos filtros y órdenes que Ver Proformas)"""
+    return crud.page_proformas(
+        db,
+        sort=sort,
+        descending=descending,
+        page=page,
+        page_size=page_size,
+        customer_search=customer,
+        model_search=model,
+        proforma_number=number,
+        date_from=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        date_to=datetime.combine(date_to, datetime.min.time()) if date_to else None,
+        advisor_id=advisor_id,
+        template=template
+    )
+
+
+@app.get("/proformas/export")
+def export_proformas(
+    format: str = Query("csv", pattern=f"^({'|'.join(export.FORMATS)})$"),
+    level: str = Query("items", pattern=f"^({'|'.join(export.LEVELS)})$"),
+    customer: Optional[str] = None,
+    model: Optional[str] = None,
+    number: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    advisor_id: Optional[int] = None,
+    template: Optional[str] = Query(None, pattern="^(tractor|implement)$")
+) -> StreamingResponse:
+    """
+    Todas las proformas de la búsqueda (mismos filtros que GET /proformas)
+    como CSV o XLSX, una fila por proforma o por item. Se envía a medida que
+    se lee de la base, con su propia sesión (dura lo que dure la descarga).
+    """
+    filters = {
+        "customer_search": customer,
+        "model_search": model,
+        "proforma_number": number,
+        "date_from": datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        "date_to": datetime.combine(date_to, datetime.min.time()) if date_to else None,
+        "advisor_id": advisor_id,
+        "template": template,
+    }
+
+    def stream() -> Iterator[bytes]:
+        with SessionLocal() as db:
+            yield from export.iter_export(db, format, level=level, **filters)
+
+    filename = export.export_filename(format, level)
+    return StreamingResponse(
+        stream(),
+        media_type=export.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.get("/proformas/pdfs")
+def export_proforma_pdfs(
+    customer: Optional[str] = None,
+    model: Optional[str] = None,
+    number: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    advisor_id: Optional[int] = None,
+    template: Optional[str] = Query(None, pattern="^(tractor|implement)$")
+) -> StreamingResponse:
+    """
+    ZIP con los PDFs de las proformas de la búsqueda (mismos filtros que GET
+    /proformas). Se arma mientras se envía; los PDFs que falten se dibujan.
+    """
+    filters = {
+        "customer_search": customer,
+        "model_search": model,
+        "proforma_number": number,
+        "date_from": datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        "date_to": datetime.combine(date_to, datetime.min.time()) if date_to else None,
+        "advisor_id": advisor_id,
+        "template": template,
+    }
+
+    def stream() -> Iterator[bytes]:
+        with SessionLocal() as db:
+            yield from export.iter_pdf_zip(db, **filters)
+
+    filename = export.export_filename("zip", "pdf")
+    return StreamingResponse(
+        stream(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _merged_pdf_response(db: Session, proforma_ids: List[int], title: str) -> FileResponse:
+    """PDF combinado (quotes.render_merged) en un temporal que se borra después de enviarlo"""
+    handle, tmp_name = tempfile.mkstemp(prefix="agriquote_merged_", suffix=".pdf")
+    os.close(handle)
+    try:
+        path = quotes.render_merged(db, proforma_ids, Path(tmp_name), title=title)
+    except Exception:
+        os.unlink(tmp_name)
+        raise
+    filename = f"{title.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
+    return FileResponse(
+        path, media_type="application/pdf", filename=filename,
+        background=BackgroundTask(os.unlink, path)
+    )
+
+
+@app.get("/proformas/merged")
+def download_merged_pdf(
+    ids: List[int] = Query(..., min_length=1, max_length=500),
+    db: Session = Depends(db_session)
+) -> FileResponse:
+    """Las proformas `ids` (en ese orden) en un solo PDF con un marcador por proforma"""
+    try:
+        return _merged_pdf_response(db, ids, "Proformas")
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+
+
+@app.post("/proformas", status_code=201)
+def create_proforma(
+    data: schemas.ProformaCreate,
+    render_pdf: bool = False,
+    db: Session = Depends(db_session)
+) -> Dict:
+    """
+    Crea la proforma. El PDF se dibuja al descargarlo por primera vez, o de
+    inmediato con `?render_pdf=true`.
+    """
+    try:
+        created = quotes.create_quote(db, data)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if render_pdf:
+        try:
+            quotes.render_proforma(db, created["id"])
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+    return {**created, "pdf_url": app.url_path_for("download_proforma_pdf", proforma_id=created["id"])}
+
+
+@app.get("/proformas/{proforma_id}")
+def get_proforma(proforma_id: int, db: Session = Depends(db_session)) -> Dict:
+    document = quotes.load_document(db, proforma_id)
+    if document is None:
+        raise HTTPException(404, "Proforma no encontrada")
+    return _proforma_dict(document)
+
+
+@app.get("/proformas/{proforma_id}/pdf", name="download_proforma_pdf")
+def download_proforma_pdf(proforma_id: int, db: Session = Depends(db_session)) -> FileResponse:
+    """PDF de la proforma (se dibuja si el archivo no existe)"""
+    try:
+        path = quotes.ensure_pdf(db, proforma_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if path is None:
+        raise HTTPException(404, "Proforma no encontrada")
+    return FileResponse(path, media_type="application/pdf", filename=path.name)
+
+
+# ==================== SERVIDOR ====================
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m app.api", description="API HTTP de AgriQuote")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de uvicorn")
+    args = parser.parse_args(argv)
+    uvicorn.run("app.api:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Capa de caché de Streamlit para lecturas de catálogos y configuración
+
+Las funciones de este módulo envuelven las lecturas `crud.list_*`,
+`get_config` y `get_all_config` con `st.cache_data` (TTL por entidad) y
+retornan registros simples (SimpleNamespace) con los mismos atributos que
+los modelos, más los datos de relaciones que usa la UI (`brand_name`,
+`model_count`...). Así los resultados se pueden compartir entre sesiones
+sin objetos ORM ligados a una sesión cerrada.
+
+Las escrituras de app.crud avisan con `crud.notify_change(entidad)`; aquí
+se registran los callbacks que limpian las cachés afectadas. El TTL cubre
+cambios hechos por otros procesos (CLI, importaciones).
+
+También cachea las páginas de la búsqueda de proformas y los datos para
+precargar una proforma duplicada: la sesión guarda solo filtros, número de
+página e ids, y los datos se comparten entre sesiones del proceso.
+
+Solo debe importarse desde la app de Streamlit.
+"""
+import functools
+from contextvars import ContextVar
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+import streamlit as st
+from sqlalchemy import func, inspect, select
+
+from app import crud, metrics
+from app.db import SessionLocal, engine, init_db
+from app.models import Model
+
+
+# TTL en segundos por entidad
+CUSTOMERS_TTL = 300
+ADVISORS_TTL = 300
+CATALOG_TTL = 600
+CONFIG_TTL = 3600
+STATS_TTL = 60
+PROFORMAS_TTL = 120
+
+MAX_ENTRIES = 64
+
+# True si la última lectura ejecutó la función (no estaba en caché)
+_loaded: ContextVar[bool] = ContextVar("agriquote_cache_loaded", default=False)
+
+
+def _record(obj, **extra) -> SimpleNamespace:
+    """Copia las columnas de un objeto ORM a un registro serializable"""
+    values = {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+
+def _cached(**cache_kwargs) -> Callable:
+    """
+    `st.cache_data(**cache_kwargs)` que además cuenta aciertos y fallos por
+    función en metrics.CACHE_REQUESTS. Conserva `.clear()`.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def load(*args, **kwargs):
+            _loaded.set(True)
+            return fn(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(load)
+
+        @functools.wraps(fn)
+        def lookup(*args, **kwargs):
+            token = _loaded.set(False)
+            try:
+                result = cached(*args, **kwargs)
+                metrics.CACHE_REQUESTS.inc(cache=fn.__name__, result="miss" if _loaded.get() else "hit")
+                return result
+            finally:
+                _loaded.reset(token)
+
+        lookup.clear = cached.clear
+        return lookup
+    return decorator
+
+
+# ==================== RECURSOS ====================
+
+@st.cache_resource(show_spinner=False)
+def init_database():
+    """Crea tablas/migraciones una sola vez por proceso y retorna el engine"""
+    init_db()
+    return engine
+
+
+@st.cache_resource(show_spinner=False)
+def start_media_gc():
+    """Programa la recolección de archivos huérfanos (una tarea por proceso)"""
+    from app import media_gc
+    return media_gc.start_scheduler(media_gc.GC_INTERVAL_HOURS, media_gc.GC_GRACE_HOURS)
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_server():
+    """Servidor /metrics (app/metrics.py) si AGRIQUOTE_METRICS_PORT está definido; uno por proceso"""
+    if not metrics.METRICS_PORT:
+        return None
+    return metrics.start_http_server(int(metrics.METRICS_PORT))
+
+
+# ==================== LECTURAS ====================
+
+@_cached(ttl=CUSTOMERS_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def list_customers(active_only: bool = True, search: Optional[str] = None) -> List[SimpleNamespace]:
+    with SessionLocal() as db:
+        return [_record(c) for c in crud.list_customers(db, active_only=active_only, search=search)]
+
+
+@_cached(ttl=ADVISORS_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def list_advisors(active_only: bool = True, search: Optional[str] = None) -> List[SimpleNamespace]:
+    with SessionLocal() as db:
+        return [_record(a) for a in crud.list_advisors(db, active_only=active_only, search=search)]
+
+
+@_cached(ttl=CATALOG_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def list_brands(equipment_type: Optional[str] = None, active_only: bool = True) -> List[SimpleNamespace]:
+    """Marcas con `model_count` (una consulta agrupada en lugar de cargar b.models)"""
+    with SessionLocal() as db:
+        brands = crud.list_brands(db, equipment_type=equipment_type, active_only=active_only)
+        counts = dict(db.execute(
+            select(Model.brand_id, func.count(Model.id)).group_by(Model.brand_id)
+        ).all())
+        return [_record(b, model_count=counts.get(b.id, 0)) for b in brands]
+
+
+@_cached(ttl=CATALOG_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def list_models(
+    brand_id: Optional[int] = None,
+    equipment_type: Optional[str] = None,
+    active_only: bool = True
+) -> List[SimpleNamespace]:
+    """Modelos con `brand_name` y `brand_equipment_type`"""
+    with SessionLocal() as db:
+        models = crud.list_models(
+            db, brand_id=brand_id, equipment_type=equipment_type, active_only=active_only
+        )
+        return [
+            _record(m, brand_name=m.brand.name, brand_equipment_type=m.brand.equipment_type)
+            for m in models
+        ]
+
+
+@_cached(ttl=CONFIG_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def get_all_config(category: Optional[str] = None) -> Dict[str, str]:
+    with SessionLocal() as db:
+        return crud.get_all_config(db, category=category)
+
+
+def get_config(key: str, default: str = "") -> str:
+    """Un valor de configuración (toda la configuración se lee con una consulta)"""
+    return get_all_config().get(key, default)
+
+
+@_cached(ttl=STATS_TTL, show_spinner=False)
+def get_stats() -> Dict:
+    with SessionLocal() as db:
+        return crud.get_stats(db)
+
+
+@_cached(ttl=PROFORMAS_TTL, max_entries=256, show_spinner=False)
+def page_proformas(
+    filters: Dict,
+    sort: str = "date",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 25
+) -> Dict:
+    """Una página de crud.page_proformas (filtros = los de la búsqueda)"""
+    with SessionLocal() as db:
+        return crud.page_proformas(
+            db, sort=sort, descending=descending, page=page, page_size=page_size, **filters
+        )
+
+
+@_cached(ttl=PROFORMAS_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def get_proforma_prefill(proforma_id: int) -> Optional[Dict]:
+    with SessionLocal() as db:
+        return crud.get_proforma_prefill(db, proforma_id)
+
+
+# ==================== INVALIDACIÓN ====================
+
+# Entidad modificada -> cachés que dependen de ella
+_INVALIDATES = {
+    "customers": (list_customers, get_stats, page_proformas),
+    "advisors": (list_advisors, get_stats, page_proformas),
+    "brands": (list_brands, list_models, get_stats),
+    "models": (list_models, list_brands, get_stats),
+    "config": (get_all_config,),
+    "proformas": (get_stats, page_proformas, get_proforma_prefill),
+}
+
+
+def _clear_callback(caches):
+    def clear():
+        for cached in caches:
+            cached.clear()
+    return clear
+
+
+for _entity, _caches in _INVALIDATES.items():
+    crud.on_change(_entity, _clear_callback(_caches))
@@ -0,0 +1,341 @@
+"""
+Importación/sincronización masiva del catálogo (marcas y modelos) desde listas de precios CSV/XLSX
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.crud import notify_change
+from app.models import Brand, Model
+from app.tabular import iter_records, normalize_header
+
+
+# Encabezados aceptados por columna (se comparan sin mayúsculas ni tildes)
+COLUMN_ALIASES = {
+    "brand": ("marca", "brand"),
+    "equipment_type": ("tipo", "tipo_equipo", "equipment_type", "type"),
+    "name": ("modelo", "model", "name", "nombre"),
+    "description": ("descripcion", "especificaciones", "description", "specs"),
+    "base_price": ("precio", "precio_base", "price", "base_price"),
+    "active": ("activo", "active", "estado"),
+}
+
+EQUIPMENT_TYPES = {
+    "tractor": "tractor",
+    "tractores": "tractor",
+    "implemento": "implement",
+    "implementos": "implement",
+    "implement": "implement",
+}
+
+TRUE_VALUES = {"1", "si", "sí", "s", "true", "yes", "y", "x", "activo"}
+FALSE_VALUES = {"0", "no", "n", "false", "inactivo"}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+# ==================== LECTURA ====================
+
+def read_price_list(source, filename: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Lee una lista de precios CSV o XLSX fila por fila.
+
+    `source` puede ser una ruta o un archivo binario (p. ej. el UploadedFile
+    de Streamlit). Ver app.tabular.iter_records.
+    """
+    return iter_records(source, COLUMN_ALIASES, required=("brand", "name"), filename=filename)
+
+
+# ==================== NORMALIZACIÓN ====================
+
+def _strip_thousands(text: str, separator: str, value) -> str:
+    """'15.250.000' -> '15250000'; los grupos después del primero deben ser de 3 dígitos"""
+    groups = text.split(separator)
+    if not groups[0] or any(len(group) != 3 for group in groups[1:]):
+        raise ValueError(f"precio inválido: {value!r}")
+    return "".join(groups)
+
+
+def parse_price(value, decimal_separator: Optional[str] = None) -> float:
+    """
+    Convierte precios como '₡15.250.000,50', '$1,234.5' o 15250000 a float.
+
+    `decimal_separator` ("." o ","): el de la lista de precios; el otro es
+    el de miles. Sin indicarlo se deduce cuando no hay duda (ambos
+    separadores, un separador repetido, o uno seguido de 1-2 dígitos);
+    '15.250' o '15,250' (un solo separador y 3 dígitos) pueden ser miles o
+    decimales, así que lanzan ValueError en lugar de adivinar.
+    """
+    if value is None or value == "":
+        raise ValueError("precio vacío")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if decimal_separator not in (None, ".", ","):
+        raise ValueError(f"separador decimal inválido: {decimal_separator!r}")
+
+    text = "".join(ch for ch in str(value) if ch.isdigit() or ch in ",.-")
+    if not text or not any(ch.isdigit() for ch in text):
+        raise ValueError(f"precio inválido: {value!r}")
+
+    separators = [sep for sep in ".," if sep in text]
+    if not separators:
+        return float(text)
+    if len(separators) == 2:
+        # El último separador es el decimal
+        decimal = "," if text.rfind(",") > text.rfind(".") else "."
+        if decimal_separator and decimal != decimal_separator:
+            raise ValueError(f"precio inválido para el separador decimal '{decimal_separator}': {value!r}")
+    elif decimal_separator:
+        decimal = decimal_separator
+    elif text.count(separators[0]) > 1:
+        # '1.234.567': solo miles
+        decimal = None
+    elif len(text.rpartition(separators[0])[2]) == 3:
+        raise ValueError(f"precio ambiguo: {value!r} (¿miles o decimales?); indica el separador decimal")
+    else:
+        decimal = separators[0]
+
+    thousands = {".": ",", ",": "."}.get(decimal, separators[0])
+    integer, fraction = text, ""
+    if decimal and decimal in text:
+        if text.count(decimal) > 1:
+            raise ValueError(f"precio inválido: {value!r}")
+        integer, _, fraction = text.rpartition(decimal)
+    if thousands in fraction:
+        raise ValueError(f"precio inválido: {value!r}")
+    if thousands in integer:
+        integer = _strip_thousands(integer, thousands, value)
+    return float(f"{integer}.{fraction}" if fraction else integer)
+
+
+def parse_active(value) -> Optional[bool]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"valor de 'activo' inválido: {value!r}")
+
+
+def _clean(value) -> str:
+    return " ".join(str(value).split()) if value not in (None, "") else ""
+
+
+# ==================== SINCRONIZACIÓN ====================
+
+def _chunks(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def sync_catalog(
+    db: Session,
+    rows: Iterable[Dict],
+    deactivate_missing: bool = False,
+    dry_run: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    decimal_separator: Optional[str] = None
+) -> Dict:
+    """
+    Sincroniza marcas y modelos con una lista de precios.
+
+    Compara por (marca, modelo) sin distinguir mayúsculas. Crea marcas y
+    modelos nuevos, actualiza precio/descripción/estado de los existentes y,
+    con `deactivate_missing`, desactiva los modelos activos de las marcas de
+    la lista que no aparecen en ella. `decimal_separator`: el de los precios
+    de la lista (ver parse_price). Los cambios se aplican con executemany
+    en transacciones de `chunk_size` filas. Retorna un reporte con conteos,
+    cambios y errores por fila.
+    """
+    report = {
+        "rows": 0,
+        "brands_created": [],
+        "models_created": [],
+        "models_updated": [],
+        "models_deactivated": [],
+        "unchanged": 0,
+        "errors": [],
+    }
+
+    # Estado actual del catálogo: dos consultas
+    brands = {
+        row.name.casefold(): row
+        for row in db.execute(select(Brand.id, Brand.name, Brand.equipment_type))
+    }
+    models = {
+        (row.brand_id, row.name.casefold()): row
+        for row in db.execute(
+            select(Model.id, Model.brand_id, Model.name, Model.description,
+                   Model.base_price, Model.active)
+        )
+    }
+
+    # Validar y deduplicar filas del archivo (la última ocurrencia gana)
+    parsed: Dict[Tuple[str, str], Dict] = {}
+    new_brands: Dict[str, Dict] = {}
+    for raw in rows:
+        report["rows"] += 1
+        row_number = raw.get("_row", report["rows"])
+        try:
+            brand_name = _clean(raw.get("brand"))
+            model_name = _clean(raw.get("name"))
+            if not brand_name or not model_name:
+                raise ValueError("marca y modelo son obligatorios")
+
+            record = {"brand": brand_name, "name": model_name, "_row": row_number}
+            if raw.get("base_price") not in (None, ""):
+                record["base_price"] = parse_price(raw["base_price"], decimal_separator)
+            if raw.get("description") not in (None, ""):
+                record["description"] = str(raw["description"]).strip()
+            active = parse_active(raw.get("active"))
+            if active is not None:
+                record["active"] = active
+
+            brand_key = brand_name.casefold()
+            if brand_key not in brands and brand_key not in new_brands:
+                equipment_type = EQUIPMENT_TYPES.get(normalize_header(raw.get("equipment_type")))
+                if not equipment_type:
+                    raise ValueError(
+                        f"marca nueva '{brand_name}' requiere tipo (tractor/implemento)"
+                    )
+                new_brands[brand_key] = {"name": brand_name, "equipment_type": equipment_type}
+
+            parsed[(brand_key, model_name.casefold())] = record
+        except ValueError as e:
+            report["errors"].append({"row": row_number, "error": str(e)})
+
+    now = datetime.utcnow()
+
+    # Marcas nuevas (se necesitan sus ids para los modelos)
+    report["brands_created"] = [b["name"] for b in new_brands.values()]
+    if new_brands and not dry_run:
+        db.connection().execute(
+            insert(Brand.__table__),
+            [
+                {**b, "active": True, "created_at": now, "updated_at": now}
+                for b in new_brands.values()
+            ]
+        )
+        db.commit()
+        for row in db.execute(
+            select(Brand.id, Brand.name, Brand.equipment_type)
+            .where(Brand.name.in_([b["name"] for b in new_brands.values()]))
+        ):
+            brands[row.name.casefold()] = row
+
+    # Diferencias contra el catálogo actual
+    inserts, updates = [], []
+    seen_ids = set()
+    brand_ids_in_file = set()
+    for (brand_key, model_key), record in parsed.items():
+        brand = brands.get(brand_key)
+        brand_id = brand.id if brand else None
+        brand_ids_in_file.add(brand_id)
+        current = models.get((brand_id, model_key)) if brand_id else None
+
+        if current is None:
+            inserts.append({
+                "brand_id": brand_id,
+                "name": record["name"],
+                "description": record.get("description", ""),
+                "base_price": record.get("base_price", 0.0),
+                "image_path": "",
+                "active": record.get("active", True),
+                "created_at": now,
+                "updated_at": now,
+            })
+            report["models_created"].append({"brand": record["brand"], "model": record["name"]})
+            continue
+
+        seen_ids.add(current.id)
+        changes = {}
+        for field in ("base_price", "description", "active"):
+            if field in record and record[field] != getattr(current, field):
+                changes[field] = (getattr(current, field), record[field])
+
+        if changes:
+            updates.append({
+                "_id": current.id,
+                "description": record.get("description", current.description),
+                "base_price": record.get("base_price", current.base_price),
+                "active": record.get("active", current.active),
+                "updated_at": now,
+            })
+            report["models_updated"].append({
+                "brand": record["brand"], "model": record["name"], "changes": changes
+            })
+        else:
+            report["unchanged"] += 1
+
+    # Modelos activos de las marcas de la lista que ya no aparecen
+    deactivations = []
+    if deactivate_missing:
+        brand_names = {row.id: row.name for row in brands.values()}
+        for (brand_id, _), current in models.items():
+            if (brand_id in brand_ids_in_file and current.active
+                    and current.id not in seen_ids):
+                deactivations.append({"_id": current.id, "updated_at": now})
+                report["models_deactivated"].append({
+                    "brand": brand_names.get(brand_id, ""), "model": current.name
+                })
+
+    if dry_run:
+        return report
+
+    # Aplicar en transacciones por lotes
+    models_table = Model.__table__
+    update_stmt = (
+        update(models_table)
+        .where(models_table.c.id == bindparam("_id"))
+        .values(
+            description=bindparam("description"),
+            base_price=bindparam("base_price"),
+            active=bindparam("active"),
+            updated_at=bindparam("updated_at"),
+        )
+    )
+    deactivate_stmt = (
+        update(models_table)
+        .where(models_table.c.id == bindparam("_id"))
+        .values(active=False, updated_at=bindparam("updated_at"))
+    )
+
+    for chunk in _chunks(inserts, chunk_size):
+        db.connection().execute(insert(models_table), chunk)
+        db.commit()
+    for chunk in _chunks(updates, chunk_size):
+        db.connection().execute(update_stmt, chunk)
+        db.commit()
+    for chunk in _chunks(deactivations, chunk_size):
+        db.connection().execute(deactivate_stmt, chunk)
+        db.commit()
+
+    if new_brands:
+        notify_change("brands")
+    if inserts or updates or deactivations:
+        notify_change("models")
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Resumen en texto del reporte de sincronización"""
+    lines = [
+        f"Filas leídas:          {report['rows']}",
+        f"Marcas creadas:        {len(report['brands_created'])}",
+        f"Modelos creados:       {len(report['models_created'])}",
+        f"Modelos actualizados:  {len(report['models_updated'])}",
+        f"Modelos desactivados:  {len(report['models_deactivated'])}",
+        f"Sin cambios:           {report['unchanged']}",
+        f"Errores:               {len(report['errors'])}",
+    ]
+    for error in report["errors"][:20]:
+        lines.append(f"  fila {error['row']}: {error['error']}")
+    if len(report["errors"]) > 20:
+        lines.append(f"  ... y {len(report['errors']) - 20} más")
+    return "\n".join(lines)
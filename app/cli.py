@@ -0,0 +1,340 @@
+"""
+Línea de comandos de AgriQuote
+
+Uso:
+    python -m app.cli catalog import lista_precios.xlsx [--deactivate-missing] [--dry-run]
+    python -m app.cli customers import clientes.csv [--dry-run]
+    python -m app.cli media gc [--grace-hours 168] [--archive DIR] [--dry-run]
+    python -m app.cli quotes build specs.jsonl [--batch-size 100] [--jobs N] [--no-pdf] [--dry-run]
+    python -m app.cli quotes export [-o proformas.xlsx] [--level items|proformas] [--customer ...] [--date-from ...]
+    python -m app.cli quotes zip -o proformas.zip [--customer ...] [--date-from ...] [--advisor-id N]
+    python -m app.cli quotes merge -o cliente.pdf [ID ...] [--customer-id N] [--include-expired]
+    python -m app.cli seed [--db PATH] [--seed 42] [--proformas 10000] [--customers 5000] ...
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.db import SessionLocal, init_db
+
+
+# ==================== CATÁLOGO ====================
+
+def cmd_catalog_import(args) -> int:
+    """Importa/sincroniza marcas y modelos desde una lista de precios"""
+    from app.catalog_import import read_price_list, sync_catalog, format_report
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        report = sync_catalog(
+            db,
+            read_price_list(args.path),
+            deactivate_missing=args.deactivate_missing,
+            dry_run=args.dry_run,
+            chunk_size=args.chunk_size,
+            decimal_separator=args.decimal_separator
+        )
+    elapsed = time.perf_counter() - start
+
+    if args.dry_run:
+        print("** Simulación: no se aplicaron cambios **")
+    print(format_report(report))
+    print(f"Tiempo: {elapsed:.2f} s")
+    return 1 if report["errors"] else 0
+
+
+# ==================== CLIENTES ====================
+
+def cmd_customers_import(args) -> int:
+    """Importa clientes fusionando duplicados"""
+    from app.customer_import import read_customer_file, import_customers, format_report
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        report = import_customers(
+            db,
+            read_customer_file(args.path),
+            dry_run=args.dry_run,
+            batch_size=args.batch_size
+        )
+    elapsed = time.perf_counter() - start
+
+    if args.dry_run:
+        print("** Simulación: no se aplicaron cambios **")
+    print(format_report(report))
+    print(f"Tiempo: {elapsed:.2f} s")
+    return 1 if report["errors"] else 0
+
+
+# ==================== ARCHIVOS ====================
+
+def cmd_media_gc(args) -> int:
+    """Elimina o archiva imágenes y PDFs que ya no están referenciados"""
+    from app.media_gc import DEFAULT_GRACE_HOURS, collect_garbage, format_report
+
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        report = collect_garbage(
+            db,
+            grace_hours=DEFAULT_GRACE_HOURS if args.grace_hours is None else args.grace_hours,
+            archive_dir=args.archive,
+            dry_run=args.dry_run
+        )
+    elapsed = time.perf_counter() - start
+
+    if args.dry_run:
+        print("** Simulación: no se eliminaron archivos **")
+        for path in report["files"][:50]:
+            print(f"  {path}")
+        if len(report["files"]) > 50:
+            print(f"  ... y {len(report['files']) - 50} más")
+    print(format_report(report, dry_run=args.dry_run))
+    print(f"Tiempo: {elapsed:.2f} s")
+    return 1 if report["errors"] else 0
+
+
+# ==================== PROFORMAS ====================
+
+def cmd_quotes_build(args) -> int:
+    """Crea proformas (y sus PDFs) desde un archivo de especificaciones"""
+    from app.quote_batch import read_specs, build_quotes, format_report
+
+    with SessionLocal() as db:
+        report = build_quotes(
+            db,
+            read_specs(args.path),
+            batch_size=args.batch_size,
+            jobs=args.jobs,
+            render_pdfs=not args.no_pdf,
+            dry_run=args.dry_run
+        )
+
+    if args.dry_run:
+        print("** Simulación: no se crearon proformas **")
+    print(format_report(report, dry_run=args.dry_run))
+    return 1 if report["errors"] or report["pdf_errors"] else 0
+
+
+def _search_filters(args) -> dict:
+    """Filtros de la búsqueda de Ver Proformas desde los argumentos de quotes export/zip"""
+    from datetime import datetime
+
+    return {
+        "customer_search": args.customer,
+        "model_search": args.model,
+        "proforma_number": args.number,
+        "date_from": datetime.strptime(args.date_from, "%Y-%m-%d") if args.date_from else None,
+        "date_to": datetime.strptime(args.date_to, "%Y-%m-%d") if args.date_to else None,
+        "advisor_id": args.advisor_id,
+        "template": args.template,
+    }
+
+
+def cmd_quotes_export(args) -> int:
+    """Exporta las proformas que cumplen los filtros a CSV/XLSX (o CSV a la salida estándar)"""
+    from app import export
+
+    fmt = args.format or (Path(args.output).suffix.lstrip(".").lower() if args.output else "csv")
+    filters = _search_filters(args)
+    if not args.output and fmt != "csv":
+        raise ValueError("Para exportar a XLSX indica el archivo con --output")
+
+    with SessionLocal() as db:
+        blocks = export.iter_export(db, fmt, level=args.level, **filters)
+        if args.output:
+            with open(args.output, "wb") as output:
+                for block in blocks:
+                    output.write(block)
+            print(f"Exportado: {args.output}", file=sys.stderr)
+        else:
+            for block in blocks:
+                sys.stdout.buffer.write(block)
+    return 0
+
+
+def cmd_quotes_zip(args) -> int:
+    """Guarda en un ZIP los PDFs de las proformas que cumplen los filtros"""
+    from app import export
+
+    with SessionLocal() as db, open(args.output, "wb") as output:
+        for block in export.iter_pdf_zip(db, **_search_filters(args)):
+            output.write(block)
+    print(f"Exportado: {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_quotes_merge(args) -> int:
+    """Combina varias proformas (o las vigentes de un cliente) en un solo PDF"""
+    from app import crud, quotes
+
+    with SessionLocal() as db:
+        ids = list(args.ids)
+        if args.customer_id is not None:
+            ids += crud.list_customer_proforma_ids(db, args.customer_id, only_valid=not args.include_expired)
+        if not ids:
+            raise ValueError("No hay proformas para combinar (indica IDs o un cliente con proformas vigentes)")
+        path = quotes.render_merged(db, ids, Path(args.output))
+    print(f"PDF combinado ({len(ids)} proformas): {path}", file=sys.stderr)
+    return 0
+
+
+# ==================== DATOS DE PRUEBA ====================
+
+def cmd_seed(args) -> int:
+    """Llena una base vacía con datos sintéticos para pruebas de escala"""
+    from app.db import create_db_engine
+    from app.seed import prepare_database, seed_database, format_report
+
+    def progress(done: int, total: int) -> None:
+        print(f"\r  proformas {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+    engine = create_db_engine(args.db)
+    try:
+        prepare_database(engine)
+        report = seed_database(
+            engine,
+            seed=args.seed,
+            customers=args.customers,
+            advisors=args.advisors,
+            brands=args.brands,
+            models_per_brand=args.models_per_brand,
+            proformas=args.proformas,
+            images=args.images,
+            image_size=args.image_size,
+            batch_size=args.batch_size,
+            progress=progress
+        )
+    finally:
+        engine.dispose()
+
+    print(file=sys.stderr)
+    print(f"Base: {args.db}")
+    print(format_report(report))
+    return 0
+
+
+# ==================== PARSER ====================
+
+def _add_search_arguments(parser: argparse.ArgumentParser) -> None:
+    """Filtros de la búsqueda de Ver Proformas (ver _search_filters)"""
+    parser.add_argument("--customer", help="Nombre o empresa del cliente (parcial)")
+    parser.add_argument("--model", help="Modelo o marca (parcial)")
+    parser.add_argument("--number", help="Número de proforma (parcial)")
+    parser.add_argument("--date-from", help="Desde (AAAA-MM-DD)")
+    parser.add_argument("--date-to", help="Hasta (AAAA-MM-DD, inclusive)")
+    parser.add_argument("--advisor-id", type=int, help="Id del asesor")
+    parser.add_argument("--template", choices=("tractor", "implement"), help="Tipo de equipo")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Herramientas de AgriQuote")
+    groups = parser.add_subparsers(dest="group", required=True)
+
+    # catalog
+    catalog = groups.add_parser("catalog", help="Catálogo de marcas y modelos")
+    catalog_cmds = catalog.add_subparsers(dest="command", required=True)
+
+    catalog_import = catalog_cmds.add_parser("import", help="Importar lista de precios CSV/XLSX")
+    catalog_import.add_argument("path", help="Archivo .csv o .xlsx")
+    catalog_import.add_argument(
+        "--deactivate-missing", action="store_true",
+        help="Desactivar modelos de las marcas del archivo que no aparecen en él"
+    )
+    catalog_import.add_argument("--dry-run", action="store_true", help="Solo mostrar los cambios")
+    catalog_import.add_argument("--chunk-size", type=int, default=1000, help="Filas por transacción")
+    catalog_import.add_argument(
+        "--decimal-separator", choices=(".", ","),
+        help="Separador decimal de los precios ('15.250' con ',' es 15250); sin él, los precios ambiguos son error"
+    )
+    catalog_import.set_defaults(func=cmd_catalog_import)
+
+    # customers
+    customers = groups.add_parser("customers", help="Clientes")
+    customers_cmds = customers.add_subparsers(dest="command", required=True)
+
+    customers_import = customers_cmds.add_parser("import", help="Importar clientes CSV/XLSX")
+    customers_import.add_argument("path", help="Archivo .csv o .xlsx")
+    customers_import.add_argument("--dry-run", action="store_true", help="Solo mostrar los cambios")
+    customers_import.add_argument("--batch-size", type=int, default=1000, help="Filas por transacción")
+    customers_import.set_defaults(func=cmd_customers_import)
+
+    # media
+    media = groups.add_parser("media", help="Imágenes subidas y PDFs generados")
+    media_cmds = media.add_subparsers(dest="command", required=True)
+
+    media_gc = media_cmds.add_parser("gc", help="Eliminar archivos no referenciados")
+    media_gc.add_argument(
+        "--grace-hours", type=float,
+        help="Conservar archivos más recientes que esto (por defecto 168)"
+    )
+    media_gc.add_argument("--archive", type=Path, help="Mover a este directorio en lugar de eliminar")
+    media_gc.add_argument("--dry-run", action="store_true", help="Solo mostrar los archivos")
+    media_gc.set_defaults(func=cmd_media_gc)
+
+    # quotes
+    quotes = groups.add_parser("quotes", help="Proformas")
+    quotes_cmds = quotes.add_subparsers(dest="command", required=True)
+
+    quotes_build = quotes_cmds.add_parser("build", help="Crear proformas desde JSONL/CSV/XLSX")
+    quotes_build.add_argument("path", help="Archivo .jsonl (una proforma por línea) o .csv/.xlsx (un item por fila)")
+    quotes_build.add_argument("--batch-size", type=int, default=100, help="Proformas por transacción")
+    quotes_build.add_argument("--jobs", type=int, help="Procesos para dibujar PDFs (por defecto, uno por CPU)")
+    quotes_build.add_argument("--no-pdf", action="store_true", help="Solo crear las proformas")
+    quotes_build.add_argument("--dry-run", action="store_true", help="Solo validar el archivo")
+    quotes_build.set_defaults(func=cmd_quotes_build)
+
+    quotes_export = quotes_cmds.add_parser("export", help="Exportar la búsqueda de proformas a CSV/XLSX")
+    quotes_export.add_argument("--output", "-o", help="Archivo .csv o .xlsx (sin él, CSV a la salida estándar)")
+    quotes_export.add_argument("--format", choices=("csv", "xlsx"), help="Formato (por defecto, según --output)")
+    quotes_export.add_argument("--level", choices=("items", "proformas"), default="items",
+                               help="Una fila por item (por defecto) o por proforma")
+    _add_search_arguments(quotes_export)
+    quotes_export.set_defaults(func=cmd_quotes_export)
+
+    quotes_zip = quotes_cmds.add_parser("zip", help="Guardar en un ZIP los PDFs de la búsqueda de proformas")
+    quotes_zip.add_argument("--output", "-o", required=True, help="Archivo .zip")
+    _add_search_arguments(quotes_zip)
+    quotes_zip.set_defaults(func=cmd_quotes_zip)
+
+    quotes_merge = quotes_cmds.add_parser("merge", help="Combinar proformas en un solo PDF con marcadores")
+    quotes_merge.add_argument("ids", type=int, nargs="*", help="IDs de las proformas, en el orden del PDF")
+    quotes_merge.add_argument("--output", "-o", required=True, help="Archivo .pdf")
+    quotes_merge.add_argument("--customer-id", type=int, help="Agregar las proformas vigentes del cliente")
+    quotes_merge.add_argument("--include-expired", action="store_true",
+                              help="Con --customer-id, también las vencidas")
+    quotes_merge.set_defaults(func=cmd_quotes_merge)
+
+    # seed
+    from app.db import DB_PATH
+    from app.seed import DEFAULT_BATCH_SIZE, DEFAULT_SEED
+
+    seed = groups.add_parser("seed", help="Generar datos sintéticos para pruebas de escala")
+    seed.add_argument("--db", type=Path, default=DB_PATH, help=f"Base destino, vacía (por defecto {DB_PATH})")
+    seed.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Semilla (misma semilla, mismos datos)")
+    seed.add_argument("--customers", type=int, default=5000, help="Clientes")
+    seed.add_argument("--advisors", type=int, default=25, help="Asesores")
+    seed.add_argument("--brands", type=int, default=16, help="Marcas (mitad tractores, mitad implementos)")
+    seed.add_argument("--models-per-brand", type=int, default=30, help="Modelos por marca")
+    seed.add_argument("--proformas", type=int, default=10000, help="Proformas (p. ej. 10000 a 1000000)")
+    seed.add_argument("--images", type=int, default=20, help="Imágenes distintas repartidas entre los modelos")
+    seed.add_argument("--image-size", type=int, default=1200, help="Ancho de las imágenes en px (0: sin imágenes)")
+    seed.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Proformas por transacción")
+    seed.set_defaults(func=cmd_seed)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    init_db()
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
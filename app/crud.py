@@ -1,15 +1,44 @@
 """
 Operaciones CRUD completas para AgriQuote v2 - Con soporte para IVA personalizable y búsqueda avanzada
 """
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_, func
-from datetime import datetime
+from sqlalchemy import select, insert, update, literal, and_, or_, func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
 
+from app import metrics
 from app.models import (
     Customer, Advisor, Brand, Model, Configuration,
-    Proforma, ProformaItem
+    Proforma, ProformaItem, ProformaSequence
 )
+from app.tracing import trace_functions
+
+# Prefijo por defecto de la numeración de proformas
+PROFORMA_NUMBER_PREFIX = "PF"
+
+
+# ==================== NOTIFICACIÓN DE CAMBIOS ====================
+
+# Entidad -> callbacks a llamar después de cada escritura confirmada
+# ('customers', 'advisors', 'brands', 'models', 'config', 'proformas').
+# La UI los usa para invalidar sus cachés (ver app/cache.py).
+_change_listeners: Dict[str, List[Callable[[], None]]] = {}
+
+
+def on_change(entity: str, callback: Callable[[], None]) -> None:
+    """Registra un callback para las escrituras de `entity`"""
+    _change_listeners.setdefault(entity, []).append(callback)
+
+
+def notify_change(entity: str) -> None:
+    """Avisa que `entity` cambió; los errores de un callback no afectan la escritura"""
+    for callback in _change_listeners.get(entity, ()):
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error en callback de cambios '{entity}': {e}")
 
 
 # ==================== CLIENTES ====================
@@ -17,9 +46,11 @@ from app.models import (
 def list_customers(
     db: Session,
     active_only: bool = True,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0
 ) -> List[Customer]:
-    """Lista clientes con filtros"""
+    """Lista clientes con filtros; `limit`/`offset` paginan en la consulta"""
     query = select(Customer)
     
     if active_only:
@@ -33,7 +64,10 @@ def list_customers(
         )
         query = query.where(search_filter)
     
-    query = query.order_by(Customer.name)
+    # El id desempata los nombres repetidos: páginas estables con offset
+    query = query.order_by(Customer.name, Customer.id)
+    if limit is not None:
+        query = query.limit(limit).offset(offset)
     return db.scalars(query).all()
 
 
@@ -62,6 +96,7 @@ def create_customer(
     )
     db.add(customer)
     db.commit()
+    notify_change("customers")
     db.refresh(customer)
     return customer
 
@@ -85,6 +120,7 @@ def update_customer(
     
     customer.updated_at = datetime.utcnow()
     db.commit()
+    notify_change("customers")
     db.refresh(customer)
     return customer
 
@@ -96,6 +132,7 @@ def delete_customer(db: Session, customer_id: int) -> bool:
         return False
     db.delete(customer)
     db.commit()
+    notify_change("customers")
     return True
 
 
@@ -144,6 +181,7 @@ def create_advisor(
     )
     db.add(advisor)
     db.commit()
+    notify_change("advisors")
     db.refresh(advisor)
     return advisor
 
@@ -167,6 +205,7 @@ def update_advisor(
     
     advisor.updated_at = datetime.utcnow()
     db.commit()
+    notify_change("advisors")
     db.refresh(advisor)
     return advisor
 
@@ -178,6 +217,7 @@ def delete_advisor(db: Session, advisor_id: int) -> bool:
         return False
     db.delete(advisor)
     db.commit()
+    notify_change("advisors")
     return True
 
 
@@ -220,6 +260,7 @@ def create_brand(
     )
     db.add(brand)
     db.commit()
+    notify_change("brands")
     db.refresh(brand)
     return brand
 
@@ -243,6 +284,7 @@ def update_brand(
     
     brand.updated_at = datetime.utcnow()
     db.commit()
+    notify_change("brands")
     db.refresh(brand)
     return brand
 
@@ -254,6 +296,7 @@ def delete_brand(db: Session, brand_id: int) -> bool:
         return False
     db.delete(brand)
     db.commit()
+    notify_change("brands")
     return True
 
 
@@ -306,6 +349,7 @@ def create_model(
     )
     db.add(model)
     db.commit()
+    notify_change("models")
     db.refresh(model)
     return model
 
@@ -329,10 +373,35 @@ def update_model(
     
     model.updated_at = datetime.utcnow()
     db.commit()
+    notify_change("models")
     db.refresh(model)
     return model
 
 
+def set_model_image_info(
+    db: Session,
+    model_id: int,
+    image_path: str,
+    width: Optional[int],
+    height: Optional[int],
+    size_bytes: Optional[int]
+) -> bool:
+    """
+    Guarda las dimensiones y el peso de la imagen de un modelo, solo si el
+    modelo sigue usando `image_path` (el procesamiento corre en segundo plano
+    y la imagen pudo cambiar mientras tanto).
+    """
+    result = db.execute(
+        update(Model)
+        .where(Model.id == model_id, Model.image_path == image_path)
+        .values(image_width=width, image_height=height, image_bytes=size_bytes)
+    )
+    db.commit()
+    if result.rowcount:
+        notify_change("models")
+    return bool(result.rowcount)
+
+
 def delete_model(db: Session, model_id: int) -> bool:
     """Elimina un modelo"""
     model = db.get(Model, model_id)
@@ -340,6 +409,7 @@ def delete_model(db: Session, model_id: int) -> bool:
         return False
     db.delete(model)
     db.commit()
+    notify_change("models")
     return True
 
 
@@ -378,6 +448,7 @@ def set_config(
         db.add(config)
     
     db.commit()
+    notify_change("config")
     db.refresh(config)
     return config
 
@@ -414,51 +485,235 @@ def list_proformas(
     return db.scalars(query).all()
 
 
-def search_proformas(
-    db: Session,
+def _proforma_search_filters(
     customer_search: Optional[str] = None,
     model_search: Optional[str] = None,
     proforma_number: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
     advisor_id: Optional[int] = None,
-    template: Optional[str] = None,
-    limit: int = 1000
-) -> List[Proforma]:
-    """Búsqueda avanzada de proformas con filtros múltiples incluyendo número de proforma"""
-    
-    # Construir query base
-    query = select(Proforma).join(Customer).order_by(Proforma.created_at.desc())
+    template: Optional[str] = None
+) -> List:
+    """Condiciones WHERE de la búsqueda de proformas (requieren JOIN con customers)"""
+    conditions = []
     
     # Filtro por número de proforma (búsqueda parcial)
     if proforma_number:
-        query = query.where(Proforma.number.ilike(f"%{proforma_number}%"))
+        conditions.append(Proforma.number.ilike(f"%{proforma_number}%"))
     
     # Filtro por cliente (nombre o empresa)
     if customer_search:
-        customer_filter = or_(
+        conditions.append(or_(
             Customer.name.ilike(f"%{customer_search}%"),
             Customer.company.ilike(f"%{customer_search}%")
-        )
-        query = query.where(customer_filter)
+        ))
     
     # Filtro por fechas
     if date_from:
-        query = query.where(Proforma.date >= date_from)
+        conditions.append(Proforma.date >= date_from)
     if date_to:
         # Agregar 23:59:59 al final del día para incluir todo el día
         date_to_end = date_to.replace(hour=23, minute=59, second=59)
-        query = query.where(Proforma.date <= date_to_end)
+        conditions.append(Proforma.date <= date_to_end)
     
     # Filtro por asesor
     if advisor_id:
-        query = query.where(Proforma.advisor_id == advisor_id)
+        conditions.append(Proforma.advisor_id == advisor_id)
     
     # Filtro por tipo de template
     if template:
-        query = query.where(Proforma.template == template)
+        conditions.append(Proforma.template == template)
+    
+    # Filtro por modelo/marca: EXISTS sobre los items (usa ix_proforma_items_proforma_id)
+    if model_search:
+        conditions.append(
+            select(ProformaItem.id)
+            .where(
+                ProformaItem.proforma_id == Proforma.id,
+                or_(
+                    ProformaItem.model_name.ilike(f"%{model_search}%"),
+                    ProformaItem.brand_name.ilike(f"%{model_search}%")
+                )
+            )
+            .exists()
+        )
+    
+    return conditions
+
+
+def build_search_proformas_query(
+    customer_search: Optional[str] = None,
+    proforma_number: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    advisor_id: Optional[int] = None,
+    template: Optional[str] = None,
+    limit: int = 1000
+):
+    """
+    Consulta de búsqueda de proformas (sin el filtro por modelo).
+
+    Ordena por created_at DESC; los índices compuestos de Proforma cubren
+    cada filtro por igualdad + ese orden. benchmarks/check_query_plans.py
+    verifica el plan de cada combinación.
+    """
+    return (
+        select(Proforma)
+        .join(Customer)
+        .where(*_proforma_search_filters(
+            customer_search=customer_search,
+            proforma_number=proforma_number,
+            date_from=date_from,
+            date_to=date_to,
+            advisor_id=advisor_id,
+            template=template
+        ))
+        .order_by(Proforma.created_at.desc())
+        .limit(limit)
+    )
+
+
+# Ordenes disponibles en la grilla de "Ver Proformas": clave -> columnas.
+# Cada orden coincide con un índice (ix_proformas_date, ix_proformas_total,
+# ix_customers_name + ix_proformas_customer_created_at) y termina en un id
+# para que la paginación sea estable sin ordenar en memoria.
+PROFORMA_SORTS = {
+    "date": (Proforma.date, Proforma.id),
+    "total": (Proforma.total, Proforma.id),
+    "customer": (Customer.name, Customer.id, Proforma.created_at, Proforma.id),
+}
+
+
+def build_page_proformas_query(
+    sort: str = "date",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 25,
+    **filters
+):
+    """Consulta de una página de la grilla (filas livianas, sin objetos ORM)"""
+    if sort not in PROFORMA_SORTS:
+        raise ValueError(f"Orden no soportado: {sort}")
+    order_by = [column.desc() if descending else column.asc() for column in PROFORMA_SORTS[sort]]
+    
+    items_count = (
+        select(func.count(ProformaItem.id))
+        .where(ProformaItem.proforma_id == Proforma.id)
+        .correlate(Proforma)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Proforma.id,
+            Proforma.number,
+            Proforma.date,
+            Customer.name.label("customer_name"),
+            Advisor.name.label("advisor_name"),
+            Proforma.template,
+            Proforma.currency,
+            Proforma.total,
+            items_count.label("items_count"),
+        )
+        .join(Customer, Proforma.customer_id == Customer.id)
+        .outerjoin(Advisor, Proforma.advisor_id == Advisor.id)
+        .where(*_proforma_search_filters(**filters))
+        .order_by(*order_by)
+        .limit(page_size)
+        .offset((max(page, 1) - 1) * page_size)
+    )
+
+
+def build_proforma_keys_query(
+    after: Optional[tuple] = None,
+    limit: int = 500,
+    **filters
+):
+    """
+    Ids de las proformas que cumplen los filtros de la búsqueda, de la más
+    reciente a la más antigua (created_at, id), a partir de la clave `after`
+    (la última del bloque anterior). Paginación por clave para recorrer todos
+    los resultados por bloques (ver app/export.py); usa los mismos índices
+    que build_search_proformas_query.
+    """
+    query = (
+        select(Proforma.id)
+        .join(Customer, Proforma.customer_id == Customer.id)
+        .where(*_proforma_search_filters(**filters))
+        .order_by(Proforma.created_at.desc(), Proforma.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        after_created_at, after_id = after
+        # created_at <= clave es el rango del índice; el OR descarta las ya leídas
+        query = query.where(
+            Proforma.created_at <= after_created_at,
+            or_(Proforma.created_at < after_created_at, Proforma.id < after_id)
+        )
+    return query
+
+
+def page_proformas(
+    db: Session,
+    sort: str = "date",
+    descending: bool = True,
+    page: int = 1,
+    page_size: int = 25,
+    **filters
+) -> Dict:
+    """
+    Una página de resultados de la búsqueda de proformas, ordenada en la base.
+
+    `filters` son los de la búsqueda (customer_search, model_search,
+    proforma_number, date_from, date_to, advisor_id, template). Retorna
+    {"rows": [dict], "total", "page", "page_size", "pages"}; cada fila tiene
+    id, number, date, customer_name, advisor_name, template, currency, total
+    e items_count. `page` se ajusta al rango válido.
+    """
+    total = db.scalar(
+        select(func.count(Proforma.id))
+        .join(Customer, Proforma.customer_id == Customer.id)
+        .where(*_proforma_search_filters(**filters))
+    ) or 0
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 1), pages)
+    
+    rows = db.execute(
+        build_page_proformas_query(
+            sort=sort, descending=descending, page=page, page_size=page_size, **filters
+        )
+    ).mappings().all()
+    
+    return {
+        "rows": [dict(row) for row in rows],
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": pages,
+    }
+
+
+def search_proformas(
+    db: Session,
+    customer_search: Optional[str] = None,
+    model_search: Optional[str] = None,
+    proforma_number: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    advisor_id: Optional[int] = None,
+    template: Optional[str] = None,
+    limit: int = 1000
+) -> List[Proforma]:
+    """Búsqueda avanzada de proformas con filtros múltiples incluyendo número de proforma"""
     
-    query = query.limit(limit)
+    query = build_search_proformas_query(
+        customer_search=customer_search,
+        proforma_number=proforma_number,
+        date_from=date_from,
+        date_to=date_to,
+        advisor_id=advisor_id,
+        template=template,
+        limit=limit
+    )
     proformas = db.scalars(query).all()
     
     # Filtro por modelo (requiere búsqueda en items)
@@ -487,56 +742,218 @@ def get_proforma_by_number(db: Session, number: str) -> Optional[Proforma]:
     ).first()
 
 
+def list_customer_proforma_ids(
+    db: Session,
+    customer_id: int,
+    only_valid: bool = True,
+    as_of: Optional[datetime] = None
+) -> List[int]:
+    """
+    IDs de las proformas de un cliente, de la más antigua a la más reciente.
+    Con `only_valid` solo las vigentes a `as_of` (por defecto ahora): fecha
+    más días de vigencia sin vencer.
+    """
+    rows = db.execute(
+        select(Proforma.id, Proforma.date, Proforma.validity_days)
+        .where(Proforma.customer_id == customer_id)
+        .order_by(Proforma.created_at, Proforma.id)
+    ).all()
+    if not only_valid:
+        return [row.id for row in rows]
+
+    today = (as_of or datetime.now()).date()
+    return [
+        row.id for row in rows
+        if (row.date + timedelta(days=row.validity_days or 0)).date() >= today
+    ]
+
+
+def format_proforma_number(prefix: str, year: int, value: int) -> str:
+    """Formato del número de proforma: PF-2025-00042"""
+    return f"{prefix}-{year}-{value:05d}"
+
+
+def allocate_proforma_number(
+    db: Session,
+    prefix: str = PROFORMA_NUMBER_PREFIX,
+    year: Optional[int] = None
+) -> str:
+    """
+    Reserva el siguiente número de proforma de forma atómica.
+    
+    Usa UPDATE ... RETURNING sobre la secuencia del prefijo/año, por lo que dos
+    sesiones (o procesos) nunca obtienen el mismo valor. NO hace commit: el
+    número queda reservado dentro de la transacción del llamador y se libera
+    si ésta hace rollback.
+    """
+    year = year or datetime.now().year
+    
+    # Crear la secuencia si no existe (primera escritura de la transacción,
+    # toma el bloqueo de escritura antes de cualquier lectura)
+    db.execute(
+        sqlite_insert(ProformaSequence)
+        .values(prefix=prefix, year=year, last_value=0, updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["prefix", "year"])
+    )
+    
+    while True:
+        value = db.execute(
+            update(ProformaSequence)
+            .where(
+                ProformaSequence.prefix == prefix,
+                ProformaSequence.year == year
+            )
+            .values(
+                last_value=ProformaSequence.last_value + 1,
+                updated_at=datetime.utcnow()
+            )
+            .returning(ProformaSequence.last_value)
+            .execution_options(synchronize_session=False)
+        ).scalar_one()
+        
+        number = format_proforma_number(prefix, year, value)
+        
+        # Evitar colisión con números ingresados manualmente
+        exists = db.scalar(
+            select(Proforma.id).where(Proforma.number == number)
+        )
+        if not exists:
+            return number
+        metrics.PROFORMA_NUMBER_RETRIES.inc()
+
+
+# Columnas copiadas tal cual al duplicar (los totales no cambian: mismos items)
+_DUPLICATE_HEADER_COLUMNS = (
+    "customer_id", "advisor_id", "customer_attention", "template",
+    "validity_days", "currency", "subtotal", "discount",
+    "subtotal_after_discount", "tax", "total",
+    "custom_terms", "custom_fiscal_note", "notes",
+)
+_DUPLICATE_ITEM_COLUMNS = (
+    "model_id", "brand_name", "model_name", "year", "description",
+    "image_path", "qty", "unit_price", "discount_percent", "discount_amount",
+    "line_subtotal", "tax_rate", "line_tax", "line_total", "currency",
+)
+
+
 def duplicate_proforma(
     db: Session,
     original_id: int,
-    new_number: str,
+    new_number: Optional[str] = None,
     new_date: Optional[datetime] = None
-) -> Optional[Proforma]:
-    """Duplica una proforma existente con nuevo número y fecha"""
-    original = db.get(Proforma, original_id)
-    if not original:
+) -> Optional[Dict]:
+    """
+    Duplica una proforma existente con nuevo número (o el siguiente de la
+    secuencia) y fecha.
+    
+    La copia se hace en SQL (INSERT ... SELECT del encabezado y de los items)
+    sin cargar la original en Python. Retorna {"id", "number"} de la nueva
+    proforma o None si la original no existe. Lanza ValueError si el número
+    ya existe.
+    """
+    number = (new_number or "").strip() or allocate_proforma_number(db)
+    now = datetime.utcnow()
+    
+    proformas = Proforma.__table__
+    items = ProformaItem.__table__
+    
+    try:
+        new_id = db.execute(
+            insert(proformas)
+            .from_select(
+                ["number", "date", "created_at", "updated_at", "pdf_path",
+                 *_DUPLICATE_HEADER_COLUMNS],
+                select(
+                    literal(number, proformas.c.number.type),
+                    literal(new_date or now, proformas.c.date.type),
+                    literal(now, proformas.c.created_at.type),
+                    literal(now, proformas.c.updated_at.type),
+                    literal("", proformas.c.pdf_path.type),
+                    *[proformas.c[name] for name in _DUPLICATE_HEADER_COLUMNS]
+                ).where(proformas.c.id == original_id)
+            )
+            .returning(proformas.c.id)
+        ).scalar_one_or_none()
+    except IntegrityError:
+        # UNIQUE(number): otra sesión ya usó este número
+        db.rollback()
+        raise ValueError(f"Ya existe una proforma con el número {number}")
+    
+    if new_id is None:
+        db.rollback()
         return None
     
-    # Preparar datos de items manteniendo toda la información
-    items_data = []
-    for item in original.items:
-        items_data.append({
-            "model_id": item.model_id,
-            "brand_name": item.brand_name,
-            "model_name": item.model_name,
-            "year": item.year,
-            "description": item.description,
-            "image_path": item.image_path,
-            "qty": item.qty,
-            "unit_price": item.unit_price,
-            "discount_percent": item.discount_percent,
-            "currency": item.currency,
-            "tax_rate": item.tax_rate  # Mantener IVA personalizado
-        })
-    
-    # Crear nueva proforma con los mismos datos
-    new_proforma = create_proforma(
-        db,
-        number=new_number,
-        customer_id=original.customer_id,
-        template=original.template,
-        items_data=items_data,
-        advisor_id=original.advisor_id,
-        customer_attention=original.customer_attention,
-        validity_days=original.validity_days,
-        date=new_date or datetime.utcnow(),
-        custom_terms=original.custom_terms,
-        custom_fiscal_note=original.custom_fiscal_note,
-        notes=original.notes
+    db.execute(
+        insert(items).from_select(
+            ["proforma_id", *_DUPLICATE_ITEM_COLUMNS],
+            select(
+                literal(new_id, items.c.proforma_id.type),
+                *[items.c[name] for name in _DUPLICATE_ITEM_COLUMNS]
+            )
+            .where(items.c.proforma_id == original_id)
+            .order_by(items.c.id)
+        )
     )
     
-    return new_proforma
-
-
-def create_proforma(
+    db.commit()
+    metrics.PROFORMAS_CREATED.inc(origin="duplicate")
+    notify_change("proformas")
+    return {"id": new_id, "number": number}
+
+
+def get_proforma_prefill(db: Session, proforma_id: int) -> Optional[Dict]:
+    """
+    Proyección liviana (una sola consulta) de una proforma para precargar el
+    formulario de Nueva Proforma.
+    """
+    rows = db.execute(
+        select(
+            Proforma.number,
+            Proforma.customer_id,
+            Proforma.template,
+            ProformaItem.brand_name,
+            ProformaItem.model_name,
+            ProformaItem.year,
+            ProformaItem.description,
+            ProformaItem.qty,
+            ProformaItem.unit_price,
+            ProformaItem.discount_percent,
+            ProformaItem.currency,
+            ProformaItem.tax_rate,
+        )
+        .outerjoin(ProformaItem, ProformaItem.proforma_id == Proforma.id)
+        .where(Proforma.id == proforma_id)
+        .order_by(ProformaItem.id)
+    ).all()
+    
+    if not rows:
+        return None
+    
+    return {
+        "number": rows[0].number,
+        "customer_id": rows[0].customer_id,
+        "template": rows[0].template,
+        "items": [
+            {
+                "brand_name": row.brand_name,
+                "model_name": row.model_name,
+                "year": row.year,
+                "description": row.description,
+                "qty": row.qty,
+                "unit_price": row.unit_price,
+                "discount_percent": row.discount_percent,
+                "currency": row.currency,
+                "tax_rate": row.tax_rate,
+            }
+            for row in rows
+            if row.brand_name is not None
+        ],
+    }
+
+
+def insert_proforma(
     db: Session,
-    number: str,
+    number: Optional[str],
     customer_id: int,
     template: str,
     items_data: List[dict],
@@ -546,59 +963,162 @@ def create_proforma(
     date: Optional[datetime] = None,
     custom_terms: str = "",
     custom_fiscal_note: str = "",
-    notes: str = ""
-) -> Proforma:
-    """Crea una nueva proforma con sus items (con IVA personalizable)"""
-    
-    # Crear la proforma
-    proforma = Proforma(
-        number=number,
-        customer_id=customer_id,
-        advisor_id=advisor_id,
-        customer_attention=customer_attention.strip(),
-        template=template,
-        validity_days=validity_days,
-        date=date or datetime.utcnow(),
-        custom_terms=custom_terms.strip(),
-        custom_fiscal_note=custom_fiscal_note.strip(),
-        notes=notes.strip()
-    )
+    notes: str = "",
+    pdf_path: str = "",
+    source_ref: Optional[str] = None
+) -> Dict:
+    """
+    Inserta una proforma con sus items SIN hacer commit (ver create_proforma),
+    para cargas en lote que confirman varias proformas por transacción.
     
-    db.add(proforma)
-    db.flush()
+    Reserva el número (si no se indica), hace INSERT ... RETURNING del
+    encabezado y un único INSERT masivo (executemany) de los items. `pdf_path`
+    puede contener `{number}`, que se reemplaza por el número asignado.
+    Lanza ValueError si el número (o `source_ref`) ya existe; SQLite descarta
+    solo la sentencia fallida, la transacción sigue siendo utilizable.
+    """
+    if not items_data:
+        raise ValueError("La proforma debe tener al menos un item")
     
-    # Crear los items con IVA personalizable
-    currencies = set()
+    # Calcular líneas y totales en memoria (sin consultas)
+    lines = []
     for item_data in items_data:
-        item = ProformaItem(
-            proforma_id=proforma.id,
+        line = ProformaItem.compute_line(
+            item_data["qty"],
+            item_data["unit_price"],
+            item_data.get("discount_percent", 0.0),
+            # IVA personalizable - usar el valor proporcionado o 13% por defecto
+            item_data.get("tax_rate", 13.0)
+        )
+        line.update(
             model_id=item_data.get("model_id"),
             brand_name=item_data["brand_name"],
             model_name=item_data["model_name"],
             year=item_data.get("year"),
-            description=item_data.get("description", ""),
-            image_path=item_data.get("image_path", ""),
+            description=item_data.get("description", "") or "",
+            image_path=item_data.get("image_path", "") or "",
             qty=item_data["qty"],
             unit_price=item_data["unit_price"],
-            discount_percent=item_data.get("discount_percent", 0.0),
-            currency=item_data["currency"],
-            # IVA personalizable - usar el valor proporcionado o 13% por defecto
-            tax_rate=item_data.get("tax_rate", 13.0)
+            currency=item_data["currency"]
         )
-        item.calculate_totals()
-        currencies.add(item_data["currency"])
-        db.add(item)
+        lines.append(line)
+    
+    currencies = {line["currency"] for line in lines}
+    currency = "MIXED" if len(currencies) > 1 else currencies.pop()
+    totals = Proforma.compute_totals(lines)
     
-    # Determinar moneda
-    proforma.currency = "MIXED" if len(currencies) > 1 else currencies.pop()
+    # Reservar número dentro de esta transacción
+    number = (number or "").strip() or allocate_proforma_number(db)
+    pdf_path = pdf_path.replace("{number}", number)
+    now = datetime.utcnow()
     
-    # Calcular totales
-    db.flush()
-    proforma.calculate_totals()
+    try:
+        proforma_id = db.execute(
+            insert(Proforma)
+            .values(
+                number=number,
+                customer_id=customer_id,
+                advisor_id=advisor_id,
+                customer_attention=customer_attention.strip(),
+                template=template,
+                validity_days=validity_days,
+                date=date or now,
+                currency=currency,
+                custom_terms=custom_terms.strip(),
+                custom_fiscal_note=custom_fiscal_note.strip(),
+                notes=notes.strip(),
+                pdf_path=pdf_path,
+                source_ref=source_ref,
+                created_at=now,
+                updated_at=now,
+                **totals
+            )
+            .returning(Proforma.id)
+        ).scalar_one()
+    except IntegrityError as e:
+        # UNIQUE(number) o UNIQUE(source_ref): otra sesión ya los usó
+        if source_ref and "source_ref" in str(e.orig):
+            raise ValueError(f"Ya existe una proforma con la referencia {source_ref}")
+        raise ValueError(f"Ya existe una proforma con el número {number}")
     
+    # Items: un solo INSERT ejecutado con executemany (Core, sin unidad de trabajo ORM)
+    db.connection().execute(
+        insert(ProformaItem.__table__),
+        [{**line, "proforma_id": proforma_id} for line in lines]
+    )
+    
+    return {
+        "id": proforma_id,
+        "number": number,
+        "currency": currency,
+        "pdf_path": pdf_path,
+        **totals
+    }
+
+
+def create_proforma(
+    db: Session,
+    number: Optional[str],
+    customer_id: int,
+    template: str,
+    items_data: List[dict],
+    advisor_id: Optional[int] = None,
+    customer_attention: str = "",
+    validity_days: int = 15,
+    date: Optional[datetime] = None,
+    custom_terms: str = "",
+    custom_fiscal_note: str = "",
+    notes: str = "",
+    pdf_path: str = ""
+) -> Dict:
+    """
+    Crea una nueva proforma con sus items (con IVA personalizable).
+    
+    Todo ocurre en una sola transacción (ver insert_proforma): reserva del
+    número, encabezado, items y ruta del PDF. No se recarga la proforma
+    después del commit: retorna un resumen con id, número, totales y ruta del
+    PDF. Lanza ValueError si el número ya existe.
+    """
+    try:
+        created = insert_proforma(
+            db,
+            number=number,
+            customer_id=customer_id,
+            template=template,
+            items_data=items_data,
+            advisor_id=advisor_id,
+            customer_attention=customer_attention,
+            validity_days=validity_days,
+            date=date,
+            custom_terms=custom_terms,
+            custom_fiscal_note=custom_fiscal_note,
+            notes=notes,
+            pdf_path=pdf_path
+        )
+    except ValueError:
+        db.rollback()
+        raise
+    
+    db.commit()
+    metrics.PROFORMAS_CREATED.inc(origin="app")
+    notify_change("proformas")
+    return created
+
+
+def set_proforma_pdf_path(db: Session, proforma_id: int, pdf_path: str) -> bool:
+    """
+    Guarda la ruta del PDF de una proforma que no tenía (dibujado fuera de la
+    UI). Así la limpieza de archivos (app/media_gc.py) lo considera referenciado.
+    """
+    result = db.execute(
+        update(Proforma)
+        .where(Proforma.id == proforma_id, or_(Proforma.pdf_path == "", Proforma.pdf_path.is_(None)))
+        .values(pdf_path=pdf_path)
+    )
     db.commit()
-    db.refresh(proforma)
-    return proforma
+    if result.rowcount:
+        notify_change("proformas")
+    return bool(result.rowcount)
 
 
 def delete_proforma(db: Session, proforma_id: int) -> bool:
@@ -608,6 +1128,7 @@ def delete_proforma(db: Session, proforma_id: int) -> bool:
         return False
     db.delete(proforma)
     db.commit()
+    notify_change("proformas")
     return True
 
 
@@ -643,4 +1164,11 @@ def get_stats(db: Session) -> Dict:
             "total_brands": 0,
             "total_models": 0,
             "total_proformas": 0,
-        }
\ No newline at end of file
+        }
+
+
+# ==================== TRAZAS ====================
+
+# Cada función pública es un span "crud.<función>" (app/tracing.py); los
+# avisos de cambios no tocan la base
+trace_functions(globals(), __name__, exclude=("on_change", "notify_change"))
@@ -0,0 +1,348 @@
+"""
+Importación masiva de clientes con detección de duplicados por bloqueo (blocking)
+
+En lugar de comparar cada fila contra todos los clientes (O(n·m)), se
+construye un índice en memoria con claves de bloqueo:
+
+- email normalizado (coincidencia exacta => duplicado)
+- teléfono normalizado (duplicado si el nombre también se parece)
+- tokens del nombre ordenados (coincidencia exacta => candidato)
+- pares de palabras del nombre (candidatos difusos, se comparan por trigramas)
+
+Solo los candidatos que comparten una clave se comparan entre sí. Los
+bloques de pares guardan nombres normalizados distintos, no clientes: con
+miles de "Juan Pérez" la similitud se calcula una vez por nombre, así que las
+comparaciones por fila dependen de la variedad de nombres y no de la cantidad
+de clientes (benchmarks/bench_customer_import.py).
+"""
+import re
+import unicodedata
+from itertools import combinations
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.crud import notify_change
+from app.models import Customer
+from app.tabular import iter_records
+
+
+COLUMN_ALIASES = {
+    "name": ("nombre", "name", "cliente", "razon_social", "customer"),
+    "company": ("empresa", "company", "compania"),
+    "email": ("email", "correo", "e_mail", "correo_electronico"),
+    "phone": ("telefono", "phone", "tel", "celular", "movil"),
+    "address": ("direccion", "address", "domicilio"),
+}
+
+# Similitud mínima (Jaccard de trigramas) para considerar dos nombres iguales
+NAME_MATCH_THRESHOLD = 0.85
+# Similitud mínima cuando además coincide el teléfono
+PHONE_NAME_THRESHOLD = 0.5
+# Palabras más cortas ("de", "la") no sirven como bloque
+MIN_TOKEN_LENGTH = 3
+
+COUNTRY_CODE = "506"
+DEFAULT_BATCH_SIZE = 1000
+
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+# ==================== NORMALIZACIÓN ====================
+
+def clean_text(value) -> str:
+    """Texto para guardar: sin espacios repetidos"""
+    return " ".join(str(value).split()) if value not in (None, "") else ""
+
+
+def normalize_name(value) -> str:
+    """'  José  PÉREZ, S.A. ' -> 'jose perez sa'"""
+    text = unicodedata.normalize("NFKD", clean_text(value).casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+
+def normalize_email(value) -> str:
+    email = clean_text(value).lower()
+    return email if _EMAIL_RE.match(email) else ""
+
+
+def normalize_phone(value) -> str:
+    """'+506 8888-7777' -> '88887777'. Vacío si no parece un teléfono"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    digits = re.sub(r"\D", "", str(value or ""))
+    if len(digits) > 8 and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits if len(digits) >= 7 else ""
+
+
+def name_grams(normalized_name: str) -> Set[str]:
+    padded = f"  {normalized_name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_blocks(normalized_name: str) -> Set[str]:
+    """
+    Claves de bloqueo difuso: cada par de palabras del nombre. Un error de
+    tipeo en una palabra deja intactos los pares formados por las demás.
+    Los nombres de una o dos palabras se bloquean por palabra suelta.
+    """
+    words = sorted({w for w in normalized_name.split() if len(w) >= MIN_TOKEN_LENGTH})
+    if len(words) < 3:
+        return set(words)
+    return {f"{a} {b}" for a, b in combinations(words, 2)}
+
+
+def name_similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+# ==================== ÍNDICE DE BLOQUEO ====================
+
+class BlockingIndex:
+    """Índice en memoria de clientes por claves de bloqueo"""
+
+    def __init__(self):
+        self.records: Dict[object, Dict] = {}
+        self.by_email: Dict[str, object] = {}
+        self.by_phone: Dict[str, List[object]] = {}
+        self.by_tokens: Dict[str, List[object]] = {}
+        self.by_name: Dict[str, List[object]] = {}
+        self.by_block: Dict[str, Set[str]] = {}
+
+    def add(self, key, record: Dict) -> None:
+        """Indexa un registro normalizado bajo `key` (id o clave provisional)"""
+        self.records[key] = record
+        if record["email_norm"]:
+            self.by_email.setdefault(record["email_norm"], key)
+        if record["phone_norm"]:
+            self.by_phone.setdefault(record["phone_norm"], []).append(key)
+        if record["name_norm"]:
+            tokens = " ".join(sorted(record["name_norm"].split()))
+            self.by_tokens.setdefault(tokens, []).append(key)
+            keys = self.by_name.setdefault(record["name_norm"], [])
+            keys.append(key)
+            if len(keys) == 1:
+                for block in name_blocks(record["name_norm"]):
+                    self.by_block.setdefault(block, set()).add(record["name_norm"])
+
+    def find(self, record: Dict) -> Optional[tuple]:
+        """Retorna (key, motivo) del duplicado más probable o None"""
+        # 1. Email idéntico
+        if record["email_norm"] and record["email_norm"] in self.by_email:
+            return self.by_email[record["email_norm"]], "email"
+
+        # 2. Teléfono idéntico y nombre parecido
+        for key in self.by_phone.get(record["phone_norm"], ()) if record["phone_norm"] else ():
+            other = self.records[key]
+            if (not self._conflict(record, other)
+                    and name_similarity(record["grams"], other["grams"]) >= PHONE_NAME_THRESHOLD):
+                return key, "teléfono"
+
+        if not record["name_norm"]:
+            return None
+
+        # 3. Mismos tokens del nombre (orden distinto)
+        tokens = " ".join(sorted(record["name_norm"].split()))
+        for key in self.by_tokens.get(tokens, ()):
+            if not self._conflict(record, self.records[key]):
+                return key, "nombre"
+
+        # 4. Nombre parecido: solo nombres que comparten un bloque, una
+        # comparación por nombre distinto (ordenados: empates reproducibles)
+        candidates = set()
+        for block in name_blocks(record["name_norm"]):
+            candidates.update(self.by_block.get(block, ()))
+
+        size = len(record["grams"])
+        best, best_score = None, 0.0
+        for name in sorted(candidates):
+            keys = self.by_name[name]
+            grams = self.records[keys[0]]["grams"]
+            # Filtro por tamaño: Jaccard >= t exige t·|A| <= |B| <= |A|/t
+            if not size * NAME_MATCH_THRESHOLD <= len(grams) <= size / NAME_MATCH_THRESHOLD:
+                continue
+            score = name_similarity(record["grams"], grams)
+            if score < NAME_MATCH_THRESHOLD or score <= best_score:
+                continue
+            for key in keys:
+                if not self._conflict(record, self.records[key]):
+                    best, best_score = key, score
+                    break
+        return (best, "nombre similar") if best is not None else None
+
+    @staticmethod
+    def _conflict(a: Dict, b: Dict) -> bool:
+        """Dos registros con emails (o teléfonos) distintos no son la misma persona"""
+        if a["email_norm"] and b["email_norm"] and a["email_norm"] != b["email_norm"]:
+            return True
+        if a["phone_norm"] and b["phone_norm"] and a["phone_norm"] != b["phone_norm"]:
+            return True
+        return False
+
+
+def _normalized(record: Dict) -> Dict:
+    name_norm = normalize_name(record.get("name"))
+    return {
+        "name": clean_text(record.get("name")),
+        "company": clean_text(record.get("company")),
+        "email": normalize_email(record.get("email")),
+        "phone": clean_text(record.get("phone")),
+        "address": clean_text(record.get("address")),
+        "name_norm": name_norm,
+        "email_norm": normalize_email(record.get("email")),
+        "phone_norm": normalize_phone(record.get("phone")),
+        "grams": name_grams(name_norm) if name_norm else set(),
+    }
+
+
+# ==================== IMPORTACIÓN ====================
+
+MERGE_FIELDS = ("company", "email", "phone", "address")
+
+
+def read_customer_file(source, filename: Optional[str] = None) -> Iterator[Dict]:
+    """Lee un archivo CSV/XLSX de clientes fila por fila (ver app.tabular)"""
+    return iter_records(source, COLUMN_ALIASES, required=("name",), filename=filename)
+
+
+def import_customers(
+    db: Session,
+    rows: Iterable[Dict],
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> Dict:
+    """
+    Importa clientes detectando duplicados contra la base y dentro del archivo.
+
+    Los duplicados se fusionan: se completan los campos vacíos del cliente
+    existente (empresa, email, teléfono, dirección) sin sobrescribir datos.
+    Los clientes nuevos se insertan con executemany en lotes de `batch_size`.
+    Retorna un reporte con nuevos, fusionados y errores.
+    """
+    report = {
+        "rows": 0,
+        "new": 0,
+        "merged": 0,
+        "merged_in_file": 0,
+        "errors": [],
+        "matches": [],
+    }
+
+    # Índice de clientes existentes: una sola consulta
+    index = BlockingIndex()
+    for row in db.execute(
+        select(Customer.id, Customer.name, Customer.company, Customer.email,
+               Customer.phone, Customer.address)
+    ):
+        record = _normalized(row._asdict())
+        record["email"] = row.email or ""
+        index.add(row.id, record)
+
+    pending_new: Dict[str, Dict] = {}
+    pending_updates: Dict[int, Dict] = {}
+
+    for raw in rows:
+        report["rows"] += 1
+        row_number = raw.get("_row", report["rows"])
+        record = _normalized(raw)
+        if not record["name"]:
+            report["errors"].append({"row": row_number, "error": "nombre vacío"})
+            continue
+
+        match = index.find(record)
+        if match is None:
+            key = f"new:{row_number}"
+            index.add(key, record)
+            pending_new[key] = record
+            continue
+
+        key, reason = match
+        target = index.records[key]
+        filled = {
+            field: record[field]
+            for field in MERGE_FIELDS
+            if record[field] and not target[field]
+        }
+        target.update(filled)
+        if filled.get("email"):
+            target["email_norm"] = record["email_norm"]
+            index.by_email.setdefault(record["email_norm"], key)
+        if filled.get("phone"):
+            target["phone_norm"] = record["phone_norm"]
+            index.by_phone.setdefault(record["phone_norm"], []).append(key)
+
+        if key in pending_new:
+            report["merged_in_file"] += 1
+        else:
+            report["merged"] += 1
+            if filled:
+                pending_updates.setdefault(key, {}).update(filled)
+        if len(report["matches"]) < 500:
+            report["matches"].append({
+                "row": row_number,
+                "name": record["name"],
+                "matched": target["name"],
+                "customer_id": key if not isinstance(key, str) else None,
+                "reason": reason,
+            })
+
+    report["new"] = len(pending_new)
+    if dry_run:
+        return report
+
+    now = datetime.utcnow()
+    new_rows = [
+        {
+            **{field: record[field] for field in ("name", *MERGE_FIELDS)},
+            "active": True,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for record in pending_new.values()
+    ]
+    for start in range(0, len(new_rows), batch_size):
+        db.connection().execute(insert(Customer.__table__), new_rows[start:start + batch_size])
+        db.commit()
+
+    # Completar datos de clientes existentes (mismas columnas para executemany)
+    customers = Customer.__table__
+    update_stmt = (
+        update(customers)
+        .where(customers.c.id == bindparam("_id"))
+        .values(**{field: bindparam(field) for field in MERGE_FIELDS}, updated_at=now)
+    )
+    updates = [
+        {"_id": key, **{field: index.records[key][field] for field in MERGE_FIELDS}}
+        for key in pending_updates
+    ]
+    for start in range(0, len(updates), batch_size):
+        db.connection().execute(update_stmt, updates[start:start + batch_size])
+        db.commit()
+
+    if new_rows or updates:
+        notify_change("customers")
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Resumen en texto del reporte de importación"""
+    lines = [
+        f"Filas leídas:              {report['rows']}",
+        f"Clientes nuevos:           {report['new']}",
+        f"Fusionados con existentes: {report['merged']}",
+        f"Duplicados en el archivo:  {report['merged_in_file']}",
+        f"Errores:                   {len(report['errors'])}",
+    ]
+    for error in report["errors"][:20]:
+        lines.append(f"  fila {error['row']}: {error['error']}")
+    if len(report["errors"]) > 20:
+        lines.append(f"  ... y {len(report['errors']) - 20} más")
+    return "\n".join(lines)
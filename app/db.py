@@ -1,23 +1,59 @@
 """
 Configuración de la base de datos SQLAlchemy
 """
+import os
 from pathlib import Path
+from typing import Tuple
 from sqlalchemy import create_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from contextlib import contextmanager
 
-# Ruta de la base de datos
+# Ruta de la base de datos (AGRIQUOTE_DB_PATH apunta a otra, p. ej. una
+# generada con `python -m app.cli seed` para pruebas de escala) y de sus archivos
 BASE_DIR = Path(__file__).resolve().parent.parent
-DB_PATH = BASE_DIR / "data" / "agriquote.db"
+DEFAULT_DB_PATH = BASE_DIR / "data" / "agriquote.db"
+DB_PATH = Path(os.environ.get("AGRIQUOTE_DB_PATH") or DEFAULT_DB_PATH)
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+
+def storage_dirs(db_path: Path) -> Tuple[Path, Path]:
+    """
+    (imágenes subidas, PDFs generados) de una base. La base por defecto usa
+    media/uploads y outputs/ del proyecto; cualquier otra (p. ej. una de
+    `seed`) usa <nombre>_files/ junto al archivo, así sus archivos y la
+    recolección de huérfanos (app/media_gc.py) no se mezclan con los de la
+    base real.
+    """
+    db_path = Path(db_path)
+    if db_path.resolve() == DEFAULT_DB_PATH.resolve():
+        return BASE_DIR / "media" / "uploads", BASE_DIR / "outputs"
+    root = db_path.parent / f"{db_path.stem}_files"
+    return root / "uploads", root / "outputs"
+
+
+# AGRIQUOTE_UPLOAD_DIR / AGRIQUOTE_OUTPUTS_DIR reemplazan las de storage_dirs
+UPLOAD_DIR = Path(os.environ.get("AGRIQUOTE_UPLOAD_DIR") or storage_dirs(DB_PATH)[0])
+OUTPUTS_DIR = Path(os.environ.get("AGRIQUOTE_OUTPUTS_DIR") or storage_dirs(DB_PATH)[1])
+
+
+def create_db_engine(db_path: Path, echo: bool = False):
+    """Crea un engine SQLite para la ruta indicada (también usado por benchmarks)"""
+    return create_engine(
+        f"sqlite:///{db_path}",
+        # timeout: espera por el bloqueo de escritura en lugar de fallar de inmediato
+        # cuando varias sesiones/procesos escriben al mismo tiempo
+        connect_args={"check_same_thread": False, "timeout": 30},
+        echo=echo  # Cambiar a True para debug SQL
+    )
+
+
 # Configuración del engine
 DATABASE_URL = f"sqlite:///{DB_PATH}"
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False  # Cambiar a True para debug SQL
-)
+engine = create_db_engine(DB_PATH)
+
+# Conteo/tiempos de consultas y log de consultas lentas (app/instrumentation.py)
+from app.instrumentation import instrument_engine
+instrument_engine(engine)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -48,12 +84,16 @@ def init_db():
     # Importar todos los modelos
     from app.models import (
         Customer, Advisor, Brand, Model, Configuration,
-        Proforma, ProformaItem
+        Proforma, ProformaItem, ProformaSequence
     )
     
     # Crear todas las tablas
     Base.metadata.create_all(bind=engine)
     
+    # Índices/columnas nuevas en bases ya existentes
+    from app.migrations import run_migrations
+    run_migrations(engine)
+    
     # Inicializar configuración por defecto
     from app.config_defaults import init_default_config
     with SessionLocal() as db:
@@ -0,0 +1,338 @@
+"""
+Exportación de la búsqueda de proformas en streaming: CSV/XLSX y ZIP de PDFs
+
+Exporta todas las proformas que cumplen los filtros de la búsqueda de Ver
+Proformas (customer_search, model_search, proforma_number, date_from,
+date_to, advisor_id, template), a nivel de proforma (una fila por proforma) o
+de item (una fila por item con los datos de su proforma).
+
+La memoria no depende del número de filas: las proformas se leen por bloques
+de `chunk_size` con paginación por clave (created_at, id) y las filas de cada
+bloque se recorren con `yield_per`. Cada bloque es una transacción de lectura
+corta, así que una exportación larga no retiene el bloqueo de SQLite frente a
+las escrituras de los vendedores. El CSV se genera por bloques de bytes; el
+XLSX se escribe con openpyxl en modo write_only a un archivo temporal y se lee
+de ahí en bloques.
+
+El ZIP de PDFs (iter_pdf_zip) se arma mientras se envía: cada PDF se copia
+por bloques desde `proformas.pdf_path` y el archivo no existe completo ni en
+memoria ni en disco. Los PDFs que faltan se vuelven a dibujar desde la base.
+
+Uso:
+    with SessionLocal() as db:
+        for block in iter_export(db, "csv", level="items", customer_search="Mora"):
+            output.write(block)
+"""
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import quotes
+from app.crud import build_proforma_keys_query
+from app.models import Advisor, Customer, Proforma, ProformaItem
+
+
+FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+LEVELS = ("proformas", "items")
+
+# Proformas por transacción de lectura
+CHUNK_SIZE = 500
+# Filas traídas de SQLite por vez dentro de un bloque
+YIELD_PER = 1000
+# Tamaño aproximado de cada bloque de bytes del CSV / lectura del XLSX
+BLOCK_BYTES = 64 * 1024
+
+TEMPLATE_LABELS = {"tractor": "Tractores", "implement": "Implementos"}
+
+# (encabezado, columna)
+PROFORMA_COLUMNS = (
+    ("Número", Proforma.number),
+    ("Fecha", Proforma.date),
+    ("Cliente", Customer.name),
+    ("Empresa", Customer.company),
+    ("Atención", Proforma.customer_attention),
+    ("Asesor", Advisor.name),
+    ("Tipo", Proforma.template),
+    ("Vigencia (días)", Proforma.validity_days),
+    ("Moneda", Proforma.currency),
+    ("Subtotal", Proforma.subtotal),
+    ("Descuento", Proforma.discount),
+    ("Subtotal con descuento", Proforma.subtotal_after_discount),
+    ("IVA", Proforma.tax),
+    ("Total", Proforma.total),
+    ("Notas", Proforma.notes),
+)
+_TEMPLATE_INDEX = [header for header, _ in PROFORMA_COLUMNS].index("Tipo")
+
+ITEM_COLUMNS = (
+    ("Marca", ProformaItem.brand_name),
+    ("Modelo", ProformaItem.model_name),
+    ("Año", ProformaItem.year),
+    ("Descripción", ProformaItem.description),
+    ("Cantidad", ProformaItem.qty),
+    ("Precio unitario", ProformaItem.unit_price),
+    ("Descuento %", ProformaItem.discount_percent),
+    ("Monto descuento", ProformaItem.discount_amount),
+    ("Subtotal línea", ProformaItem.line_subtotal),
+    ("IVA %", ProformaItem.tax_rate),
+    ("IVA línea", ProformaItem.line_tax),
+    ("Total línea", ProformaItem.line_total),
+    ("Moneda línea", ProformaItem.currency),
+)
+
+
+def headers(level: str = "items") -> List[str]:
+    """Encabezados de las columnas exportadas"""
+    _check(level=level)
+    columns = PROFORMA_COLUMNS + (ITEM_COLUMNS if level == "items" else (("Items", None),))
+    return [header for header, _ in columns]
+
+
+def export_filename(fmt: str, level: str = "items") -> str:
+    """Proformas_items_20250131_1742.xlsx (Proformas_pdf_20250131_1742.zip para el ZIP)"""
+    return f"Proformas_{level}_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}"
+
+
+def _check(fmt: str = "csv", level: str = "items") -> None:
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt} (use {', '.join(FORMATS)})")
+    if level not in LEVELS:
+        raise ValueError(f"Nivel no soportado: {level} (use {', '.join(LEVELS)})")
+
+
+# ==================== LECTURA ====================
+
+def _output_column(column):
+    # Montos redondeados a 2 decimales en SQLite (más barato que en Python por fila)
+    if column.type.python_type is float:
+        return func.round(column, 2).label(column.key)
+    return column
+
+
+def _rows_query(level: str, proforma_ids):
+    """Filas de las proformas `proforma_ids` (subconsulta), en el orden de la exportación"""
+    columns = [_output_column(column) for _, column in PROFORMA_COLUMNS]
+    if level == "items":
+        columns += [_output_column(column) for _, column in ITEM_COLUMNS]
+    else:
+        items_count = (
+            select(func.count(ProformaItem.id))
+            .where(ProformaItem.proforma_id == Proforma.id)
+            .correlate(Proforma)
+            .scalar_subquery()
+        )
+        columns.append(items_count.label("items_count"))
+
+    query = (
+        select(*columns, Proforma.created_at.label("created_at"), Proforma.id.label("proforma_id"))
+        .join(Customer, Proforma.customer_id == Customer.id)
+        .outerjoin(Advisor, Proforma.advisor_id == Advisor.id)
+        .where(Proforma.id.in_(proforma_ids))
+    )
+    order_by = [Proforma.created_at.desc(), Proforma.id.desc()]
+    if level == "items":
+        query = query.outerjoin(ProformaItem, ProformaItem.proforma_id == Proforma.id)
+        order_by.append(ProformaItem.id)
+    return query.order_by(*order_by)
+
+
+def iter_rows(
+    db: Session,
+    level: str = "items",
+    chunk_size: int = CHUNK_SIZE,
+    **filters
+) -> Iterator[Tuple]:
+    """
+    Filas de la exportación (valores en el orden de `headers(level)`), de la
+    proforma creada más recientemente a la más antigua. Hace commit entre bloques para
+    liberar la transacción de lectura; no usar con cambios pendientes en `db`.
+    """
+    _check(level=level)
+    last: Optional[Tuple[datetime, int]] = None
+
+    while True:
+        keys = build_proforma_keys_query(after=last, limit=chunk_size, **filters)
+        result = db.execute(_rows_query(level, keys).execution_options(yield_per=YIELD_PER))
+        row = None
+        for row in result:
+            values = list(row[:-2])
+            values[_TEMPLATE_INDEX] = TEMPLATE_LABELS.get(values[_TEMPLATE_INDEX], values[_TEMPLATE_INDEX])
+            yield tuple(values)
+        result.close()
+        db.commit()
+
+        if row is None:
+            return
+        last = (row.created_at, row.proforma_id)
+
+
+# ==================== FORMATOS ====================
+
+_DATE_INDEX = [header for header, _ in PROFORMA_COLUMNS].index("Fecha")
+
+
+def iter_csv(db: Session, level: str = "items", **filters) -> Iterator[bytes]:
+    """CSV en bloques de bytes (UTF-8 con BOM para que Excel respete los acentos)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(headers(level))
+    for values in iter_rows(db, level=level, **filters):
+        values = list(values)
+        values[_DATE_INDEX] = values[_DATE_INDEX].strftime("%Y-%m-%d %H:%M")
+        writer.writerow(values)
+        if buffer.tell() >= BLOCK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def write_xlsx(db: Session, output, level: str = "items", **filters) -> int:
+    """
+    Escribe el XLSX en `output` (ruta o archivo binario) con openpyxl en modo
+    write_only: las filas van a un temporal, no quedan en memoria. Retorna
+    la cantidad de filas.
+    """
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+    except ImportError:
+        raise ValueError("Para exportar a .xlsx instala openpyxl (pip install openpyxl)")
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Proformas" if level == "proformas" else "Items")
+    bold = Font(bold=True)
+    header_cells = []
+    for header in headers(level):
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = bold
+        header_cells.append(cell)
+    sheet.append(header_cells)
+    sheet.freeze_panes = "A2"
+
+    count = 0
+    for values in iter_rows(db, level=level, **filters):
+        sheet.append(values)
+        count += 1
+    workbook.save(output)
+    return count
+
+
+def iter_xlsx(db: Session, level: str = "items", **filters) -> Iterator[bytes]:
+    """XLSX en bloques de bytes (se arma en un archivo temporal que se borra al terminar)"""
+    fd, path = tempfile.mkstemp(prefix="agriquote-export-", suffix=".xlsx")
+    try:
+        with os.fdopen(fd, "wb") as output:
+            write_xlsx(db, output, level=level, **filters)
+        with open(path, "rb") as stream:
+            while True:
+                block = stream.read(BLOCK_BYTES)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.unlink(path)
+
+
+def iter_export(db: Session, fmt: str, level: str = "items", **filters) -> Iterator[bytes]:
+    """Bytes del archivo `fmt` ("csv" o "xlsx") para una descarga"""
+    _check(fmt, level)
+    if fmt == "csv":
+        return iter_csv(db, level=level, **filters)
+    return iter_xlsx(db, level=level, **filters)
+
+
+# ==================== ZIP DE PDFs ====================
+
+class _ZipStream:
+    """
+    Destino de zipfile sin seek ni tell: zipfile escribe entonces cada
+    entrada con descriptor de datos y nunca vuelve atrás, así que lo escrito
+    se puede entregar de inmediato.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+def iter_pdf_refs(db: Session, chunk_size: int = CHUNK_SIZE, **filters) -> Iterator[Tuple[int, str, str]]:
+    """(id, número, pdf_path) de las proformas de la búsqueda, por bloques (ver iter_rows)"""
+    last: Optional[Tuple[datetime, int]] = None
+    while True:
+        keys = build_proforma_keys_query(after=last, limit=chunk_size, **filters)
+        rows = db.execute(
+            select(Proforma.id, Proforma.number, Proforma.pdf_path, Proforma.created_at)
+            .where(Proforma.id.in_(keys))
+            .order_by(Proforma.created_at.desc(), Proforma.id.desc())
+        ).all()
+        db.commit()
+        if not rows:
+            return
+        for row in rows:
+            yield row.id, row.number, row.pdf_path or ""
+        last = (rows[-1].created_at, rows[-1].id)
+
+
+def iter_pdf_zip(db: Session, **filters) -> Iterator[bytes]:
+    """
+    ZIP con los PDFs de las proformas de la búsqueda, en bloques de bytes.
+
+    Cada PDF se copia por bloques desde su archivo; si el archivo no existe
+    se dibuja de nuevo desde la base (quotes.render_proforma, que lo deja en
+    outputs/). Las proformas cuyo PDF no se pudo obtener se listan en
+    ERRORES.txt dentro del ZIP.
+    """
+    stream = _ZipStream()
+    errors = []
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for proforma_id, number, pdf_path in iter_pdf_refs(db, **filters):
+            try:
+                path = quotes.checked_pdf_path(pdf_path) if pdf_path else None
+                if path is not None and not path.exists():
+                    path = None
+                if path is None:
+                    path = quotes.render_proforma(db, proforma_id)
+                source = open(path, "rb")
+            except Exception as e:
+                errors.append(f"{number}: {e}")
+                continue
+
+            with source, archive.open(f"Proforma_{number}.pdf", "w") as entry:
+                while True:
+                    block = source.read(BLOCK_BYTES)
+                    if not block:
+                        break
+                    entry.write(block)
+                    if stream.size >= BLOCK_BYTES:
+                        yield stream.drain()
+
+        if errors:
+            archive.writestr("ERRORES.txt", "PDFs que no se pudieron incluir:\n" + "\n".join(errors) + "\n")
+    yield stream.drain()
@@ -0,0 +1,244 @@
+"""
+Normalización de imágenes subidas (productos y logos)
+
+Cada subida se decodifica una sola vez con Pillow y se guarda como:
+
+- master: tamaño para impresión (lado mayor <= MASTER_MAX_PX), sin EXIF
+  ni otros metadatos, orientación ya aplicada. Es la ruta que se guarda en
+  `Model.image_path` y la que usa el PDF.
+- miniatura: para la UI (lado mayor <= THUMB_MAX_PX) en `thumbs/`.
+
+Los archivos se nombran con el hash del contenido subido, así dos subidas
+idénticas comparten archivos y no se procesan dos veces. La validación
+(formato, tamaño) es inmediata; el decodificado y redimensionado corren en
+un hilo de fondo para que el formulario responda rápido:
+
+    upload = ingest_image(file.getvalue())
+    crud.create_model(db, ..., image_path=upload.path)
+    upload.on_saved(lambda info: ...)   # width/height/bytes al terminar
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from app.db import UPLOAD_DIR
+from app.tracing import bind_context, span, traced
+
+
+THUMBS_DIR = UPLOAD_DIR / "thumbs"
+
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+MAX_PIXELS = 60_000_000
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+# ~6" a 300 dpi: más que el recuadro de imagen del PDF
+MASTER_MAX_PX = 1800
+THUMB_MAX_PX = 320
+JPEG_QUALITY = 88
+THUMB_QUALITY = 80
+
+WORKERS = 2
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending: Dict[str, Future] = {}
+_lock = threading.RLock()
+
+
+class ImageUpload:
+    """Rutas de una subida; los archivos se escriben en segundo plano"""
+
+    def __init__(self, digest: str, path: Path, thumb_path: Path, future: Future):
+        self.digest = digest
+        self.path = str(path)
+        self.thumb_path = str(thumb_path)
+        self.future = future
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> Dict:
+        """Espera el procesamiento y retorna {"width","height","bytes",...}"""
+        return self.future.result(timeout=timeout)
+
+    def on_saved(self, callback: Callable[[Dict], None]) -> None:
+        """
+        Llama a `callback(info)` cuando los archivos estén escritos (de
+        inmediato si ya lo están). Los errores del procesamiento se ignoran
+        aquí: se obtienen con `wait()`.
+        """
+        def run(future: Future):
+            if future.exception() is None:
+                callback(future.result())
+        self.future.add_done_callback(run)
+
+
+# ==================== RUTAS ====================
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def master_path(digest: str, alpha: bool, upload_dir: Path = UPLOAD_DIR) -> Path:
+    """PNG si la imagen tiene transparencia (logos), JPEG en otro caso"""
+    return upload_dir / f"{digest}{'.png' if alpha else '.jpg'}"
+
+
+def thumbnail_path(image_path: str) -> str:
+    """
+    Miniatura de una imagen guardada, o la misma ruta si no tiene (imágenes
+    anteriores a este módulo o procesamiento aún en curso).
+    """
+    if not image_path:
+        return image_path
+    thumb = Path(image_path).parent / THUMBS_DIR.name / Path(image_path).name
+    return str(thumb) if thumb.exists() else image_path
+
+
+# ==================== PROCESAMIENTO ====================
+
+def _save_atomic(image: Image.Image, path: Path, **params) -> int:
+    """Escribe en un temporal y renombra: el PDF nunca ve un archivo a medias"""
+    with span("image.write", path=path.name) as current:
+        tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        image.save(tmp_path, **params)
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+        if current is not None:
+            current.set_attribute("bytes", size)
+    return size
+
+
+def _encode_params(path: Path, quality: int) -> Dict:
+    if path.suffix == ".png":
+        return {"format": "PNG", "optimize": True}
+    return {"format": "JPEG", "quality": quality, "optimize": True, "progressive": True}
+
+
+@traced("image.process")
+def process_image(data: bytes, path: Path, thumb_path: Path) -> Dict:
+    """Decodifica, normaliza y escribe master y miniatura"""
+    with span("image.decode", bytes=len(data)), Image.open(io.BytesIO(data)) as source:
+        # JPEG: decodificar directamente a escala reducida (mucho más rápido)
+        source.draft("RGB", (MASTER_MAX_PX, MASTER_MAX_PX))
+        image = ImageOps.exif_transpose(source)
+
+    if path.suffix == ".png":
+        image = image.convert("RGBA")
+    else:
+        image = image.convert("RGB")
+    image.thumbnail((MASTER_MAX_PX, MASTER_MAX_PX), Image.Resampling.LANCZOS)
+    # Sin EXIF, ICC, comentarios ni chunks de texto
+    image.info = {}
+
+    thumb = image.copy()
+    thumb.thumbnail((THUMB_MAX_PX, THUMB_MAX_PX), Image.Resampling.LANCZOS)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    thumb_path.parent.mkdir(parents=True, exist_ok=True)
+    size = _save_atomic(image, path, **_encode_params(path, JPEG_QUALITY))
+    thumb_size = _save_atomic(thumb, thumb_path, **_encode_params(thumb_path, THUMB_QUALITY))
+
+    return {
+        "path": str(path),
+        "thumb_path": str(thumb_path),
+        "width": image.width,
+        "height": image.height,
+        "bytes": size,
+        "thumb_bytes": thumb_size,
+    }
+
+
+def _stored_info(path: Path, thumb_path: Path) -> Dict:
+    """Datos de una imagen ya procesada (subida repetida)"""
+    with Image.open(path) as image:
+        width, height = image.size
+    return {
+        "path": str(path),
+        "thumb_path": str(thumb_path),
+        "width": width,
+        "height": height,
+        "bytes": path.stat().st_size,
+        "thumb_bytes": thumb_path.stat().st_size,
+    }
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="agriquote-images")
+    return _executor
+
+
+def ingest_image(data: bytes, upload_dir: Path = UPLOAD_DIR) -> ImageUpload:
+    """
+    Valida una imagen subida y programa su procesamiento. `upload_dir`: la
+    carpeta de otra base (ver db.storage_dirs), p. ej. al generar una.
+
+    Solo lee el encabezado antes de retornar; lanza ValueError si el archivo
+    no es una imagen soportada o es demasiado grande.
+    """
+    if not data:
+        raise ValueError("El archivo está vacío")
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ValueError(
+            f"La imagen pesa {len(data) / 1024 / 1024:.1f} MB "
+            f"(máximo {MAX_UPLOAD_BYTES // 1024 // 1024} MB)"
+        )
+
+    try:
+        with Image.open(io.BytesIO(data)) as header:
+            image_format = header.format
+            width, height = header.size
+            alpha = has_alpha(header)
+    except Exception:
+        raise ValueError("El archivo no es una imagen válida")
+    if image_format not in ALLOWED_FORMATS:
+        raise ValueError(f"Formato no soportado: {image_format}")
+    if width * height > MAX_PIXELS:
+        raise ValueError(f"La imagen es demasiado grande ({width}x{height} px)")
+
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    path = master_path(digest, alpha, upload_dir)
+    thumb_path = upload_dir / THUMBS_DIR.name / path.name
+
+    with _lock:
+        future = _pending.get(digest)
+        if future is None:
+            if path.exists() and thumb_path.exists():
+                future = Future()
+                future.set_result(_stored_info(path, thumb_path))
+                return ImageUpload(digest, path, thumb_path, future)
+
+            # En el hilo de fondo los spans siguen en la traza de la subida
+            future = _get_executor().submit(bind_context(process_image), data, path, thumb_path)
+            _pending[digest] = future
+            future.add_done_callback(lambda _: _forget(digest))
+
+    return ImageUpload(digest, path, thumb_path, future)
+
+
+def _forget(digest: str) -> None:
+    with _lock:
+        _pending.pop(digest, None)
+
+
+def track_model_image(model_id: int, upload: ImageUpload) -> None:
+    """Guarda width/height/bytes en el modelo cuando termine el procesamiento"""
+    from app import crud
+    from app.db import SessionLocal
+
+    def save(info: Dict):
+        with SessionLocal() as db:
+            crud.set_model_image_info(
+                db, model_id, upload.path, info["width"], info["height"], info["bytes"]
+            )
+    upload.on_saved(save)
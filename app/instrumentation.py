@@ -0,0 +1,224 @@
+"""
+Instrumentación de consultas SQL con eventos de SQLAlchemy
+
+Registra por cada sentencia: SQL, duración, filas y la función de la app que
+la originó (p. ej. 'app.crud.search_proformas'). Las filas son las afectadas
+por INSERT/UPDATE/DELETE; en las lecturas SQLite no las informa y quedan en
+null. Las consultas se agregan por recarga de Streamlit con
+`collect_queries()` / `QueryCollector`, las que superan el umbral se escriben
+en un log JSONL rotativo, y dentro de una traza (app/tracing.py) cada
+sentencia es un span "sql". La duración de todas las
+sentencias y los errores de bloqueo se cuentan en app/metrics.py.
+
+Variables de entorno:
+    AGRIQUOTE_SQL_INSTRUMENTATION  "0" para desactivar (por defecto activa)
+    AGRIQUOTE_SLOW_QUERY_MS        umbral de consulta lenta (por defecto 200)
+    AGRIQUOTE_SLOW_QUERY_LOG       ruta del log (por defecto logs/slow_queries.jsonl)
+"""
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import metrics, tracing
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SLOW_QUERY_MS = float(os.environ.get("AGRIQUOTE_SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG = Path(
+    os.environ.get("AGRIQUOTE_SLOW_QUERY_LOG", BASE_DIR / "logs" / "slow_queries.jsonl")
+)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+MAX_STATEMENT_CHARS = 2000
+# Módulos cuyo frame se reporta como origen de la consulta
+CALLER_PREFIXES = ("app.", "__main__", "streamlit_app")
+
+_slow_logger = logging.getLogger("agriquote.slow_queries")
+_slow_logger.propagate = False
+
+_current_collector: ContextVar[Optional["QueryCollector"]] = ContextVar(
+    "agriquote_query_collector", default=None
+)
+
+
+# ==================== CONFIGURACIÓN ====================
+
+def configure(slow_query_ms: Optional[float] = None, log_path: Optional[Path] = None) -> None:
+    """Cambia el umbral de consulta lenta y/o la ruta del log"""
+    global SLOW_QUERY_MS, SLOW_QUERY_LOG
+    if slow_query_ms is not None:
+        SLOW_QUERY_MS = float(slow_query_ms)
+    if log_path is not None:
+        SLOW_QUERY_LOG = Path(log_path)
+        for handler in list(_slow_logger.handlers):
+            _slow_logger.removeHandler(handler)
+            handler.close()
+
+
+def _slow_log() -> logging.Logger:
+    """Crea el handler rotativo la primera vez que se registra una consulta lenta"""
+    if not _slow_logger.handlers:
+        SLOW_QUERY_LOG.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            SLOW_QUERY_LOG, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _slow_logger.addHandler(handler)
+        _slow_logger.setLevel(logging.INFO)
+    return _slow_logger
+
+
+# ==================== AGREGACIÓN ====================
+
+class QueryCollector:
+    """Acumula las consultas de un bloque de código (p. ej. una recarga)"""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.queries: List[Dict] = []
+        self.started_at = time.perf_counter()
+
+    def add(self, record: Dict) -> None:
+        self.queries.append(record)
+
+    def summary(self, top: int = 5) -> Dict:
+        return summarize(self.queries, top=top)
+
+
+def summarize(queries: List[Dict], top: int = 5) -> Dict:
+    """
+    Resumen para mostrar en la UI: totales, consultas lentas, agregado por
+    función de origen y las `top` sentencias más costosas.
+    """
+    by_caller: Dict[str, Dict] = {}
+    for query in queries:
+        entry = by_caller.setdefault(query["caller"], {"caller": query["caller"], "count": 0, "ms": 0.0})
+        entry["count"] += 1
+        entry["ms"] += query["duration_ms"]
+
+    return {
+        "count": len(queries),
+        "total_ms": round(sum(q["duration_ms"] for q in queries), 2),
+        "slow": sum(1 for q in queries if q["duration_ms"] >= SLOW_QUERY_MS),
+        "slow_threshold_ms": SLOW_QUERY_MS,
+        "by_caller": sorted(by_caller.values(), key=lambda e: e["ms"], reverse=True),
+        "slowest": sorted(queries, key=lambda q: q["duration_ms"], reverse=True)[:top],
+    }
+
+
+@contextmanager
+def collect_queries(label: str = "") -> Iterator[QueryCollector]:
+    """
+    Agrega las consultas ejecutadas dentro del bloque (en este hilo/contexto).
+
+    Uso:
+        with collect_queries("Ver Proformas") as queries:
+            ...
+        queries.summary()
+    """
+    collector = QueryCollector(label)
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
+
+
+def start_collecting(label: str = "") -> QueryCollector:
+    """
+    Igual que collect_queries pero sin bloque: activo hasta el final del
+    contexto actual. Útil en Streamlit, donde cada recarga corre en su hilo.
+    """
+    collector = QueryCollector(label)
+    _current_collector.set(collector)
+    return collector
+
+
+def current_collector() -> Optional[QueryCollector]:
+    return _current_collector.get()
+
+
+# ==================== EVENTOS ====================
+
+def _find_caller() -> str:
+    """Primera función de la app en la pila (fuera de este módulo y de SQLAlchemy)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module != __name__ and module.startswith(CALLER_PREFIXES):
+            if module == "__main__" or module == "streamlit_app":
+                return f"streamlit_app:{frame.f_lineno}"
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("agriquote_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["agriquote_query_start"].pop()) * 1000
+    metrics.DB_QUERY_SECONDS.observe(duration_ms / 1000, statement=metrics.statement_kind(statement))
+    collector = _current_collector.get()
+    slow = duration_ms >= SLOW_QUERY_MS
+    traced = tracing.recording()
+    if collector is None and not slow and not traced:
+        return
+
+    # SQLite reporta filas afectadas en INSERT/UPDATE/DELETE; -1 en SELECT
+    rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    if traced:
+        tracing.record_query(statement, duration_ms, rows)
+        if collector is None and not slow:
+            return
+    record = {
+        "statement": statement[:MAX_STATEMENT_CHARS],
+        "duration_ms": round(duration_ms, 3),
+        "rows": rows,
+        "executemany": executemany,
+        "caller": _find_caller(),
+    }
+    if collector is not None:
+        collector.add(record)
+    if slow:
+        _slow_log().info(json.dumps({
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            **record,
+            "params": None if executemany else repr(parameters)[:500],
+        }, ensure_ascii=False))
+
+
+def _handle_error(exception_context):
+    # Descartar la marca de inicio de la sentencia que falló
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("agriquote_query_start"):
+        conn.info["agriquote_query_start"].pop()
+    # SQLite ya reintentó durante el timeout del engine: el bloqueo no se liberó
+    if "database is locked" in str(exception_context.original_exception):
+        metrics.DB_LOCK_ERRORS.inc()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Registra los listeners en el engine (idempotente)"""
+    if os.environ.get("AGRIQUOTE_SQL_INSTRUMENTATION", "1") == "0":
+        return
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
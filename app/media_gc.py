@@ -0,0 +1,226 @@
+"""
+Recolección de archivos huérfanos en media/uploads y outputs
+
+Al reemplazar la imagen de un modelo o un logo, el archivo anterior queda en
+`media/uploads`; al eliminar una proforma su PDF queda en `outputs/`. Este
+módulo arma el conjunto de rutas referenciadas en la base:
+
+- models.image_path, proforma_items.image_path
+- configuración de logos (logo_left_path, logo_right_path)
+- proformas.pdf_path
+
+recorre los directorios y elimina (o mueve a un archivo) los que no están
+referenciados y son más antiguos que el periodo de gracia. El periodo de
+gracia protege las subidas cuyo registro aún no se guarda.
+
+Uso:
+    python -m app.cli media gc [--grace-hours 168] [--archive DIR] [--dry-run]
+
+La app de Streamlit lo programa en un hilo de fondo.
+
+Variables de entorno:
+    AGRIQUOTE_MEDIA_GC_HOURS        intervalo de la tarea (por defecto 24; 0 la desactiva)
+    AGRIQUOTE_MEDIA_GC_GRACE_HOURS  periodo de gracia (por defecto 168 = 7 días)
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import OUTPUTS_DIR
+from app.images import THUMBS_DIR, UPLOAD_DIR
+from app.models import Configuration, Model, Proforma, ProformaItem
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+# Solo las carpetas de la base actual (db.storage_dirs): otra base tiene las suyas
+SCAN_DIRS = (UPLOAD_DIR, OUTPUTS_DIR)
+
+DEFAULT_GRACE_HOURS = 7 * 24
+GC_INTERVAL_HOURS = float(os.environ.get("AGRIQUOTE_MEDIA_GC_HOURS", 24))
+GC_GRACE_HOURS = float(os.environ.get("AGRIQUOTE_MEDIA_GC_GRACE_HOURS", DEFAULT_GRACE_HOURS))
+LOGO_CONFIG_KEYS = ("logo_left_path", "logo_right_path")
+STREAM_BATCH = 1000
+
+_logger = logging.getLogger("agriquote.media_gc")
+
+_scheduler: Optional[threading.Thread] = None
+_scheduler_lock = threading.Lock()
+
+
+# ==================== REFERENCIAS ====================
+
+def _normalize(path: str) -> Optional[Path]:
+    """Ruta absoluta comparable (las rutas relativas son relativas al proyecto)"""
+    if not path:
+        return None
+    candidate = Path(path)
+    if not candidate.is_absolute():
+        candidate = BASE_DIR / candidate
+    return candidate.resolve()
+
+
+def referenced_paths(db: Session) -> Set[Path]:
+    """Rutas de archivos referenciadas en la base (consultas en streaming)"""
+    statements = (
+        select(Model.image_path).where(Model.image_path != ""),
+        select(ProformaItem.image_path).where(ProformaItem.image_path != "").distinct(),
+        select(Proforma.pdf_path).where(Proforma.pdf_path != ""),
+        select(Configuration.value).where(Configuration.key.in_(LOGO_CONFIG_KEYS)),
+    )
+    referenced = set()
+    for statement in statements:
+        rows = db.execute(statement.execution_options(yield_per=STREAM_BATCH)).scalars()
+        for value in rows:
+            path = _normalize(value)
+            if path is None:
+                continue
+            referenced.add(path)
+            # La miniatura de app.images sigue a su master
+            if path.parent == UPLOAD_DIR.resolve():
+                referenced.add((THUMBS_DIR / path.name).resolve())
+    return referenced
+
+
+def iter_files(directory: Path) -> Iterator[os.DirEntry]:
+    """Recorre `directory` recursivamente sin cargar el listado completo"""
+    if not directory.is_dir():
+        return
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+# ==================== RECOLECCIÓN ====================
+
+def collect_garbage(
+    db: Session,
+    grace_hours: float = DEFAULT_GRACE_HOURS,
+    archive_dir: Optional[Path] = None,
+    dry_run: bool = False,
+    directories=SCAN_DIRS
+) -> Dict:
+    """
+    Elimina (o mueve a `archive_dir`, conservando la ruta relativa al
+    proyecto) los archivos no referenciados con más de `grace_hours` de
+    antigüedad. Con `dry_run` solo reporta.
+
+    Retorna un dict con scanned, referenced, recent, orphaned, removed,
+    reclaimed_bytes, files (huérfanos) y errors.
+    """
+    referenced = referenced_paths(db)
+    cutoff = time.time() - grace_hours * 3600
+    report = {
+        "scanned": 0,
+        "referenced": 0,
+        "recent": 0,
+        "orphaned": 0,
+        "removed": 0,
+        "reclaimed_bytes": 0,
+        "archived_to": str(archive_dir) if archive_dir else None,
+        "files": [],
+        "errors": [],
+    }
+
+    for directory in directories:
+        for entry in iter_files(Path(directory)):
+            report["scanned"] += 1
+            path = Path(entry.path).resolve()
+            if path in referenced:
+                report["referenced"] += 1
+                continue
+
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                report["recent"] += 1
+                continue
+
+            report["orphaned"] += 1
+            report["files"].append(str(path))
+            if dry_run:
+                report["reclaimed_bytes"] += stat.st_size
+                continue
+
+            try:
+                if archive_dir:
+                    target = Path(archive_dir) / path.relative_to(BASE_DIR)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.move(str(path), target)
+                else:
+                    path.unlink()
+            except (OSError, ValueError) as e:
+                report["errors"].append({"path": str(path), "error": str(e)})
+                continue
+            report["removed"] += 1
+            report["reclaimed_bytes"] += stat.st_size
+
+    return report
+
+
+def format_report(report: Dict, dry_run: bool = False) -> str:
+    """Resumen en texto del reporte de recolección"""
+    action = "A eliminar" if dry_run else ("Archivados" if report["archived_to"] else "Eliminados")
+    lines = [
+        f"Archivos revisados:        {report['scanned']}",
+        f"Referenciados:             {report['referenced']}",
+        f"Recientes (en gracia):     {report['recent']}",
+        f"Huérfanos:                 {report['orphaned']}",
+        f"{action + ':':<27}{report['orphaned'] if dry_run else report['removed']}",
+        f"Espacio recuperado:        {report['reclaimed_bytes'] / 1024 / 1024:.2f} MB",
+        f"Errores:                   {len(report['errors'])}",
+    ]
+    if report["archived_to"]:
+        lines.append(f"Archivo:                   {report['archived_to']}")
+    for error in report["errors"][:20]:
+        lines.append(f"  {error['path']}: {error['error']}")
+    if len(report["errors"]) > 20:
+        lines.append(f"  ... y {len(report['errors']) - 20} más")
+    return "\n".join(lines)
+
+
+# ==================== TAREA PROGRAMADA ====================
+
+def start_scheduler(
+    interval_hours: float,
+    grace_hours: float = DEFAULT_GRACE_HOURS,
+    archive_dir: Optional[Path] = None
+) -> Optional[threading.Thread]:
+    """
+    Ejecuta la recolección cada `interval_hours` en un hilo de fondo (daemon).
+    Idempotente: una sola tarea por proceso. `interval_hours <= 0` no la inicia.
+    """
+    global _scheduler
+    if interval_hours <= 0:
+        return None
+
+    from app.db import SessionLocal
+
+    def loop():
+        while True:
+            time.sleep(interval_hours * 3600)
+            try:
+                with SessionLocal() as db:
+                    report = collect_garbage(db, grace_hours=grace_hours, archive_dir=archive_dir)
+                _logger.info(
+                    "media gc: %d huérfanos, %d bytes recuperados, %d errores",
+                    report["orphaned"], report["reclaimed_bytes"], len(report["errors"])
+                )
+            except Exception:
+                _logger.exception("media gc falló")
+
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = threading.Thread(target=loop, name="agriquote-media-gc", daemon=True)
+            _scheduler.start()
+    return _scheduler
@@ -0,0 +1,360 @@
+"""
+Métricas del proceso en formato de texto de Prometheus
+
+Contadores e histogramas en memoria (por proceso) para graficar throughput y
+latencia en el monitoreo: proformas creadas, PDFs dibujados con su duración y
+tamaño, aciertos de las cachés, duración de las consultas SQL y bloqueos de
+la base.
+
+Uso:
+    PROFORMAS_CREATED.inc(origin="app")
+    PDF_RENDER_SECONDS.observe(0.42, template="tractor")
+    render()   # texto para GET /metrics
+
+Exposición:
+    - API: GET /metrics (app/api.py)
+    - Streamlit y otros procesos: servidor HTTP local en un hilo
+      (`start_http_server`), activo con AGRIQUOTE_METRICS_PORT
+
+Variables de entorno:
+    AGRIQUOTE_METRICS_PORT  puerto del servidor /metrics de la app de Streamlit (sin definir = apagado)
+    AGRIQUOTE_METRICS_HOST  interfaz del servidor (por defecto 127.0.0.1)
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_PORT = os.environ.get("AGRIQUOTE_METRICS_PORT", "")
+METRICS_HOST = os.environ.get("AGRIQUOTE_METRICS_HOST", "127.0.0.1")
+
+LabelValues = Tuple[str, ...]
+
+
+# ==================== TIPOS ====================
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base: nombre, ayuda, nombres de etiquetas y valores por combinación de etiquetas"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: etiquetas {sorted(labels)}, se esperaban {list(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Valor que solo aumenta (total desde que arrancó el proceso)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: Dict[LabelValues, float] = {}
+        self.reset()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+    def reset(self) -> None:
+        with self.lock:
+            self.values.clear()
+            # Sin etiquetas la serie existe desde el inicio, en 0
+            if not self.labelnames:
+                self.values[()] = 0
+
+
+class Histogram(Metric):
+    """Distribución de observaciones en buckets acumulados, más suma y cantidad"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiquetas -> [conteo por bucket (no acumulado) + infinito, suma, cantidad]
+        self.values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self.values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> List[str]:
+        with self.lock:
+            values = sorted((key, ([*entry[0]], entry[1], entry[2])) for key, entry in self.values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+    def reset(self) -> None:
+        with self.lock:
+            self.values.clear()
+
+
+class CallbackMetric(Metric):
+    """Valores leídos al exportar (p. ej. cache_info() de un lru_cache)"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+        labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.callback()
+        ]
+
+    def reset(self) -> None:
+        pass
+
+
+# ==================== REGISTRO ====================
+
+_registry: Dict[str, Metric] = {}
+_registry_lock = threading.Lock()
+
+
+def register(metric: Metric) -> Metric:
+    """Agrega la métrica al registro (un nombre = una métrica)"""
+    with _registry_lock:
+        if metric.name in _registry:
+            raise ValueError(f"Métrica ya registrada: {metric.name}")
+        _registry[metric.name] = metric
+    return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return register(Counter(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+    return register(Histogram(name, documentation, buckets, labelnames))
+
+
+def register_callback(
+    name: str,
+    documentation: str,
+    kind: str,
+    callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+    labelnames: Sequence[str] = ()
+) -> CallbackMetric:
+    """Métrica cuyos valores calcula `callback` al exportar; reemplaza una anterior del mismo nombre"""
+    metric = CallbackMetric(name, documentation, kind, callback, labelnames)
+    with _registry_lock:
+        _registry[name] = metric
+    return metric
+
+
+def render() -> str:
+    """Todas las métricas en formato de texto de Prometheus (0.0.4)"""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.header())
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Vuelve a cero contadores e histogramas (benchmarks)"""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        metric.reset()
+
+
+# ==================== MÉTRICAS DE LA APP ====================
+
+_START_TIME = time.time()
+
+PROFORMAS_CREATED = counter(
+    "agriquote_proformas_created_total",
+    "Proformas creadas (origin: app, duplicate, batch)",
+    ("origin",)
+)
+PROFORMA_NUMBER_RETRIES = counter(
+    "agriquote_proforma_number_retries_total",
+    "Números de la secuencia descartados por chocar con un número ingresado a mano"
+)
+PDFS_RENDERED = counter(
+    "agriquote_pdfs_rendered_total",
+    "PDFs de proformas dibujados",
+    ("template",)
+)
+PDF_RENDER_SECONDS = histogram(
+    "agriquote_pdf_render_seconds",
+    "Duración del dibujo de un PDF",
+    (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    ("template",)
+)
+PDF_BYTES = histogram(
+    "agriquote_pdf_bytes",
+    "Tamaño de los PDFs dibujados",
+    (50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000),
+    ("template",)
+)
+CACHE_REQUESTS = counter(
+    "agriquote_cache_requests_total",
+    "Lecturas de la caché de Streamlit (result: hit, miss)",
+    ("cache", "result")
+)
+DB_QUERY_SECONDS = histogram(
+    "agriquote_db_query_seconds",
+    "Duración de las sentencias SQL (statement: select, insert, update, delete, other)",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    ("statement",)
+)
+DB_LOCK_ERRORS = counter(
+    "agriquote_db_lock_errors_total",
+    "Sentencias que fallaron con 'database is locked' tras agotar la espera del bloqueo"
+)
+
+register_callback(
+    "agriquote_process_start_time_seconds",
+    "Inicio del proceso (epoch)",
+    "gauge",
+    lambda: [((), _START_TIME)]
+)
+
+
+_lru_caches: Dict[str, Callable] = {}
+
+
+def register_lru_cache(cache: str, fn) -> None:
+    """Exporta los aciertos/fallos de un functools.lru_cache como agriquote_lru_cache_requests_total"""
+    _lru_caches[cache] = fn
+
+
+def _lru_samples() -> List[Tuple[LabelValues, float]]:
+    samples = []
+    for cache, fn in sorted(_lru_caches.items()):
+        info = fn.cache_info()
+        samples.append(((cache, "hit"), info.hits))
+        samples.append(((cache, "miss"), info.misses))
+    return samples
+
+
+register_callback(
+    "agriquote_lru_cache_requests_total",
+    "Lecturas de cachés en memoria del proceso (result: hit, miss)",
+    "counter",
+    _lru_samples,
+    ("cache", "result")
+)
+
+
+def statement_kind(statement: str) -> str:
+    """Etiqueta de DB_QUERY_SECONDS: primera palabra de la sentencia"""
+    kind = statement.lstrip()[:6].lower()
+    return kind if kind in ("select", "insert", "update", "delete") else "other"
+
+
+# ==================== SERVIDOR HTTP ====================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea en stderr por cada scrape
+        pass
+
+
+def start_http_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Sirve GET /metrics en un hilo daemon; retorna el servidor (server.shutdown() lo detiene)"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="agriquote-metrics", daemon=True)
+    thread.start()
+    return server
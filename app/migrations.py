@@ -0,0 +1,88 @@
+"""
+Migraciones idempotentes del esquema para bases de datos existentes
+
+`Base.metadata.create_all` solo crea tablas que faltan: no agrega índices
+ni columnas nuevas a tablas que ya existen en `data/agriquote.db`. Estas
+funciones comparan el esquema real con los modelos y aplican solo lo que
+falta, por lo que se pueden ejecutar en cada arranque.
+"""
+from typing import Dict, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db import Base
+
+
+# Índices reemplazados por los compuestos de app.models (mismo prefijo)
+OBSOLETE_INDEXES = {
+    "proformas": ("ix_proformas_customer_id", "ix_proformas_advisor_id", "ix_proformas_template"),
+}
+
+
+def ensure_columns(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Agrega las columnas declaradas en los modelos que no existen en la base
+    (solo columnas que SQLite permite agregar: nulables o con valor por
+    defecto). Retorna {"added": ["tabla.columna", ...]}.
+    """
+    result = {"added": []}
+
+    with engine.begin() as conn:
+        # Inspeccionar en la misma conexión que ejecuta el ALTER TABLE
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+                ))
+                result["added"].append(f"{table.name}.{column.name}")
+
+    return result
+
+
+def ensure_indexes(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Crea los índices declarados en los modelos que no existen en la base y
+    elimina los obsoletos. Retorna {"created": [...], "dropped": [...]}.
+    """
+    result = {"created": [], "dropped": []}
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing:
+                    index.create(conn, checkfirst=True)
+                    result["created"].append(index.name)
+
+            for name in OBSOLETE_INDEXES.get(table.name, ()):
+                if name in existing:
+                    conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+                    result["dropped"].append(name)
+
+        if result["created"]:
+            # Actualiza las estadísticas del planificador para los índices nuevos
+            conn.execute(text("PRAGMA optimize"))
+
+    return result
+
+
+def run_migrations(engine: Engine) -> Dict[str, List[str]]:
+    """Aplica todas las migraciones pendientes (llamado desde init_db)"""
+    result = ensure_columns(engine)
+    result.update(ensure_indexes(engine))
+    return result
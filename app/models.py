@@ -2,9 +2,10 @@
 Modelos de datos completos para AgriQuote v2 - Con IVA personalizable y mejor manejo de errores
 """
 from datetime import datetime
+from typing import Dict, List, Optional
 from sqlalchemy import (
     Column, Integer, String, Float, Boolean, 
-    DateTime, ForeignKey, Text, UniqueConstraint
+    DateTime, ForeignKey, Text, UniqueConstraint, Index
 )
 from sqlalchemy.orm import relationship
 from app.db import Base
@@ -84,6 +85,10 @@ class Model(Base):
     description = Column(Text, default="")  # Especificaciones técnicas
     base_price = Column(Float, default=0.0)
     image_path = Column(String(500), default="")
+    # Datos de la imagen normalizada (app.images); None si no se ha procesado
+    image_width = Column(Integer, nullable=True)
+    image_height = Column(Integer, nullable=True)
+    image_bytes = Column(Integer, nullable=True)
     active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -131,14 +136,14 @@ class Proforma(Base):
     number = Column(String(50), unique=True, nullable=False, index=True)
     
     # Relaciones con otras tablas
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
-    advisor_id = Column(Integer, ForeignKey("advisors.id"), nullable=True, index=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    advisor_id = Column(Integer, ForeignKey("advisors.id"), nullable=True)
     
     # Información adicional del cliente para esta proforma
     customer_attention = Column(String(200), default="")  # A la atención de
     
     # Tipo de proforma
-    template = Column(String(20), nullable=False, index=True)  # 'tractor' o 'implement'
+    template = Column(String(20), nullable=False)  # 'tractor' o 'implement'
     
     # Detalles de la proforma
     validity_days = Column(Integer, default=15)
@@ -161,6 +166,23 @@ class Proforma(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     pdf_path = Column(String(500), default="")
+    # Referencia externa única de las proformas creadas en lote
+    # (app/quote_batch.py): permite retomar una carga interrumpida
+    source_ref = Column(String(200), nullable=True)
+    
+    # Índices de la búsqueda de proformas (ver crud.build_search_proformas_query):
+    # filtro por igualdad + orden por created_at DESC sin ordenar en memoria.
+    # ix_proformas_total cubre el orden por total de crud.page_proformas (el
+    # orden por fecha usa ix_proformas_date). Las bases existentes los reciben
+    # con app.migrations.
+    __table_args__ = (
+        Index("ix_proformas_created_at", "created_at"),
+        Index("ix_proformas_template_created_at", "template", "created_at"),
+        Index("ix_proformas_advisor_created_at", "advisor_id", "created_at"),
+        Index("ix_proformas_customer_created_at", "customer_id", "created_at"),
+        Index("ix_proformas_total", "total"),
+        Index("ux_proformas_source_ref", "source_ref", unique=True),
+    )
     
     # Relaciones
     customer = relationship("Customer", back_populates="proformas")
@@ -177,27 +199,54 @@ class Proforma(Base):
     
     def calculate_totals(self):
         """Calcula los totales basados en los items con IVA personalizable"""
-        if not self.items:
-            self.subtotal = self.discount = self.subtotal_after_discount = self.tax = self.total = 0.0
-            return
-        
+        totals = Proforma.compute_totals([
+            {
+                "line_subtotal": item.line_subtotal,
+                "discount_amount": item.discount_amount,
+                "line_tax": item.line_tax,
+            }
+            for item in self.items
+        ])
+        for key, value in totals.items():
+            setattr(self, key, value)
+    
+    @staticmethod
+    def compute_totals(lines: List[Dict]) -> Dict[str, float]:
+        """
+        Totales de la proforma a partir de las líneas ya calculadas
+        (ver ProformaItem.compute_line). Sin acceso a la base de datos.
+        """
         # Subtotal sin descuento
-        self.subtotal = sum(item.line_subtotal for item in self.items)
+        subtotal = sum(line["line_subtotal"] for line in lines)
         
         # Descuento total
-        self.discount = sum(item.discount_amount for item in self.items)
-        
-        # Subtotal después de descuento
-        self.subtotal_after_discount = self.subtotal - self.discount
+        discount = sum(line["discount_amount"] for line in lines)
         
         # IVA calculado individualmente por item con su tasa personalizada
-        self.tax = sum(
-            round((item.line_subtotal - item.discount_amount) * ((item.tax_rate or 13.0) / 100), 2)
-            for item in self.items
-        )
+        tax = sum(line["line_tax"] for line in lines)
         
-        # Total
-        self.total = self.subtotal_after_discount + self.tax
+        return {
+            "subtotal": subtotal,
+            "discount": discount,
+            "subtotal_after_discount": subtotal - discount,
+            "tax": tax,
+            "total": subtotal - discount + tax,
+        }
+
+
+# ==================== NUMERACIÓN DE PROFORMAS ====================
+
+class ProformaSequence(Base):
+    """Secuencia de numeración de proformas por prefijo y año"""
+    __tablename__ = "proforma_sequences"
+    
+    prefix = Column(String(10), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<ProformaSequence(prefix='{self.prefix}', year={self.year}, last_value={self.last_value})>"
 
 
 # ==================== ITEMS DE PROFORMA ====================
@@ -246,13 +295,36 @@ class ProformaItem(Base):
     
     def calculate_totals(self):
         """Calcula los totales de la línea con IVA personalizable y manejo seguro de None"""
-        self.line_subtotal = self.qty * self.unit_price
-        self.discount_amount = round(self.line_subtotal * (self.discount_percent / 100), 2)
-        subtotal_after_discount = self.line_subtotal - self.discount_amount
+        line = ProformaItem.compute_line(
+            self.qty, self.unit_price, self.discount_percent, self.tax_rate
+        )
+        for key, value in line.items():
+            setattr(self, key, value)
+    
+    @staticmethod
+    def compute_line(
+        qty: int,
+        unit_price: float,
+        discount_percent: Optional[float] = 0.0,
+        tax_rate: Optional[float] = 13.0
+    ) -> Dict[str, float]:
+        """Calcula los montos de una línea sin necesidad de una instancia ORM"""
+        discount_percent = discount_percent or 0.0
         
         # Asegurar que tax_rate no sea None y tenga un valor por defecto
-        if self.tax_rate is None:
-            self.tax_rate = 13.0
+        if tax_rate is None:
+            tax_rate = 13.0
+        
+        line_subtotal = qty * unit_price
+        discount_amount = round(line_subtotal * (discount_percent / 100), 2)
+        subtotal_after_discount = line_subtotal - discount_amount
+        line_tax = round(subtotal_after_discount * (tax_rate / 100), 2)
         
-        self.line_tax = round(subtotal_after_discount * (self.tax_rate / 100), 2)
-        self.line_total = subtotal_after_discount + self.line_tax
\ No newline at end of file
+        return {
+            "discount_percent": discount_percent,
+            "tax_rate": tax_rate,
+            "line_subtotal": line_subtotal,
+            "discount_amount": discount_amount,
+            "line_tax": line_tax,
+            "line_total": subtotal_after_discount + line_tax,
+        }
\ No newline at end of file
@@ -1,9 +1,11 @@
 """
 Generación de PDFs para proformas con paginación automática - VERSIÓN MEJORADA
 """
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Optional
 import textwrap
+import time
 
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
@@ -15,6 +17,9 @@ from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 
+from app import metrics
+from app.tracing import span
+
 
 # ==================== CONFIGURACIÓN ====================
 
@@ -38,7 +43,6 @@ DYNAMIC_HEIGHT = PAGE_H - MARGIN_TOP - MARGIN_BOTTOM - HEADER_HEIGHT - FOOTER_HE
 MEDIA_DIR = Path(__file__).resolve().parent.parent / "media"
 LOGOS_DIR = MEDIA_DIR / "logos"
 FONTS_DIR = MEDIA_DIR / "fonts"
-UPLOAD_DIR = MEDIA_DIR / "uploads"
 
 # Configuración de fuentes
 FONT_TTF = FONTS_DIR / "DejaVuSans.ttf"
@@ -84,6 +88,30 @@ STYLE_NORMAL = ParagraphStyle(
 
 # ==================== UTILIDADES ====================
 
+@lru_cache(maxsize=16)
+def _cached_image_reader(path: str, mtime: float, size: int) -> ImageReader:
+    with span("image.read", path=Path(path).name, bytes=size, cached=True):
+        reader = ImageReader(path)
+        # Decodificar ya: el lector queda de solo lectura y se puede compartir entre hilos
+        reader.getSize()
+        reader.getRGBData()
+        reader.getTransparent()
+    return reader
+
+
+metrics.register_lru_cache("pdf_images", _cached_image_reader)
+
+
+def load_image(path) -> ImageReader:
+    """
+    ImageReader compartido para los logos del header, que se dibujan en cada
+    página: se decodifican una vez por proceso y no en cada página/PDF. Si el
+    archivo cambia (mtime/tamaño) se vuelve a leer.
+    """
+    stat = Path(path).stat()
+    return _cached_image_reader(str(path), stat.st_mtime, stat.st_size)
+
+
 def currency_symbol(currency: str) -> str:
     """Retorna el símbolo de moneda"""
     if currency == "USD":
@@ -144,7 +172,7 @@ def draw_header(c: canvas.Canvas, data: Dict, template: str):
     logo_left_path = data.get("logo_left_path")
     if logo_left_path and Path(logo_left_path).exists():
         try:
-            logo = ImageReader(str(logo_left_path))
+            logo = load_image(logo_left_path)
             c.drawImage(
                 logo, MARGIN_LEFT, y_start - 32,
                 width=127, height=32,  # Aumentado 15%
@@ -157,7 +185,7 @@ def draw_header(c: canvas.Canvas, data: Dict, template: str):
     logo_right_path = data.get("logo_right_path")
     if logo_right_path and Path(logo_right_path).exists():
         try:
-            logo = ImageReader(str(logo_right_path))
+            logo = load_image(logo_right_path)
             c.drawImage(
                 logo, PAGE_W - MARGIN_RIGHT - 127, y_start - 32,
                 width=127, height=32,  # Aumentado 15%
@@ -624,8 +652,9 @@ def draw_product_content(c: canvas.Canvas, item: Dict, template: str, y_start: f
     image_path = item.get("image_path")
     if image_path and Path(image_path).exists():
         try:
-            img = ImageReader(str(image_path))
-            img_w, img_h = img.getSize()
+            with span("image.read", path=Path(image_path).name):
+                img = ImageReader(str(image_path))
+                img_w, img_h = img.getSize()
             
             scale = min(image_width / img_w, image_height / img_h)
             scaled_w = img_w * scale
@@ -635,8 +664,11 @@ def draw_product_content(c: canvas.Canvas, item: Dict, template: str, y_start: f
             centered_y = image_y + image_height - scaled_h - top_padding
             #centered_y = image_y + (image_height - scaled_h) / 2
             
+            # Por ruta y no con el ImageReader: ReportLab reconoce la imagen
+            # por el nombre del archivo sin decodificarla, y en un PDF
+            # combinado la incrusta una sola vez
             c.drawImage(
-                img, centered_x, centered_y,
+                str(image_path), centered_x, centered_y,
                 width=scaled_w,
                 height=scaled_h,
                 preserveAspectRatio=True
@@ -653,19 +685,22 @@ def draw_product_content(c: canvas.Canvas, item: Dict, template: str, y_start: f
 
 # ==================== FUNCIÓN PRINCIPAL ====================
 
-def build_proforma_pdf(
-    output_path: Path,
+def draw_proforma(
+    c: canvas.Canvas,
     header_data: Dict,
     items: List[Dict],
     totals: Optional[Dict],
-    template: str = "implement"
-) -> Path:
+    template: str = "implement",
+    outline_title: Optional[str] = None,
+    outline_key: str = ""
+):
     """
-    Genera un PDF de proforma con paginación automática mejorado
+    Dibuja las páginas de una proforma en `c` (una por item), cada una
+    cerrada con showPage. Con `outline_title` agrega un marcador para la
+    proforma y uno por página con el modelo (PDF combinado); `outline_key`
+    distingue las páginas de cada proforma del documento (por defecto el
+    número, que se repite si la misma proforma se incluye dos veces).
     """
-    
-    c = canvas.Canvas(str(output_path), pagesize=letter)
-    
     # Calcular posición inicial del contenido dinámico
     y_dynamic_start = PAGE_H - MARGIN_TOP - HEADER_HEIGHT - 10
     
@@ -673,26 +708,94 @@ def build_proforma_pdf(
         is_first_page = (idx == 0)
         is_last_page = (idx == len(items) - 1)
         
+        if outline_title is not None:
+            key = f"{outline_key or header_data.get('number')}_{idx + 1}"
+            c.bookmarkPage(key)
+            if is_first_page:
+                c.addOutlineEntry(outline_title, key, level=0)
+            c.addOutlineEntry(
+                f"{item.get('brand_name') or ''} {item.get('model_name') or ''}".strip() or f"Página {idx + 1}",
+                key, level=1, closed=True
+            )
+        
         # Dibujar header (siempre)
-        draw_header(c, header_data, template)
+        with span("pdf.header", page=idx + 1):
+            draw_header(c, header_data, template)
         
         # En primera página: dibujar datos del cliente (más compacto)
         if is_first_page:
-            customer_height = draw_customer_section(c, header_data, y_dynamic_start)
+            with span("pdf.customer", page=idx + 1):
+                customer_height = draw_customer_section(c, header_data, y_dynamic_start)
             y_product_start = y_dynamic_start - customer_height - 10
         else:
             y_product_start = y_dynamic_start
         
         # Dibujar contenido del producto
-        draw_product_content(c, item, template, y_product_start)
+        with span("pdf.product", page=idx + 1, model=item.get("model_name")):
+            draw_product_content(c, item, template, y_product_start)
         
         # Dibujar footer (siempre, pero totales solo en última página)
-        draw_footer(c, header_data, totals, template, is_last_page)
+        with span("pdf.footer", page=idx + 1):
+            draw_footer(c, header_data, totals, template, is_last_page)
         
-        # Nueva página si no es la última
-        if not is_last_page:
-            c.showPage()
-    
-    # Guardar PDF
-    c.save()
-    return output_path
\ No newline at end of file
+        c.showPage()
+
+
+def build_proforma_pdf(
+    output_path: Path,
+    header_data: Dict,
+    items: List[Dict],
+    totals: Optional[Dict],
+    template: str = "implement"
+) -> Path:
+    """
+    Genera un PDF de proforma con paginación automática mejorado
+    """
+    start = time.perf_counter()
+    with span("pdf.build", number=header_data.get("number"), template=template, pages=len(items)) as current:
+        c = canvas.Canvas(str(output_path), pagesize=letter)
+        draw_proforma(c, header_data, items, totals, template)
+        
+        # Guardar PDF
+        with span("pdf.save"):
+            c.save()
+        size = Path(output_path).stat().st_size
+        if current is not None:
+            current.set_attribute("bytes", size)
+    
+    metrics.PDFS_RENDERED.inc(template=template)
+    metrics.PDF_RENDER_SECONDS.observe(time.perf_counter() - start, template=template)
+    metrics.PDF_BYTES.observe(size, template=template)
+    return output_path
+
+def build_merged_pdf(output_path: Path, documents: List[Dict], title: str = "Proformas") -> Path:
+    """
+    Varias proformas en un solo PDF, con un marcador por proforma (y por
+    página). Se dibujan en un mismo canvas: ReportLab guarda cada imagen una
+    sola vez por documento, así que los logos y las fotos de los modelos que
+    se repiten no se incrustan en cada página.
+
+    `documents`: dicts con "header", "items", "totals", "template" y
+    "outline_title" (ver quotes.render_merged).
+    """
+    with span("pdf.build_merged", documents=len(documents)) as current:
+        c = canvas.Canvas(str(output_path), pagesize=letter)
+        c.setTitle(title)
+        c.showOutline()
+        for index, document in enumerate(documents, start=1):
+            with span("pdf.merged_document", number=document["header"].get("number")):
+                draw_proforma(
+                    c,
+                    document["header"],
+                    document["items"],
+                    document["totals"],
+                    document["template"],
+                    outline_title=document["outline_title"],
+                    outline_key=f"doc{index}"
+                )
+        
+        with span("pdf.save"):
+            c.save()
+        if current is not None:
+            current.set_attribute("bytes", Path(output_path).stat().st_size)
+    return output_path
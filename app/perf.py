@@ -0,0 +1,132 @@
+"""
+Perfil de cada recarga de Streamlit: tiempo por sección, consultas y memoria
+
+Uso en streamlit_app.py:
+
+    profiler = start_rerun_profile(trace_memory=True)
+    ...
+    with perf_section("pdf"):
+        build_proforma_pdf(...)
+    ...
+    record = profiler.finish(page="Nueva Proforma", queries=rerun_queries)
+
+El tiempo de "db" sale de app.instrumentation (suma de duraciones de las
+consultas); "widgets" es el resto del tiempo de la recarga.
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+SECTIONS = ("db", "pdf", "image", "widgets")
+HISTORY_SIZE = 50
+
+_current_profile: ContextVar[Optional["RerunProfile"]] = ContextVar(
+    "agriquote_rerun_profile", default=None
+)
+
+
+class RerunProfile:
+    """Tiempos acumulados por sección durante una recarga"""
+
+    def __init__(self, trace_memory: bool = False):
+        self.started_at = time.perf_counter()
+        self.sections: Dict[str, float] = {}
+        self.trace_memory = trace_memory
+        self.memory_start = 0
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+
+    def add(self, section: str, elapsed_ms: float) -> None:
+        self.sections[section] = self.sections.get(section, 0.0) + elapsed_ms
+
+    def finish(self, page: str, queries=None) -> Dict:
+        """Cierra el perfil y retorna el registro para el historial"""
+        total_ms = (time.perf_counter() - self.started_at) * 1000
+        sections = {name: 0.0 for name in SECTIONS}
+        sections.update(self.sections)
+
+        query_count = 0
+        if queries is not None:
+            summary = queries.summary(top=3)
+            query_count = summary["count"]
+            sections["db"] = summary["total_ms"]
+        sections["widgets"] = max(
+            0.0, total_ms - sum(ms for name, ms in sections.items() if name != "widgets")
+        )
+
+        memory_delta_kb = memory_peak_kb = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            memory_delta_kb = round((current - self.memory_start) / 1024, 1)
+            memory_peak_kb = round((peak - self.memory_start) / 1024, 1)
+
+        return {
+            "time": datetime.now().strftime("%H:%M:%S"),
+            "page": page,
+            "total_ms": round(total_ms, 1),
+            "sections": {name: round(ms, 1) for name, ms in sections.items()},
+            "queries": query_count,
+            "memory_delta_kb": memory_delta_kb,
+            "memory_peak_kb": memory_peak_kb,
+        }
+
+
+def start_rerun_profile(trace_memory: bool = False) -> RerunProfile:
+    """Inicia el perfil de la recarga actual (activo hasta el final del contexto)"""
+    profile = RerunProfile(trace_memory=trace_memory)
+    _current_profile.set(profile)
+    return profile
+
+
+def stop_memory_tracing() -> None:
+    """tracemalloc agrega costo a cada asignación: detenerlo al ocultar el panel"""
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+@contextmanager
+def perf_section(name: str) -> Iterator[None]:
+    """Suma el tiempo del bloque a la sección `name` (no-op sin perfil activo)"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, (time.perf_counter() - start) * 1000)
+
+
+# ==================== HISTORIAL ====================
+
+def append_history(history: List[Dict], record: Dict, size: int = HISTORY_SIZE) -> List[Dict]:
+    """Agrega un registro y conserva solo los últimos `size`"""
+    history.append(record)
+    del history[:-size]
+    return history
+
+
+def summarize_history(history: List[Dict]) -> List[Dict]:
+    """Promedio y máximo por página, ordenado de la más lenta a la más rápida"""
+    pages: Dict[str, List[Dict]] = {}
+    for record in history:
+        pages.setdefault(record["page"], []).append(record)
+
+    rows = []
+    for page, records in pages.items():
+        totals = [r["total_ms"] for r in records]
+        rows.append({
+            "page": page,
+            "reruns": len(records),
+            "avg_ms": round(sum(totals) / len(totals), 1),
+            "max_ms": max(totals),
+            "avg_queries": round(sum(r["queries"] for r in records) / len(records), 1),
+        })
+    return sorted(rows, key=lambda row: row["avg_ms"], reverse=True)
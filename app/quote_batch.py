@@ -0,0 +1,323 @@
+"""
+Generación masiva de proformas desde un archivo de especificaciones (licitaciones)
+
+Formatos:
+
+- JSONL: una proforma por línea con los campos de schemas.ProformaCreate
+  más `ref` opcional:
+      {"ref": "lic-42/001", "customer_id": 7, "template": "tractor",
+       "items": [{"product_id": 12, "qty": 3, "year": 2025}]}
+- CSV/XLSX: un item por fila. Las filas consecutivas con la misma `ref`
+  forman una proforma; los datos del encabezado se toman de la primera.
+
+Cada especificación se identifica por su `ref` (o, si no tiene, por
+archivo:línea) y se guarda en `proformas.source_ref`. Al volver a ejecutar
+el mismo archivo las proformas ya creadas se omiten y solo se dibujan los
+PDFs que falten: una carga interrumpida se retoma donde quedó.
+
+Las proformas se insertan con crud.insert_proforma en transacciones de
+`batch_size`; los PDFs se dibujan en paralelo en procesos aparte (ReportLab
+usa CPU y el GIL impediría paralelizar con hilos).
+"""
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, metrics, quotes
+from app.catalog_import import EQUIPMENT_TYPES
+from app.models import Proforma
+from app.schemas import ProformaCreate
+from app.tabular import iter_records
+
+
+HEADER_ALIASES = {
+    "ref": ("ref", "referencia", "id_externo"),
+    "customer_id": ("cliente_id", "id_cliente", "customer_id"),
+    "advisor_id": ("asesor_id", "id_asesor", "advisor_id"),
+    "template": ("tipo", "plantilla", "template"),
+    "number": ("numero", "number"),
+    "date": ("fecha", "date"),
+    "validity_days": ("vigencia", "validez", "validity_days"),
+    "customer_attention": ("atencion", "customer_attention"),
+    "custom_terms": ("terminos", "custom_terms"),
+    "custom_fiscal_note": ("nota_fiscal", "custom_fiscal_note"),
+    "notes": ("notas", "notes"),
+}
+ITEM_ALIASES = {
+    "product_id": ("modelo_id", "id_modelo", "product_id", "model_id"),
+    "brand": ("marca", "brand"),
+    "model": ("modelo", "model"),
+    "year": ("ano", "anio", "year"),
+    "description": ("descripcion", "description"),
+    "qty": ("cantidad", "qty"),
+    "unit_price": ("precio", "unit_price"),
+    "discount_percent": ("descuento", "discount_percent"),
+    "tax_rate": ("iva", "tax_rate"),
+    "currency": ("moneda", "currency"),
+}
+
+DEFAULT_BATCH_SIZE = 100
+# PDFs pendientes por proceso antes de esperar (memoria acotada)
+PENDING_PER_JOB = 4
+
+
+# ==================== LECTURA ====================
+
+def _read_jsonl(path: Path) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    with open(path, encoding="utf-8") as stream:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            default_ref = f"{path.name}:{line_number}"
+            try:
+                spec = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield default_ref, None, f"JSON inválido: {e.msg}"
+                continue
+            if not isinstance(spec, dict):
+                yield default_ref, None, "Cada línea debe ser un objeto JSON"
+                continue
+            yield str(spec.pop("ref", None) or default_ref), spec, None
+
+
+def _present(record: Dict, fields: Iterable[str]) -> Dict:
+    """Campos con valor (las celdas vacías se omiten y usan el valor por defecto)"""
+    return {
+        field: record[field].strip() if isinstance(record[field], str) else record[field]
+        for field in fields
+        if record.get(field) not in (None, "")
+    }
+
+
+def _read_table(path: Path) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    records = iter_records(path, {**HEADER_ALIASES, **ITEM_ALIASES}, required=("customer_id", "qty"))
+
+    current_ref, current = None, None
+    for record in records:
+        ref = str(record.get("ref") or "").strip() or f"{path.name}:{record['_row']}"
+        item = _present(record, ITEM_ALIASES)
+        if current is not None and ref == current_ref:
+            current["items"].append(item)
+            continue
+
+        if current is not None:
+            yield current_ref, current, None
+        current_ref = ref
+        current = {**_present(record, HEADER_ALIASES), "items": [item]}
+        current.pop("ref", None)
+        template = str(current.get("template", "")).lower()
+        current["template"] = EQUIPMENT_TYPES.get(template, template)
+
+    if current is not None:
+        yield current_ref, current, None
+
+
+def read_specs(path) -> Iterator[Tuple[str, Optional[Dict], Optional[str]]]:
+    """
+    Lee las especificaciones de un archivo .jsonl, .csv o .xlsx sin
+    cargarlo completo. Retorna (ref, spec, error) por proforma.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".jsonl", ".json", ".ndjson"):
+        return _read_jsonl(path)
+    return _read_table(path)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==================== PDF EN PARALELO ====================
+
+def _init_worker() -> None:
+    # No reutilizar conexiones heredadas del proceso padre (fork)
+    from app.db import engine
+    engine.dispose(close=False)
+
+
+def _render_worker(proforma_id: int) -> str:
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        return str(quotes.render_proforma(db, proforma_id))
+
+
+class PdfRenderer:
+    """Dibuja PDFs en `jobs` procesos (o en este mismo si jobs <= 1)"""
+
+    def __init__(self, jobs: int, report: Dict):
+        self.report = report
+        self.pool = ProcessPoolExecutor(jobs, initializer=_init_worker) if jobs > 1 else None
+        self.max_pending = max(1, jobs) * PENDING_PER_JOB
+        self.pending: Dict[Future, Tuple[str, int]] = {}
+
+    def submit(self, ref: str, proforma_id: int) -> None:
+        if self.pool is None:
+            try:
+                _render_worker(proforma_id)
+                self.report["pdfs"] += 1
+            except Exception as e:
+                self.report["pdf_errors"].append({"ref": ref, "error": str(e)})
+            return
+
+        while len(self.pending) >= self.max_pending:
+            self._collect(wait(self.pending, return_when=FIRST_COMPLETED).done)
+        self.pending[self.pool.submit(_render_worker, proforma_id)] = (ref, proforma_id)
+
+    def _collect(self, done: Set[Future]) -> None:
+        for future in done:
+            ref, _ = self.pending.pop(future)
+            try:
+                future.result()
+                self.report["pdfs"] += 1
+            except Exception as e:
+                self.report["pdf_errors"].append({"ref": ref, "error": str(e)})
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self._collect(wait(self.pending).done)
+            self.pool.shutdown()
+
+
+# ==================== CARGA ====================
+
+def _existing(db: Session, refs: List[str]) -> Dict[str, Tuple[int, str]]:
+    """ref -> (id, pdf_path) de las proformas ya creadas en una ejecución anterior"""
+    rows = db.execute(
+        select(Proforma.source_ref, Proforma.id, Proforma.pdf_path)
+        .where(Proforma.source_ref.in_(refs))
+    ).all()
+    return {row.source_ref: (row.id, row.pdf_path) for row in rows}
+
+
+def build_quotes(
+    db: Session,
+    specs: Iterable[Tuple[str, Optional[Dict], Optional[str]]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    jobs: Optional[int] = None,
+    render_pdfs: bool = True,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Valida y crea las proformas de `specs` (ver read_specs) y dibuja sus PDFs.
+
+    Las especificaciones inválidas se reportan y no detienen la carga. Con
+    `dry_run` solo valida (esquema, cliente, asesor y modelos) sin escribir.
+    Retorna un reporte con read, created, existing, failed, pdfs, errors,
+    pdf_errors y los tiempos de cada etapa.
+    """
+    report = {
+        "read": 0,
+        "created": 0,
+        "existing": 0,
+        "pdfs": 0,
+        "errors": [],
+        "pdf_errors": [],
+        "insert_seconds": 0.0,
+        "seconds": 0.0,
+    }
+    start = time.perf_counter()
+    renderer = PdfRenderer(jobs or os.cpu_count() or 1, report) if render_pdfs and not dry_run else None
+    seen: Set[str] = set()
+
+    try:
+        for chunk in _chunks(specs, batch_size):
+            report["read"] += len(chunk)
+            existing = _existing(db, [ref for ref, _, _ in chunk])
+
+            batch_start = time.perf_counter()
+            created_before = report["created"]
+            created = []
+            for ref, raw, error in chunk:
+                if ref in seen:
+                    report["errors"].append({"ref": ref, "error": "Referencia repetida en el archivo"})
+                    continue
+                seen.add(ref)
+                if error:
+                    report["errors"].append({"ref": ref, "error": error})
+                    continue
+                if ref in existing:
+                    report["existing"] += 1
+                    proforma_id, pdf_path = existing[ref]
+                    if renderer and not (pdf_path and Path(pdf_path).exists()):
+                        created.append((ref, proforma_id))
+                    continue
+
+                try:
+                    fields = quotes.proforma_fields(db, ProformaCreate.model_validate(raw))
+                    if dry_run:
+                        continue
+                    result = crud.insert_proforma(db, **fields, source_ref=ref)
+                except ValidationError as e:
+                    report["errors"].append({"ref": ref, "error": _validation_message(e)})
+                    continue
+                except ValueError as e:
+                    report["errors"].append({"ref": ref, "error": str(e)})
+                    continue
+                report["created"] += 1
+                created.append((ref, result["id"]))
+
+            if not dry_run:
+                # Una transacción por lote
+                db.commit()
+                metrics.PROFORMAS_CREATED.inc(report["created"] - created_before, origin="batch")
+            report["insert_seconds"] += time.perf_counter() - batch_start
+
+            if renderer:
+                for ref, proforma_id in created:
+                    renderer.submit(ref, proforma_id)
+    finally:
+        if db.in_transaction():
+            db.rollback()
+        if report["created"]:
+            crud.notify_change("proformas")
+        if renderer:
+            renderer.close()
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'spec'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def format_report(report: Dict, dry_run: bool = False) -> str:
+    """Resumen en texto del reporte de la carga"""
+    seconds = report["seconds"] or 1e-9
+    lines = [
+        f"Especificaciones leídas:   {report['read']}",
+        f"{'Válidas:' if dry_run else 'Proformas creadas:':<27}"
+        f"{report['read'] - len(report['errors']) - report['existing'] if dry_run else report['created']}",
+        f"Ya existentes (omitidas):  {report['existing']}",
+        f"PDFs generados:            {report['pdfs']}",
+        f"Errores:                   {len(report['errors'])}",
+        f"Errores de PDF:            {len(report['pdf_errors'])}",
+        f"Tiempo total:              {report['seconds']:.2f} s "
+        f"(inserción {report['insert_seconds']:.2f} s)",
+        f"Throughput:                {report['created'] / seconds:.1f} proformas/s, "
+        f"{report['pdfs'] / seconds:.1f} PDFs/s",
+    ]
+    errors = [*report["errors"], *report["pdf_errors"]]
+    for error in errors[:20]:
+        lines.append(f"  {error['ref']}: {error['error']}")
+    if len(errors) > 20:
+        lines.append(f"  ... y {len(errors) - 20} más")
+    return "\n".join(lines)
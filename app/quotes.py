@@ -0,0 +1,355 @@
+"""
+Proformas fuera de la UI: creación desde una especificación y PDF desde la base
+
+La página Nueva Proforma arma el PDF con los datos del formulario. La API
+(app/api.py) y las herramientas de línea de comandos usan este módulo:
+
+    with SessionLocal() as db:
+        created = create_quote(db, ProformaCreate(...))   # valida y guarda
+        path = render_proforma(db, created["id"])         # PDF desde la base
+
+Los totales por moneda y el encabezado del PDF se calculan igual que en la UI
+(summarize_totals, header_data), así que el PDF es el mismo.
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app import crud
+from app.db import OUTPUTS_DIR
+from app.models import Brand, Customer, Advisor, Model, Proforma
+from app.schemas import ProformaCreate
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOGOS_DIR = BASE_DIR / "media" / "logos"
+PDF_PATH_TEMPLATE = str(OUTPUTS_DIR / "Proforma_{number}.pdf")
+
+# Campos de ProformaItem que usa el PDF
+ITEM_FIELDS = (
+    "model_id", "brand_name", "model_name", "year", "description", "image_path",
+    "qty", "unit_price", "discount_percent", "discount_amount", "line_subtotal",
+    "tax_rate", "line_tax", "line_total", "currency",
+)
+
+
+# ==================== DATOS DEL PDF ====================
+
+def _currency_totals(items: List[Dict], currency: str) -> Dict:
+    """Totales de las líneas de una moneda (IVA único o mixto)"""
+    subtotal = sum(item["line_subtotal"] for item in items)
+    discount = sum(item["discount_amount"] for item in items)
+    subtotal_after_discount = subtotal - discount
+
+    tax_rates = {item["tax_rate"] for item in items}
+    if len(tax_rates) == 1:
+        tax_rate = tax_rates.pop()
+        tax = round(subtotal_after_discount * (tax_rate / 100), 2)
+    else:
+        tax_rate = "mixto"
+        tax = sum(
+            round((item["qty"] * item["unit_price"] - item["discount_amount"]) * (item["tax_rate"] / 100), 2)
+            for item in items
+        )
+
+    return {
+        "subtotal": subtotal,
+        "discount": discount,
+        "subtotal_after_discount": subtotal_after_discount,
+        "tax": tax,
+        "total": subtotal_after_discount + tax,
+        "currency": currency,
+        "tax_rate": tax_rate
+    }
+
+
+def summarize_totals(items: List[Dict]) -> Dict:
+    """
+    Totales para el footer del PDF: un dict de totales si hay una sola
+    moneda, o {moneda: totales} si hay varias.
+    """
+    currencies = sorted({item["currency"] for item in items})
+    if len(currencies) == 1:
+        return _currency_totals(items, currencies[0])
+    return {
+        currency: _currency_totals([item for item in items if item["currency"] == currency], currency)
+        for currency in currencies
+    }
+
+
+def header_data(
+    config: Dict[str, str],
+    template: str,
+    number: str,
+    date,
+    customer,
+    advisor=None,
+    customer_attention: str = "",
+    validity_days: int = 15,
+    custom_terms: str = "",
+    custom_fiscal_note: str = ""
+) -> Dict:
+    """Encabezado del PDF: empresa y logos (configuración), cliente y asesor"""
+    return {
+        "title": "COTIZACIÓN",
+        "number": number,
+        "company_name": config.get("company_name", ""),
+        "company_address": config.get("company_address", ""),
+        "company_phone": config.get("company_phone", ""),
+        "company_email": config.get("company_email", ""),
+        "company_web": config.get("company_web", ""),
+        "date": date.strftime("%Y-%m-%d"),
+        "customer_name": customer.name,
+        "customer_company": customer.company or "",
+        "customer_attention": customer_attention,
+        "customer_email": customer.email or "",
+        "customer_phone": customer.phone or "",
+        "customer_address": customer.address or "",
+        "validity_days": validity_days,
+        "advisor_name": advisor.name if advisor else "",
+        "advisor_phone": advisor.phone if advisor else "",
+        "advisor_email": advisor.email if advisor else "",
+        "terms": custom_terms.strip() or config.get(f"terms_{template}", ""),
+        "fiscal_note": custom_fiscal_note.strip() or config.get("fiscal_note", ""),
+        "logo_left_path": config.get("logo_left_path", str(LOGOS_DIR / "colono.png")),
+        "logo_right_path": config.get("logo_right_path", str(LOGOS_DIR / "massey.png"))
+    }
+
+
+def load_document(db: Session, proforma_id: int, config: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+    """
+    Todo lo necesario para dibujar una proforma guardada (dos consultas más la
+    configuración, que se puede pasar ya leída). Retorna {"id", "number",
+    "template", "pdf_path", "header", "items", "totals"} o None.
+    """
+    proforma = db.scalars(
+        select(Proforma)
+        .options(
+            joinedload(Proforma.customer),
+            joinedload(Proforma.advisor),
+            selectinload(Proforma.items)
+        )
+        .where(Proforma.id == proforma_id)
+    ).first()
+    if proforma is None:
+        return None
+
+    if config is None:
+        config = crud.get_all_config(db)
+    items = [{field: getattr(item, field) for field in ITEM_FIELDS} for item in proforma.items]
+
+    return {
+        "id": proforma.id,
+        "number": proforma.number,
+        "template": proforma.template,
+        "pdf_path": proforma.pdf_path or "",
+        "header": header_data(
+            config,
+            proforma.template,
+            proforma.number,
+            proforma.date,
+            proforma.customer,
+            proforma.advisor,
+            customer_attention=proforma.customer_attention or "",
+            validity_days=proforma.validity_days,
+            custom_terms=proforma.custom_terms or "",
+            custom_fiscal_note=proforma.custom_fiscal_note or ""
+        ),
+        "items": items,
+        "totals": summarize_totals(items),
+    }
+
+
+# ==================== PDF ====================
+
+def checked_pdf_path(path) -> Path:
+    """Ruta absoluta de un PDF de proforma; ValueError si queda fuera de OUTPUTS_DIR"""
+    resolved = Path(path).resolve()
+    if OUTPUTS_DIR.resolve() not in resolved.parents:
+        raise ValueError(f"La ruta del PDF está fuera de {OUTPUTS_DIR}: {path}")
+    return resolved
+
+
+def render_document(document: Dict, output_path: Optional[Path] = None) -> Path:
+    """
+    Dibuja el PDF de `document` (ver load_document). Se escribe en un
+    temporal y se renombra: quien lea el archivo nunca ve un PDF a medias.
+    Sin `output_path`, la ruta (guardada o de PDF_PATH_TEMPLATE) debe quedar
+    dentro de OUTPUTS_DIR; si no, ValueError.
+    """
+    from app.pdf import build_proforma_pdf
+
+    if output_path is not None:
+        path = Path(output_path)
+    else:
+        path = checked_pdf_path(
+            document["pdf_path"] or PDF_PATH_TEMPLATE.replace("{number}", document["number"])
+        )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    try:
+        build_proforma_pdf(
+            tmp_path,
+            document["header"],
+            document["items"],
+            document["totals"],
+            template=document["template"]
+        )
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def render_proforma(db: Session, proforma_id: int, output_path: Optional[Path] = None) -> Optional[Path]:
+    """
+    Dibuja el PDF de una proforma guardada; None si no existe. Si la
+    proforma no tenía ruta de PDF se guarda la usada.
+    """
+    document = load_document(db, proforma_id)
+    if document is None:
+        return None
+    path = render_document(document, output_path)
+    if output_path is None and not document["pdf_path"]:
+        crud.set_proforma_pdf_path(db, proforma_id, str(path))
+    return path
+
+
+def render_merged(db: Session, proforma_ids: List[int], output_path: Path, title: str = "Proformas") -> Path:
+    """
+    Un solo PDF con las proformas `proforma_ids` (en ese orden), con un
+    marcador por proforma. Se dibujan desde la base en un mismo documento, así
+    que los logos e imágenes repetidos se incrustan una sola vez. Lanza
+    ValueError con los IDs que no existen (o si la lista está vacía).
+    """
+    from app.pdf import build_merged_pdf
+
+    config = crud.get_all_config(db)
+    documents, missing = [], []
+    for proforma_id in proforma_ids:
+        document = load_document(db, proforma_id, config)
+        if document is None:
+            missing.append(proforma_id)
+            continue
+        header = document["header"]
+        document["outline_title"] = f"{document['number']} · {header['date']} · {header['customer_name']}"
+        documents.append(document)
+    if missing:
+        raise ValueError(f"No existen las proformas: {', '.join(map(str, missing))}")
+    if not documents:
+        raise ValueError("No hay proformas para combinar")
+
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+    try:
+        build_merged_pdf(tmp_path, documents, title=title)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return path
+
+
+def ensure_pdf(db: Session, proforma_id: int) -> Optional[Path]:
+    """
+    Ruta del PDF de la proforma; lo dibuja solo si el archivo no existe.
+    ValueError si la ruta guardada queda fuera de OUTPUTS_DIR.
+    """
+    pdf_path = db.scalar(select(Proforma.pdf_path).where(Proforma.id == proforma_id))
+    if pdf_path is None:
+        return None
+    if pdf_path:
+        path = checked_pdf_path(pdf_path)
+        if path.exists():
+            return path
+    return render_proforma(db, proforma_id)
+
+
+# ==================== CREACIÓN ====================
+
+def resolve_items(db: Session, spec: ProformaCreate) -> List[Dict]:
+    """
+    Items para crud.create_proforma. Los que traen `product_id` completan
+    los campos omitidos con el modelo del catálogo (una consulta para todos).
+    Lanza ValueError si un modelo no existe o es de otro tipo de cotización.
+    """
+    product_ids = {item.product_id for item in spec.items if item.product_id is not None}
+    catalog = {}
+    if product_ids:
+        rows = db.execute(
+            select(Model.id, Model.name, Model.description, Model.base_price,
+                   Model.image_path, Brand.name.label("brand_name"), Brand.equipment_type)
+            .join(Brand, Model.brand_id == Brand.id)
+            .where(Model.id.in_(product_ids))
+        ).all()
+        catalog = {row.id: row for row in rows}
+
+    items = []
+    for index, item in enumerate(spec.items, start=1):
+        model = None
+        if item.product_id is not None:
+            model = catalog.get(item.product_id)
+            if model is None:
+                raise ValueError(f"Item {index}: el modelo {item.product_id} no existe")
+            if model.equipment_type != spec.template:
+                raise ValueError(
+                    f"Item {index}: el modelo {item.product_id} no es de tipo {spec.template}"
+                )
+
+        items.append({
+            "model_id": item.product_id,
+            "brand_name": item.brand or model.brand_name,
+            "model_name": item.model or model.name,
+            "year": item.year,
+            "description": item.description if item.description is not None else (model.description if model else ""),
+            "image_path": model.image_path if model else "",
+            "qty": item.qty,
+            "unit_price": item.unit_price if item.unit_price is not None else model.base_price,
+            "discount_percent": item.discount_percent,
+            "tax_rate": item.tax_rate,
+            "currency": item.currency,
+        })
+    return items
+
+
+def proforma_fields(db: Session, spec: ProformaCreate) -> Dict:
+    """
+    Argumentos de crud.insert_proforma/create_proforma para una proforma
+    validada por schemas.ProformaCreate. Lanza ValueError si el cliente, el
+    asesor o un modelo no existen.
+    """
+    if db.get(Customer, spec.customer_id) is None:
+        raise ValueError(f"El cliente {spec.customer_id} no existe")
+    if spec.advisor_id is not None and db.get(Advisor, spec.advisor_id) is None:
+        raise ValueError(f"El asesor {spec.advisor_id} no existe")
+
+    return {
+        "number": spec.number,
+        "customer_id": spec.customer_id,
+        "template": spec.template,
+        "items_data": resolve_items(db, spec),
+        "advisor_id": spec.advisor_id,
+        "customer_attention": spec.customer_attention,
+        "validity_days": spec.validity_days,
+        "date": spec.date,
+        "custom_terms": spec.custom_terms,
+        "custom_fiscal_note": spec.custom_fiscal_note,
+        "notes": spec.notes,
+        "pdf_path": PDF_PATH_TEMPLATE,
+    }
+
+
+def create_quote(db: Session, spec: ProformaCreate) -> Dict:
+    """
+    Guarda una proforma validada por schemas.ProformaCreate (sin dibujar el
+    PDF; ver render_proforma). Retorna el resumen de crud.create_proforma.
+    Lanza ValueError si el cliente, el asesor o un modelo no existen, o si
+    el número ya está usado.
+    """
+    return crud.create_proforma(db, **proforma_fields(db, spec))
@@ -3,7 +3,7 @@ Esquemas Pydantic para validación de datos
 """
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel, Field, EmailStr, validator
+from pydantic import BaseModel, Field, EmailStr, model_validator, validator
 
 
 class ProductBase(BaseModel):
@@ -37,6 +37,27 @@ class Product(ProductBase):
         from_attributes = True
 
 
+class CustomerBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    company: str = Field(default="", max_length=200)
+    email: Optional[EmailStr] = None
+    phone: str = Field(default="", max_length=50)
+    address: str = ""
+
+
+class CustomerCreate(CustomerBase):
+    pass
+
+
+class Customer(CustomerBase):
+    id: int
+    active: bool
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
 class ProformaItemBase(BaseModel):
     brand: str
     model: str
@@ -44,8 +65,9 @@ class ProformaItemBase(BaseModel):
     description: str = ""
     qty: int = Field(..., ge=1)
     unit_price: float = Field(..., ge=0)
+    discount_percent: float = Field(default=0.0, ge=0, le=100)
+    tax_rate: float = Field(default=13.0, ge=0, le=100)
     currency: str = Field(..., pattern="^(CRC|USD)$")
-    image_path: Optional[str] = None
     
     @validator('year')
     def validate_year(cls, v):
@@ -55,45 +77,69 @@ class ProformaItemBase(BaseModel):
 
 
 class ProformaItemCreate(ProformaItemBase):
+    """
+    Con `product_id` (id de Model) los campos omitidos se toman del catálogo:
+    marca, modelo, descripción y precio base. La imagen es siempre la del
+    modelo del catálogo (sin `product_id`, ninguna): el PDF abre esa ruta, así
+    que no se acepta del cliente.
+    """
     product_id: Optional[int] = None
+    brand: Optional[str] = Field(None, min_length=1, max_length=100)
+    model: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    unit_price: Optional[float] = Field(None, ge=0)
+    currency: str = Field(default="CRC", pattern="^(CRC|USD)$")
+    
+    @model_validator(mode="after")
+    def validate_source(self):
+        if self.product_id is None and (not self.brand or not self.model or self.unit_price is None):
+            raise ValueError('Sin product_id se requieren brand, model y unit_price')
+        return self
 
 
 class ProformaItem(ProformaItemBase):
     id: int
     line_total: float
+    image_path: Optional[str] = None
     
     class Config:
         from_attributes = True
 
 
 class ProformaBase(BaseModel):
-    number: str = Field(..., min_length=1, max_length=50)
-    customer_name: str = Field(..., min_length=1, max_length=200)
-    customer_company: Optional[str] = None
-    customer_email: Optional[EmailStr] = None
-    customer_phone: Optional[str] = None
-    customer_address: Optional[str] = None
-    customer_attention: Optional[str] = None
-    
-    advisor_name: Optional[str] = None
-    advisor_phone: Optional[str] = None
-    advisor_email: Optional[EmailStr] = None
+    customer_id: int
+    advisor_id: Optional[int] = None
+    customer_attention: str = Field(default="", max_length=200)
     
     template: str = Field(..., pattern="^(tractor|implement)$")
     validity_days: int = Field(default=15, ge=1, le=365)
     date: datetime = Field(default_factory=datetime.utcnow)
     
-    general_terms: Optional[str] = None
+    # Vacíos: términos y nota fiscal de la configuración
+    custom_terms: str = ""
+    custom_fiscal_note: str = ""
+    notes: str = ""
 
 
 class ProformaCreate(ProformaBase):
-    items: List[ProformaItemCreate] = Field(..., min_items=1)
+    # Vacío: siguiente número de la secuencia. Es parte del nombre del PDF:
+    # solo letras, dígitos, '.', '_' y '-', sin '..'
+    number: Optional[str] = Field(None, max_length=50, pattern=r"^[A-Za-z0-9._-]+$")
+    items: List[ProformaItemCreate] = Field(..., min_length=1)
+
+    @validator('number')
+    def validate_number(cls, v):
+        if v is not None and ".." in v:
+            raise ValueError("El número no puede contener '..'")
+        return v
 
 
 class Proforma(ProformaBase):
     id: int
+    number: str
     currency: str
     subtotal: float
+    discount: float
     tax: float
     total: float
     created_at: datetime
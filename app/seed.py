@@ -0,0 +1,495 @@
+"""
+Datos sintéticos para pruebas de escala
+
+Genera clientes, asesores, marcas, modelos (con imágenes del tamaño
+indicado) y proformas con distribuciones sesgadas como las reales: pocos
+clientes, asesores y modelos concentran la mayoría de las cotizaciones, la
+mayoría de las proformas tiene 1-2 items y hay más en los meses recientes.
+
+Uso:
+    python -m app.cli seed --db /tmp/agriquote_1m.db --proformas 1000000
+    AGRIQUOTE_DB_PATH=/tmp/agriquote_1m.db streamlit run streamlit_app.py
+
+El resultado depende solo de `seed` y de los tamaños (fechas incluidas), así
+que cualquier benchmark puede regenerar la misma base. Las filas se escriben
+con INSERT masivos (executemany) en transacciones de `batch_size`
+proformas; la base destino debe estar vacía. Las imágenes quedan en la
+carpeta de archivos de esa base (<nombre>_files/uploads, ver
+db.storage_dirs), igual que los PDFs que la app dibuje con ella.
+"""
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+
+from app.db import storage_dirs
+from app.models import (
+    Advisor, Brand, Customer, Model, Proforma, ProformaItem, ProformaSequence
+)
+
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 5000
+
+# Fechas fijas: la misma semilla genera la misma base en cualquier día
+END_DATE = datetime(2025, 12, 31, 17, 0)
+SPAN_DAYS = 3 * 365
+
+FIRST_NAMES = (
+    "José", "María", "Luis", "Ana", "Carlos", "Laura", "Jorge", "Sofía", "Juan", "Carmen",
+    "Andrés", "Gabriela", "Diego", "Valeria", "Manuel", "Daniela", "Ricardo", "Paola",
+    "Fernando", "Mónica", "Alejandro", "Silvia", "Roberto", "Adriana", "Esteban", "Lucía",
+)
+LAST_NAMES = (
+    "Rodríguez", "Vargas", "Jiménez", "Mora", "Rojas", "Alvarado", "Solís", "Castro",
+    "Araya", "Quesada", "Chaves", "Gómez", "Hernández", "Sánchez", "Ramírez", "Campos",
+    "Calderón", "Salazar", "Méndez", "Villalobos", "Brenes", "Segura", "Herrera", "Ulate",
+)
+COMPANY_KINDS = ("Agropecuaria", "Finca", "Hacienda", "Ganadera", "Bananera", "Piñera", "Cafetalera")
+COMPANY_SUFFIXES = ("S.A.", "Ltda.", "S.R.L.", "")
+PROVINCES = (
+    ("Limón", ("Pococí", "Guácimo", "Siquirres", "Matina", "Talamanca")),
+    ("Heredia", ("Sarapiquí", "San Isidro", "Barva")),
+    ("Alajuela", ("San Carlos", "Upala", "Los Chiles", "Grecia", "Naranjo")),
+    ("Guanacaste", ("Liberia", "Nicoya", "Santa Cruz", "Cañas", "Bagaces")),
+    ("Puntarenas", ("Buenos Aires", "Corredores", "Osa", "Parrita")),
+    ("San José", ("Pérez Zeledón", "Acosta", "Puriscal")),
+    ("Cartago", ("Turrialba", "Paraíso", "Oreamuno")),
+)
+
+TRACTOR_BRANDS = (
+    "Massey Ferguson", "John Deere", "New Holland", "Kubota", "Case IH", "Valtra",
+    "Landini", "Mahindra", "Deutz-Fahr", "Same", "Fendt", "Claas",
+)
+IMPLEMENT_BRANDS = (
+    "Baldan", "Jumil", "Tatu Marchesan", "Kuhn", "Amazone", "Great Plains",
+    "Vicon", "Stara", "Jacto", "Lemken", "Pöttinger", "Howard",
+)
+IMPLEMENT_KINDS = (
+    "Rastra", "Arado", "Sembradora", "Chapeadora", "Fumigadora", "Encaladora",
+    "Rotavator", "Subsolador", "Cultivadora", "Ensiladora",
+)
+
+# Items por proforma: la mayoría 1-2, pocas con muchos
+ITEM_COUNTS = (1, 2, 3, 4, 5, 6, 8, 10, 15)
+ITEM_COUNT_WEIGHTS = (55, 18, 9, 6, 4, 3, 2, 2, 1)
+QUANTITIES = (1, 1, 1, 1, 2, 2, 3, 5)
+DISCOUNTS = (2.5, 5.0, 7.5, 10.0, 15.0)
+VALIDITY_DAYS = (15, 15, 15, 30, 8)
+
+
+def zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    """Pesos acumulados de una distribución de Zipf (rango 1 = más frecuente)"""
+    return list(accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+
+# ==================== CLIENTES Y ASESORES ====================
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _phone(rng: random.Random) -> str:
+    return f"{rng.choice('678')}{rng.randint(0, 999):03d}-{rng.randint(0, 9999):04d}"
+
+
+def _email(name: str, domain: str, index: int) -> str:
+    user = ".".join(name.lower().split()[:2])
+    user = user.translate(str.maketrans("áéíóúñü", "aeiounu"))
+    return f"{user}{index}@{domain}"
+
+
+def customer_rows(rng: random.Random, count: int, now: datetime) -> List[Dict]:
+    rows = []
+    for index in range(1, count + 1):
+        name = _person(rng)
+        province, cantons = rng.choice(PROVINCES)
+        company = ""
+        if rng.random() < 0.6:
+            company = f"{rng.choice(COMPANY_KINDS)} {rng.choice(LAST_NAMES)} {rng.choice(COMPANY_SUFFIXES)}".strip()
+        rows.append({
+            "name": name,
+            "company": company,
+            "email": _email(name, "correo.cr", index) if rng.random() < 0.8 else "",
+            "phone": _phone(rng) if rng.random() < 0.9 else "",
+            "address": f"{province}, {rng.choice(cantons)}, {rng.randint(100, 900)} m al {rng.choice(('norte', 'sur', 'este', 'oeste'))} de la escuela",
+            "active": rng.random() < 0.97,
+            "created_at": now,
+            "updated_at": now,
+        })
+    return rows
+
+
+def advisor_rows(rng: random.Random, count: int, now: datetime) -> List[Dict]:
+    return [
+        {
+            "name": (name := _person(rng)),
+            "email": _email(name, "colono.cr", index),
+            "phone": _phone(rng),
+            "active": rng.random() < 0.9,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index in range(1, count + 1)
+    ]
+
+
+# ==================== CATÁLOGO ====================
+
+def make_image(rng: random.Random, size: int) -> bytes:
+    """JPEG sintético (fondo degradado y figuras) de `size` px de ancho"""
+    from PIL import Image, ImageDraw
+
+    width, height = size, max(1, size * 3 // 4)
+    image = Image.new("RGB", (width, height))
+    draw = ImageDraw.Draw(image)
+    top = tuple(rng.randint(120, 230) for _ in range(3))
+    bottom = tuple(rng.randint(20, 120) for _ in range(3))
+    for y in range(height):
+        t = y / max(1, height - 1)
+        draw.line([(0, y), (width, y)], fill=tuple(int(a + (b - a) * t) for a, b in zip(top, bottom)))
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        radius = rng.randint(size // 40 + 1, size // 6 + 2)
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape([x - radius, y - radius, x + radius, y + radius], fill=tuple(rng.randrange(256) for _ in range(3)))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def seed_images(rng: random.Random, count: int, size: int, upload_dir: Path) -> List[Dict]:
+    """
+    Guarda `count` imágenes con el pipeline de app.images (master y
+    miniatura) en `upload_dir`. Retorna las columnas image_* de Model para
+    cada una.
+    """
+    if count <= 0 or size <= 0:
+        return []
+    from app.images import ingest_image
+
+    uploads = [ingest_image(make_image(rng, size), upload_dir) for _ in range(count)]
+    images = []
+    for upload in uploads:
+        info = upload.wait()
+        images.append({
+            "image_path": upload.path,
+            "image_width": info["width"],
+            "image_height": info["height"],
+            "image_bytes": info["bytes"],
+        })
+    return images
+
+
+def brand_rows(count: int, now: datetime) -> List[Dict]:
+    rows = []
+    for index in range(count):
+        names = TRACTOR_BRANDS if index % 2 == 0 else IMPLEMENT_BRANDS
+        position = index // 2
+        name = names[position % len(names)]
+        if position >= len(names):
+            name = f"{name} {position // len(names) + 1}"
+        rows.append({
+            "name": name,
+            "equipment_type": "tractor" if index % 2 == 0 else "implement",
+            "active": True,
+            "created_at": now,
+            "updated_at": now,
+        })
+    return rows
+
+
+def model_rows(
+    rng: random.Random,
+    brands: List[Dict],
+    per_brand: int,
+    images: List[Dict],
+    now: datetime
+) -> List[Dict]:
+    no_image = {"image_path": "", "image_width": None, "image_height": None, "image_bytes": None}
+    rows = []
+    for brand in brands:
+        prefix = "".join(word[0] for word in brand["name"].split()).upper()
+        for index in range(per_brand):
+            if brand["equipment_type"] == "tractor":
+                hp = rng.choice((45, 55, 65, 75, 85, 95, 110, 130, 150, 180, 210))
+                name = f"{prefix} {rng.randint(2, 8)}{hp:03d}-{index + 1}"
+                price = round(rng.lognormvariate(17.2, 0.35), -3)
+                description = (
+                    f"Motor diésel {rng.choice((3, 4, 6))} cilindros, {hp} HP. "
+                    f"Transmisión {rng.choice(('mecánica 8x8', 'sincronizada 12x12', 'powershift 16x16'))}, "
+                    f"tracción {rng.choice(('4x2', '4x4'))}. Levante hidráulico de {rng.randint(18, 60) * 100} kg."
+                )
+            else:
+                kind = rng.choice(IMPLEMENT_KINDS)
+                name = f"{kind} {prefix}-{rng.randint(10, 99)}{index + 1}"
+                price = round(rng.lognormvariate(14.8, 0.6), -3)
+                description = (
+                    f"{kind} de {rng.randint(6, 40)} {rng.choice(('discos', 'líneas', 'cuerpos'))}, "
+                    f"ancho de trabajo {rng.randint(12, 60) / 10:.1f} m. Requiere tractor de {rng.randint(40, 150)} HP."
+                )
+            rows.append({
+                "brand_id": brand["id"],
+                "name": name,
+                "description": description,
+                "base_price": price,
+                **(rng.choice(images) if images else no_image),
+                "active": rng.random() < 0.95,
+                "created_at": now,
+                "updated_at": now,
+            })
+    return rows
+
+
+# ==================== PROFORMAS ====================
+
+def _pick(rng: random.Random, population: List, cum_weights: List[float]):
+    return rng.choices(population, cum_weights=cum_weights)[0]
+
+
+def proforma_batches(
+    rng: random.Random,
+    count: int,
+    customer_ids: List[int],
+    advisor_ids: List[int],
+    models_by_type: Dict[str, List[Dict]],
+    batch_size: int,
+    first_id: int = 1
+):
+    """
+    Genera (proformas, items) en lotes de `batch_size` proformas, en orden
+    cronológico (más densidad en las fechas recientes) con números
+    PF-AÑO-NNNNN consecutivos por año.
+    """
+    # Popularidad: orden aleatorio (el id no determina cuál es más frecuente)
+    customer_ids = customer_ids[:]
+    rng.shuffle(customer_ids)
+    customer_weights = zipf_weights(len(customer_ids), 0.9)
+    advisor_weights = zipf_weights(len(advisor_ids), 0.8)
+    model_weights = {}
+    for template, models in models_by_type.items():
+        models = models[:]
+        rng.shuffle(models)
+        models_by_type[template] = models
+        model_weights[template] = zipf_weights(len(models), 1.2)
+    templates = [t for t in ("tractor", "implement") if models_by_type.get(t)]
+
+    start = END_DATE - timedelta(days=SPAN_DAYS)
+    span_seconds = SPAN_DAYS * 86400
+    sequences: Dict[int, int] = {}
+
+    proformas, items = [], []
+    for offset in range(count):
+        proforma_id = first_id + offset
+        # Convexa en el tiempo: más proformas en los meses recientes
+        date = start + timedelta(seconds=span_seconds * ((offset + rng.random()) / count) ** 0.7)
+        sequences[date.year] = sequences.get(date.year, 0) + 1
+
+        template = "tractor" if len(templates) == 1 or rng.random() < 0.35 else "implement"
+        template = template if template in templates else templates[0]
+        currency = "USD" if rng.random() < 0.15 else "CRC"
+        mixed = rng.random() < 0.03
+        exonerated = rng.random() < 0.05
+
+        lines = []
+        item_count = rng.choices(ITEM_COUNTS, weights=ITEM_COUNT_WEIGHTS)[0]
+        for _ in range(item_count):
+            model = _pick(rng, models_by_type[template], model_weights[template])
+            line_currency = ("USD" if currency == "CRC" else "CRC") if mixed and rng.random() < 0.5 else currency
+            unit_price = model["base_price"] / 520 if line_currency == "USD" else model["base_price"]
+            qty = rng.choice(QUANTITIES)
+            line = ProformaItem.compute_line(
+                qty,
+                round(unit_price, 2),
+                rng.choice(DISCOUNTS) if rng.random() < 0.25 else 0.0,
+                0.0 if exonerated else (4.0 if rng.random() < 0.01 else 13.0)
+            )
+            line.update(
+                proforma_id=proforma_id,
+                model_id=model["id"],
+                brand_name=model["brand_name"],
+                model_name=model["name"],
+                year=rng.randint(2023, 2026) if template == "tractor" else None,
+                description=model["description"],
+                image_path=model["image_path"],
+                qty=qty,
+                unit_price=round(unit_price, 2),
+                currency=line_currency,
+            )
+            lines.append(line)
+
+        currencies = {line["currency"] for line in lines}
+        created_at = date + timedelta(minutes=rng.randint(1, 90))
+        proformas.append({
+            "id": proforma_id,
+            "number": f"PF-{date.year}-{sequences[date.year]:05d}",
+            "customer_id": _pick(rng, customer_ids, customer_weights),
+            "advisor_id": _pick(rng, advisor_ids, advisor_weights) if advisor_ids and rng.random() < 0.95 else None,
+            "customer_attention": _person(rng) if rng.random() < 0.3 else "",
+            "template": template,
+            "validity_days": rng.choice(VALIDITY_DAYS),
+            "date": date,
+            "currency": "MIXED" if len(currencies) > 1 else currency,
+            "custom_terms": "",
+            "custom_fiscal_note": "",
+            "notes": "",
+            "pdf_path": "",
+            "created_at": created_at,
+            "updated_at": created_at,
+            **Proforma.compute_totals(lines),
+        })
+        items.extend(lines)
+
+        if len(proformas) >= batch_size:
+            yield proformas, items, sequences
+            proformas, items = [], []
+
+    if proformas:
+        yield proformas, items, sequences
+
+
+# ==================== CARGA ====================
+
+def prepare_database(engine: Engine) -> None:
+    """Crea el esquema, los índices y la configuración por defecto (como init_db)"""
+    from sqlalchemy.orm import Session
+
+    from app.config_defaults import init_default_config
+    from app.db import Base
+    from app.migrations import run_migrations
+
+    # Las tablas y luego sus índices en orden de nombre: create_all los crea
+    # en el orden de un set, distinto en cada proceso, y con él cambian las
+    # estadísticas y los planes de la base generada
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            conn.execute(CreateTable(table, if_not_exists=True))
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                index.create(conn, checkfirst=True)
+    run_migrations(engine)
+    with Session(engine) as db:
+        init_default_config(db)
+        db.commit()
+
+
+def seed_database(
+    engine: Engine,
+    seed: int = DEFAULT_SEED,
+    customers: int = 5000,
+    advisors: int = 25,
+    brands: int = 16,
+    models_per_brand: int = 30,
+    proformas: int = 10000,
+    images: int = 20,
+    image_size: int = 1200,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> Dict:
+    """
+    Llena una base vacía (esquema ya creado) con datos sintéticos.
+
+    `images` imágenes de `image_size` px se reparten entre los modelos
+    (image_size=0: modelos sin imagen). `progress(hechas, total)` se llama
+    después de cada lote de proformas. Retorna un reporte con los conteos y
+    tiempos. Lanza ValueError si la base ya tiene datos.
+    """
+    rng = random.Random(seed)
+    now = END_DATE
+    started = time.perf_counter()
+    report = {"seed": seed, "customers": customers, "advisors": advisors, "brands": brands}
+
+    with engine.connect() as conn:
+        existing = sum(
+            conn.scalar(select(func.count()).select_from(table))
+            for table in (Customer.__table__, Brand.__table__, Proforma.__table__)
+        )
+        if existing:
+            raise ValueError("La base ya tiene datos: indica una ruta nueva con --db")
+
+        # Datos descartables: sin fsync por transacción
+        conn.exec_driver_sql("PRAGMA synchronous = OFF")
+        conn.commit()
+
+        with conn.begin():
+            conn.execute(insert(Customer.__table__), customer_rows(rng, customers, now))
+            conn.execute(insert(Advisor.__table__), advisor_rows(rng, advisors, now))
+            conn.execute(insert(Brand.__table__), brand_rows(brands, now))
+
+        # En las carpetas de la base generada, no en las de la base de la app
+        upload_dir = storage_dirs(Path(engine.url.database))[0]
+        image_rows = seed_images(rng, images, image_size, upload_dir)
+        report["images"] = len(image_rows)
+
+        brand_list = [dict(row._mapping) for row in conn.execute(select(Brand.id, Brand.name, Brand.equipment_type).order_by(Brand.id))]
+        conn.commit()
+        with conn.begin():
+            conn.execute(insert(Model.__table__), model_rows(rng, brand_list, models_per_brand, image_rows, now))
+        report["models"] = len(brand_list) * models_per_brand
+
+        models_by_type: Dict[str, List[Dict]] = {}
+        for row in conn.execute(
+            select(Model.id, Model.name, Model.description, Model.base_price, Model.image_path,
+                   Brand.name.label("brand_name"), Brand.equipment_type)
+            .join(Brand, Model.brand_id == Brand.id)
+            .where(Model.active == True)
+            .order_by(Model.id)
+        ):
+            models_by_type.setdefault(row.equipment_type, []).append(dict(row._mapping))
+        customer_ids = list(conn.scalars(select(Customer.id).order_by(Customer.id)))
+        advisor_ids = list(conn.scalars(select(Advisor.id).order_by(Advisor.id)))
+        conn.commit()
+        report["catalog_seconds"] = time.perf_counter() - started
+
+        proformas_started = time.perf_counter()
+        done, item_count, sequences = 0, 0, {}
+        for proforma_rows, item_rows, sequences in proforma_batches(
+            rng, proformas, customer_ids, advisor_ids, models_by_type, batch_size
+        ):
+            with conn.begin():
+                conn.execute(insert(Proforma.__table__), proforma_rows)
+                conn.execute(insert(ProformaItem.__table__), item_rows)
+            done += len(proforma_rows)
+            item_count += len(item_rows)
+            if progress:
+                progress(done, proformas)
+
+        # La numeración de la app continúa después de los números generados
+        with conn.begin():
+            if sequences:
+                conn.execute(insert(ProformaSequence.__table__), [
+                    {"prefix": "PF", "year": year, "last_value": value, "updated_at": now}
+                    for year, value in sequences.items()
+                ])
+            conn.exec_driver_sql("ANALYZE")
+        conn.exec_driver_sql("PRAGMA synchronous = FULL")
+
+    report.update({
+        "proformas": done,
+        "items": item_count,
+        "proformas_seconds": time.perf_counter() - proformas_started,
+        "seconds": time.perf_counter() - started,
+    })
+    return report
+
+
+def format_report(report: Dict) -> str:
+    """Resumen en texto del reporte de generación"""
+    rate = report["proformas"] / report["proformas_seconds"] if report["proformas_seconds"] else 0
+    return "\n".join([
+        f"Semilla:                   {report['seed']}",
+        f"Clientes:                  {report['customers']}",
+        f"Asesores:                  {report['advisors']}",
+        f"Marcas / modelos:          {report['brands']} / {report['models']}",
+        f"Imágenes:                  {report['images']}",
+        f"Proformas:                 {report['proformas']}",
+        f"Items:                     {report['items']}",
+        f"Tiempo:                    {report['seconds']:.1f} s ({rate:,.0f} proformas/s)",
+    ])
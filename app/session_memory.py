@@ -0,0 +1,77 @@
+"""
+Tamaño del session state de Streamlit por sesión
+
+Todas las sesiones abiertas viven en el mismo proceso: lo que cada una guarda
+en `st.session_state` se suma. El panel de rendimiento muestra con este
+módulo el tamaño aproximado (sys.getsizeof recursivo) de la sesión actual
+por clave y el de cada sesión activa.
+
+Solo debe importarse desde la app de Streamlit.
+"""
+import sys
+from typing import Dict, List, Mapping, Optional
+
+import streamlit as st
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Tamaño aproximado en bytes de un objeto y lo que contiene"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, Mapping):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def state_report(state, top: int = 5) -> Dict:
+    """{"keys", "bytes", "largest": [{"key", "type", "bytes"}]} de un session state"""
+    sizes = []
+    for key in list(state):
+        try:
+            value = state[key]
+        except (KeyError, AttributeError):
+            continue
+        sizes.append({"key": str(key), "type": type(value).__name__, "bytes": deep_sizeof(value)})
+    sizes.sort(key=lambda entry: entry["bytes"], reverse=True)
+    return {
+        "keys": len(sizes),
+        "bytes": sum(entry["bytes"] for entry in sizes),
+        "largest": sizes[:top],
+    }
+
+
+def current_session_report(top: int = 10) -> Dict:
+    return state_report(st.session_state, top=top)
+
+
+def all_sessions_report(top: int = 3) -> List[Dict]:
+    """
+    Un registro por sesión activa del proceso, de la más pesada a la más
+    liviana. Usa el SessionManager interno de Streamlit; retorna [] si no está
+    disponible (p. ej. en streamlit.testing).
+    """
+    from streamlit import runtime
+
+    if not runtime.exists():
+        return []
+    session_mgr = getattr(runtime.get_instance(), "_session_mgr", None)
+    if session_mgr is None:
+        return []
+
+    reports = []
+    for info in session_mgr.list_active_sessions():
+        report = state_report(info.session.session_state, top=top)
+        report["session"] = info.session.id[:8]
+        reports.append(report)
+    return sorted(reports, key=lambda report: report["bytes"], reverse=True)
@@ -0,0 +1,122 @@
+"""
+Lectura en streaming de archivos tabulares (CSV/XLSX) para importaciones masivas
+"""
+import csv
+import io
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+SUPPORTED_SUFFIXES = (".csv", ".txt", ".xlsx", ".xlsm")
+
+
+def normalize_header(value) -> str:
+    """'Descripción Técnica' -> 'descripcion_tecnica'"""
+    text = unicodedata.normalize("NFKD", str(value or "").strip().lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.replace(" ", "_").replace("-", "_")
+
+
+def map_headers(
+    headers: List,
+    aliases: Dict[str, Sequence[str]],
+    required: Iterable[str] = ()
+) -> Dict[int, str]:
+    """Mapea índice de columna -> campo canónico según los alias aceptados"""
+    lookup = {
+        alias: field
+        for field, field_aliases in aliases.items()
+        for alias in field_aliases
+    }
+    mapping = {}
+    for idx, header in enumerate(headers):
+        field = lookup.get(normalize_header(header))
+        if field and field not in mapping.values():
+            mapping[idx] = field
+
+    missing = set(required) - set(mapping.values())
+    if missing:
+        raise ValueError(
+            "El archivo no tiene las columnas obligatorias "
+            f"(faltan: {', '.join(sorted(missing))})"
+        )
+    return mapping
+
+
+def _iter_csv(stream) -> Iterator[List]:
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(text, dialect)
+    finally:
+        # No cerrar el archivo del llamador junto con el wrapper
+        text.detach()
+
+
+def _iter_xlsx(stream) -> Iterator[List]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar archivos .xlsx instala openpyxl (pip install openpyxl)")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_records(
+    source,
+    aliases: Dict[str, Sequence[str]],
+    required: Iterable[str] = (),
+    filename: Optional[str] = None
+) -> Iterator[Dict]:
+    """
+    Lee un CSV o XLSX fila por fila sin cargarlo completo en memoria.
+
+    `source` puede ser una ruta o un archivo binario (p. ej. el UploadedFile
+    de Streamlit). La primera fila no vacía es el encabezado. Cada fila se
+    retorna como dict con los campos canónicos presentes y `_row` (número de
+    fila en el archivo).
+    """
+    is_path = isinstance(source, (str, Path))
+    if is_path:
+        filename = filename or str(source)
+    else:
+        filename = filename or getattr(source, "name", "")
+
+    # Antes de abrir la ruta: un formato no soportado no deja el archivo abierto
+    suffix = Path(filename).suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError(f"Formato no soportado: {suffix or filename}")
+
+    stream = open(source, "rb") if is_path else source
+
+    rows = _iter_xlsx(stream) if suffix in (".xlsx", ".xlsm") else _iter_csv(stream)
+    try:
+        mapping = None
+        for row_number, row in enumerate(rows, start=1):
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            if mapping is None:
+                mapping = map_headers(row, aliases, required)
+                continue
+
+            record = {"_row": row_number}
+            for idx, field in mapping.items():
+                record[field] = row[idx] if idx < len(row) else None
+            yield record
+    finally:
+        # Primero el lector (suelta el wrapper de texto / el libro) y después
+        # el archivo: así también al cortar la lectura antes del final
+        rows.close()
+        if is_path:
+            stream.close()
@@ -0,0 +1,278 @@
+"""
+Trazas de las acciones de la app: página, funciones de crud, SQL, PDF e imágenes
+
+Cada recarga de una página (o cada PDF dibujado fuera de Streamlit) es una
+traza; dentro de ella cada bloque medido es un span con su padre, así que una
+proforma lenta se puede ver completa: la página, las funciones de crud con sus
+consultas SQL, y cada sección del PDF con la lectura de imágenes.
+
+Uso:
+    with span("pdf.build", items=3):
+        ...
+
+    @traced("quotes.render")
+    def render(...): ...
+
+Las trazas se escriben como JSONL (un span por línea, con trace_id, span_id y
+parent_span_id como en OpenTelemetry) en un log rotativo. Para poder dejarlo
+activo en producción se muestrea por traza: se guarda una fracción al azar
+más todas las que tardan más que el umbral; el resto solo cuesta armar los
+spans en memoria.
+
+Variables de entorno:
+    AGRIQUOTE_TRACING            "0" para desactivar (por defecto activo)
+    AGRIQUOTE_TRACE_SAMPLE_RATE  fracción de trazas a guardar (por defecto 0.01)
+    AGRIQUOTE_TRACE_SLOW_MS      guardar siempre las más lentas que esto (por defecto 2000; 0 = no)
+    AGRIQUOTE_TRACE_LOG          ruta del log (por defecto logs/traces.jsonl)
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+ENABLED = os.environ.get("AGRIQUOTE_TRACING", "1") != "0"
+SAMPLE_RATE = float(os.environ.get("AGRIQUOTE_TRACE_SAMPLE_RATE", 0.01))
+SLOW_TRACE_MS = float(os.environ.get("AGRIQUOTE_TRACE_SLOW_MS", 2000))
+TRACE_LOG = Path(os.environ.get("AGRIQUOTE_TRACE_LOG", BASE_DIR / "logs" / "traces.jsonl"))
+LOG_MAX_BYTES = 20 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+MAX_STATEMENT_CHARS = 500
+# Una traza enorme (p. ej. una carga masiva) no debe llenar la memoria
+MAX_SPANS_PER_TRACE = 5000
+
+_trace_logger = logging.getLogger("agriquote.traces")
+_trace_logger.propagate = False
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("agriquote_span", default=None)
+
+
+# ==================== CONFIGURACIÓN ====================
+
+def configure(
+    enabled: Optional[bool] = None,
+    sample_rate: Optional[float] = None,
+    slow_trace_ms: Optional[float] = None,
+    log_path: Optional[Path] = None
+) -> None:
+    """Cambia el muestreo, el umbral de traza lenta y/o la ruta del log"""
+    global ENABLED, SAMPLE_RATE, SLOW_TRACE_MS, TRACE_LOG
+    if enabled is not None:
+        ENABLED = enabled
+    if sample_rate is not None:
+        SAMPLE_RATE = float(sample_rate)
+    if slow_trace_ms is not None:
+        SLOW_TRACE_MS = float(slow_trace_ms)
+    if log_path is not None:
+        TRACE_LOG = Path(log_path)
+        for handler in list(_trace_logger.handlers):
+            _trace_logger.removeHandler(handler)
+            handler.close()
+
+
+def _trace_log() -> logging.Logger:
+    """Crea el handler rotativo la primera vez que se exporta una traza"""
+    if not _trace_logger.handlers:
+        TRACE_LOG.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            TRACE_LOG, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _trace_logger.addHandler(handler)
+        _trace_logger.setLevel(logging.INFO)
+    return _trace_logger
+
+
+# ==================== TRAZAS Y SPANS ====================
+
+class Trace:
+    """Spans de una traza; se exportan (o descartan) al cerrar el span raíz"""
+
+    def __init__(self):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.sampled = random.random() < SAMPLE_RATE
+        # Sin muestreo ni umbral de lentitud no hace falta guardar nada
+        self.recording = self.sampled or SLOW_TRACE_MS > 0
+        self.spans: List[Dict] = []
+        self.dropped = 0
+        self.closed = False
+        self.exported = False
+        self.lock = threading.Lock()
+
+    def add(self, record: Dict) -> None:
+        with self.lock:
+            if self.closed:
+                # Span terminado en otro hilo después de la raíz
+                if self.exported:
+                    _export([record])
+            elif len(self.spans) < MAX_SPANS_PER_TRACE or record["parent_span_id"] is None:
+                self.spans.append(record)
+            else:
+                self.dropped += 1
+
+    def close(self, duration_ms: float) -> None:
+        with self.lock:
+            self.closed = True
+            self.exported = self.sampled or 0 < SLOW_TRACE_MS <= duration_ms
+            spans, self.spans = self.spans, []
+        if self.exported:
+            if self.dropped:
+                spans[-1]["attributes"]["dropped_spans"] = self.dropped
+            _export(spans)
+
+
+class Span:
+    """Un bloque medido; `set_attribute` agrega datos que se conocen al final"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start_time", "start")
+
+    def __init__(self, trace: Trace, parent: Optional["Span"], name: str, attributes: Dict):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> float:
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        if self.trace.recording:
+            self.trace.add(_record(
+                self.trace.trace_id, self.span_id, self.parent_id, self.name,
+                self.start_time, duration_ms, self.attributes, error
+            ))
+        return duration_ms
+
+
+def _record(trace_id, span_id, parent_id, name, start_time, duration_ms, attributes, error=None) -> Dict:
+    record = {
+        "trace_id": trace_id,
+        "span_id": span_id,
+        "parent_span_id": parent_id,
+        "name": name,
+        "start": start_time,
+        "duration_ms": round(duration_ms, 3),
+        "attributes": attributes,
+        "status": "ok",
+    }
+    if error is not None:
+        record["status"] = "error"
+        record["error"] = f"{type(error).__name__}: {error}"[:500]
+    return record
+
+
+def _export(records: List[Dict]) -> None:
+    logger = _trace_log()
+    for record in records:
+        # La fecha se formatea solo para las trazas que se guardan
+        record["start"] = datetime.fromtimestamp(record["start"]).isoformat(timespec="microseconds")
+        logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Mide el bloque como un span hijo del span actual (o como raíz de una
+    traza nueva). Retorna el span, o None si el tracing está desactivado.
+    """
+    if not ENABLED:
+        yield None
+        return
+
+    parent = _current_span.get()
+    trace = parent.trace if parent is not None else Trace()
+    current = Span(trace, parent, name, attributes)
+    token = _current_span.set(current)
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = e
+        raise
+    except BaseException as e:
+        # st.rerun()/st.stop() o una interrupción: no es un error de la app
+        current.set_attribute("interrupted", type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        duration_ms = current.finish(error)
+        if parent is None:
+            trace.close(duration_ms)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorador: cada llamada a la función es un span (`name` o módulo.función)"""
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or f"{fn.__module__.removeprefix('app.')}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+
+        wrapper.__traced__ = True
+        return wrapper
+    return decorator
+
+
+def trace_functions(namespace: Dict, module_name: str, exclude: Iterable[str] = ()) -> None:
+    """
+    Aplica `traced` a todas las funciones públicas definidas en el módulo
+    (`namespace` = globals() del módulo, al final del archivo), salvo las de
+    `exclude`.
+    """
+    for attr, value in list(namespace.items()):
+        if (
+            callable(value) and not attr.startswith("_") and not isinstance(value, type)
+            and attr not in exclude
+            and getattr(value, "__module__", None) == module_name
+            and not getattr(value, "__traced__", False)
+        ):
+            namespace[attr] = traced()(value)
+
+
+def recording() -> bool:
+    """True si hay un span activo cuya traza se está guardando"""
+    current = _current_span.get()
+    return current is not None and current.trace.recording
+
+
+def record_query(statement: str, duration_ms: float, rows: Optional[int]) -> None:
+    """Agrega una sentencia SQL ya ejecutada como span hijo del actual (app.instrumentation)"""
+    parent = _current_span.get()
+    if parent is None or not parent.trace.recording:
+        return
+    parent.trace.add(_record(
+        parent.trace.trace_id, f"{random.getrandbits(64):016x}", parent.span_id, "sql",
+        time.time() - duration_ms / 1000, duration_ms,
+        {"statement": statement[:MAX_STATEMENT_CHARS], "rows": rows}
+    ))
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    `fn` ejecutada con el contexto actual: los spans que abra en otro hilo
+    (p. ej. un ThreadPoolExecutor) quedan dentro de la traza de quien la creó.
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, fn)
@@ -0,0 +1,44 @@
+"""
+Páginas de la app de Streamlit
+
+Cada página es un módulo con una función `render()`. streamlit_app.py solo
+dibuja el sidebar y llama a `render_page()`: el módulo de la página (y sus
+imports pesados, p. ej. reportlab en Nueva Proforma) se importa la primera
+vez que se muestra, no en cada arranque ni en las demás páginas.
+"""
+from importlib import import_module
+from typing import Optional
+
+from app.tracing import span
+
+
+# (menú, submenú) -> módulo en app.views
+PAGES = {
+    ("🏠 Inicio", None): "home",
+    ("📊 Ver Proformas", None): "proformas",
+    ("📄 Nueva Proforma", None): "new_proforma",
+    ("📋 Mantenimientos", "👥 Clientes"): "customers",
+    ("📋 Mantenimientos", "👔 Asesores"): "advisors",
+    ("📋 Mantenimientos", "🏭 Marcas"): "brands",
+    ("📋 Mantenimientos", "📦 Modelos"): "catalog_models",
+    ("⚙️ Configuración", None): "settings",
+}
+
+
+def render_page(menu_option: str, submenu: Optional[str] = None) -> None:
+    """
+    Importa (una vez por proceso) y dibuja la página seleccionada. Cada
+    recarga es una traza (app/tracing.py) con la página y la sesión.
+    """
+    module_name = PAGES.get((menu_option, submenu))
+    if module_name is None:
+        raise ValueError(f"Página desconocida: {menu_option} / {submenu}")
+    with span(f"page.{module_name}", session_id=_session_id()):
+        import_module(f"{__name__}.{module_name}").render()
+
+
+def _session_id() -> Optional[str]:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
@@ -0,0 +1,143 @@
+"""
+Mantenimiento de asesores
+"""
+import streamlit as st
+
+from app import crud, cache
+from app.db import SessionLocal
+from app.config_defaults import MAX_CHARS
+from app.views.common import validate_email, show_char_counter
+
+
+# ==================== MANTENIMIENTO: ASESORES ====================
+
+def render():
+    st.markdown('<p class="main-header">👔 Gestión de Asesores</p>', unsafe_allow_html=True)
+    
+    tab1, tab2 = st.tabs(["📋 Lista de Asesores", "➕ Crear/Editar"])
+    
+    with tab1:
+        st.markdown("### Lista de Asesores")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            search = st.text_input("🔍 Buscar", placeholder="Buscar por nombre o email...")
+        with col2:
+            show_inactive = st.checkbox("Mostrar inactivos", value=False)
+        
+        advisors = cache.list_advisors(active_only=not show_inactive, search=search or None)
+        
+        if advisors:
+            st.dataframe(
+                [
+                    {
+                        "ID": a.id,
+                        "Nombre": a.name,
+                        "Email": a.email or "-",
+                        "Teléfono": a.phone or "-",
+                        "Estado": "✅ Activo" if a.active else "❌ Inactivo"
+                    }
+                    for a in advisors
+                ],
+                width="stretch",
+                hide_index=True
+            )
+            st.caption(f"📊 Total: {len(advisors)} asesores")
+        else:
+            st.info("No se encontraron asesores.")
+    
+    with tab2:
+        st.markdown("### Crear/Editar Asesor")
+        
+        operation = st.radio("Operación", ["➕ Crear Nuevo", "✏️ Editar Existente"], horizontal=True)
+        
+        with st.form("advisor_form"):
+            advisor_to_edit = None
+            
+            if operation == "✏️ Editar Existente":
+                all_advisors = cache.list_advisors(active_only=False)
+                
+                if not all_advisors:
+                    st.warning("No hay asesores para editar.")
+                    st.form_submit_button("Guardar", disabled=True)
+                    st.stop()
+                
+                advisor_options = {f"[{a.id}] {a.name}": a for a in all_advisors}
+                selected = st.selectbox("Seleccionar asesor", list(advisor_options.keys()))
+                advisor_to_edit = advisor_options[selected]
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                name = st.text_input(
+                    "Nombre *",
+                    value=advisor_to_edit.name if advisor_to_edit else "",
+                    max_chars=MAX_CHARS.get("advisor_name", 60)
+                )
+                if name:
+                    show_char_counter("advisor_name", len(name))
+            
+            with col2:
+                email = st.text_input(
+                    "Email",
+                    value=advisor_to_edit.email if advisor_to_edit else "",
+                    max_chars=MAX_CHARS.get("advisor_email", 50)
+                )
+                if email:
+                    show_char_counter("advisor_email", len(email))
+            
+            with col3:
+                phone = st.text_input(
+                    "Teléfono",
+                    value=advisor_to_edit.phone if advisor_to_edit else "",
+                    max_chars=MAX_CHARS.get("advisor_phone", 30)
+                )
+                if phone:
+                    show_char_counter("advisor_phone", len(phone))
+            
+            active = st.checkbox(
+                "Asesor activo",
+                value=advisor_to_edit.active if advisor_to_edit else True
+            )
+            
+            submitted = st.form_submit_button("💾 Guardar", width="stretch")
+            
+            if submitted:
+                if not name:
+                    st.error("⚠️ El nombre es obligatorio")
+                elif email and not validate_email(email):
+                    st.error("⚠️ Email no válido")
+                else:
+                    try:
+                        with SessionLocal() as db:
+                            if operation == "➕ Crear Nuevo":
+                                crud.create_advisor(
+                                    db, name=name, email=email,
+                                    phone=phone, active=active
+                                )
+                                st.success("✅ Asesor creado!")
+                            else:
+                                crud.update_advisor(
+                                    db, advisor_to_edit.id,
+                                    name=name, email=email,
+                                    phone=phone, active=active
+                                )
+                                st.success("✅ Asesor actualizado!")
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+        
+        # Eliminar asesor
+        if operation == "✏️ Editar Existente":
+            st.markdown("---")
+            st.markdown("### 🗑️ Eliminar Asesor")
+            st.warning("⚠️ Esta acción es permanente.")
+            
+            if st.button("🗑️ Eliminar Asesor Seleccionado", type="secondary"):
+                try:
+                    with SessionLocal() as db:
+                        crud.delete_advisor(db, advisor_to_edit.id)
+                    st.success(f"✅ Asesor eliminado")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
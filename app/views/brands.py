@@ -0,0 +1,136 @@
+"""
+Mantenimiento de marcas
+"""
+import streamlit as st
+
+from app import crud, cache
+from app.db import SessionLocal
+
+
+# ==================== MANTENIMIENTO: MARCAS ====================
+
+def render():
+    st.markdown('<p class="main-header">🏭 Gestión de Marcas</p>', unsafe_allow_html=True)
+    
+    tab1, tab2 = st.tabs(["📋 Lista de Marcas", "➕ Crear/Editar"])
+    
+    with tab1:
+        st.markdown("### Lista de Marcas")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            filter_type = st.selectbox(
+                "Filtrar por tipo",
+                ["Todos", "Tractores", "Implementos"]
+            )
+        with col2:
+            show_inactive = st.checkbox("Mostrar inactivas", value=False)
+        
+        type_filter = None
+        if filter_type == "Tractores":
+            type_filter = "tractor"
+        elif filter_type == "Implementos":
+            type_filter = "implement"
+        
+        brands = cache.list_brands(equipment_type=type_filter, active_only=not show_inactive)
+        brands_data = [
+            {
+                "ID": b.id,
+                "Nombre": b.name,
+                "Tipo": "🚜 Tractor" if b.equipment_type == "tractor" else "🔧 Implemento",
+                "Modelos": b.model_count,
+                "Estado": "✅ Activa" if b.active else "❌ Inactiva"
+            }
+            for b in brands
+        ]
+        
+        if brands_data:
+            st.dataframe(brands_data, width="stretch", hide_index=True)
+            st.caption(f"📊 Total: {len(brands_data)} marcas")
+        else:
+            st.info("No se encontraron marcas.")
+    
+    with tab2:
+        st.markdown("### Crear/Editar Marca")
+        
+        operation = st.radio("Operación", ["➕ Crear Nueva", "✏️ Editar Existente"], horizontal=True)
+        
+        with st.form("brand_form"):
+            brand_to_edit = None
+            
+            if operation == "✏️ Editar Existente":
+                all_brands = cache.list_brands(active_only=False)
+                
+                if not all_brands:
+                    st.warning("No hay marcas para editar.")
+                    st.form_submit_button("Guardar", disabled=True)
+                    st.stop()
+                
+                brand_options = {f"[{b.id}] {b.name} ({b.equipment_type})": b for b in all_brands}
+                selected = st.selectbox("Seleccionar marca", list(brand_options.keys()))
+                brand_to_edit = brand_options[selected]
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                name = st.text_input(
+                    "Nombre de la marca *",
+                    value=brand_to_edit.name if brand_to_edit else "",
+                    placeholder="Ej: Massey Ferguson"
+                )
+            
+            with col2:
+                equipment_type = st.selectbox(
+                    "Tipo de equipo *",
+                    ["Tractor", "Implemento"],
+                    index=0 if not brand_to_edit or brand_to_edit.equipment_type == "tractor" else 1
+                )
+                equipment_type_key = "tractor" if equipment_type == "Tractor" else "implement"
+            
+            with col3:
+                active = st.checkbox(
+                    "Marca activa",
+                    value=brand_to_edit.active if brand_to_edit else True
+                )
+            
+            submitted = st.form_submit_button("💾 Guardar", width="stretch")
+            
+            if submitted:
+                if not name:
+                    st.error("⚠️ El nombre es obligatorio")
+                else:
+                    try:
+                        with SessionLocal() as db:
+                            if operation == "➕ Crear Nueva":
+                                crud.create_brand(
+                                    db, name=name,
+                                    equipment_type=equipment_type_key,
+                                    active=active
+                                )
+                                st.success("✅ Marca creada!")
+                            else:
+                                crud.update_brand(
+                                    db, brand_to_edit.id,
+                                    name=name,
+                                    equipment_type=equipment_type_key,
+                                    active=active
+                                )
+                                st.success("✅ Marca actualizada!")
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+        
+        # Eliminar marca
+        if operation == "✏️ Editar Existente":
+            st.markdown("---")
+            st.markdown("### 🗑️ Eliminar Marca")
+            st.warning("⚠️ Esto eliminará también todos los modelos asociados.")
+            
+            if st.button("🗑️ Eliminar Marca Seleccionada", type="secondary"):
+                try:
+                    with SessionLocal() as db:
+                        crud.delete_brand(db, brand_to_edit.id)
+                    st.success(f"✅ Marca eliminada")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
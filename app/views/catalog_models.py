@@ -0,0 +1,344 @@
+"""
+Mantenimiento de modelos (catálogo de equipos)
+"""
+from pathlib import Path
+
+import streamlit as st
+
+from app import crud, cache, images
+from app.db import SessionLocal
+from app.config_defaults import MAX_CHARS
+from app.perf import perf_section
+from app.views.common import format_currency, show_char_counter
+
+# Separador decimal de la lista de precios (ver catalog_import.parse_price)
+PRICE_DECIMAL_SEPARATORS = {
+    "Detectar (error si es ambiguo)": None,
+    "15.250,50 (coma decimal)": ",",
+    "15,250.50 (punto decimal)": ".",
+}
+
+
+# ==================== MANTENIMIENTO: MODELOS ====================
+
+def render():
+    st.markdown('<p class="main-header">📦 Gestión de Modelos</p>', unsafe_allow_html=True)
+    
+    tab1, tab2, tab3 = st.tabs(["📋 Lista de Modelos", "➕ Crear/Editar", "📥 Importar Lista de Precios"])
+    
+    with tab1:
+        st.markdown("### Lista de Modelos")
+        
+        col1, col2, col3 = st.columns([2, 2, 1])
+        with col1:
+            filter_type = st.selectbox(
+                "Tipo de equipo",
+                ["Todos", "Tractores", "Implementos"]
+            )
+        with col2:
+            all_brands = cache.list_brands(active_only=True)
+            
+            brand_filter_options = ["Todas"] + [b.name for b in all_brands]
+            brand_filter = st.selectbox("Marca", brand_filter_options)
+        with col3:
+            show_inactive = st.checkbox("Inactivos", value=False)
+        
+        # Aplicar filtros
+        type_filter = None
+        if filter_type == "Tractores":
+            type_filter = "tractor"
+        elif filter_type == "Implementos":
+            type_filter = "implement"
+        
+        brand_id_filter = None
+        if brand_filter != "Todas":
+            brand_obj = next((b for b in all_brands if b.name == brand_filter), None)
+            if brand_obj:
+                brand_id_filter = brand_obj.id
+        
+        models = cache.list_models(
+            brand_id=brand_id_filter,
+            equipment_type=type_filter,
+            active_only=not show_inactive
+        )
+        models_data = [
+            {
+                "ID": m.id,
+                "Marca": m.brand_name,
+                "Modelo": m.name,
+                "Tipo": "🚜 Tractor" if m.brand_equipment_type == "tractor" else "🔧 Implemento",
+                "Precio Base": format_currency(m.base_price),
+                "Estado": "✅ Activo" if m.active else "❌ Inactivo"
+            }
+            for m in models
+        ]
+        
+        if models_data:
+            st.dataframe(models_data, width="stretch", hide_index=True)
+            st.caption(f"📊 Total: {len(models_data)} modelos")
+        else:
+            st.info("No se encontraron modelos.")
+    
+    with tab2:
+        st.markdown("### Crear/Editar Modelo")
+        
+        operation = st.radio("Operación", ["➕ Crear Nuevo", "✏️ Editar Existente"], horizontal=True)
+        
+        with st.form("model_form"):
+            model_to_edit = None
+            
+            if operation == "✏️ Editar Existente":
+                model_options_list = [
+                    {
+                        "label": f"[{m.id}] {m.brand_name} - {m.name}",
+                        "model": m,
+                        "brand_name": m.brand_name,
+                        "brand_type": m.brand_equipment_type
+                    }
+                    for m in cache.list_models(active_only=False)
+                ]
+                
+                if not model_options_list:
+                    st.warning("No hay modelos para editar.")
+                    st.form_submit_button("Guardar", disabled=True)
+                    st.stop()
+                
+                model_options = {item["label"]: item["model"] for item in model_options_list}
+                selected = st.selectbox("Seleccionar modelo", list(model_options.keys()))
+                model_to_edit = model_options[selected]
+            
+            # Obtener marcas activas
+            brands_list = [
+                {
+                    "label": f"{b.name} ({b.equipment_type})",
+                    "brand": b,
+                    "id": b.id,
+                    "name": b.name,
+                    "type": b.equipment_type
+                }
+                for b in cache.list_brands(active_only=True)
+            ]
+            
+            if not brands_list:
+                st.error("❌ No hay marcas activas. Crea una marca primero.")
+                st.form_submit_button("Guardar", disabled=True)
+                st.stop()
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                brand_options_dict = {item["label"]: item for item in brands_list}
+                
+                if model_to_edit:
+                    # Buscar la marca del modelo en la lista de marcas
+                    current_brand_label = None
+                    for label, brand_info in brand_options_dict.items():
+                        if brand_info["id"] == model_to_edit.brand_id:
+                            current_brand_label = label
+                            break
+                    
+                    default_index = list(brand_options_dict.keys()).index(current_brand_label) if current_brand_label else 0
+                else:
+                    default_index = 0
+                
+                selected_brand_label = st.selectbox(
+                    "Marca *",
+                    list(brand_options_dict.keys()),
+                    index=default_index
+                )
+                selected_brand = brand_options_dict[selected_brand_label]["brand"]
+                
+                name = st.text_input(
+                    "Nombre del modelo *",
+                    value=model_to_edit.name if model_to_edit else "",
+                    placeholder="Ej: MF 4283"
+                )
+                
+                base_price = st.number_input(
+                    "Precio base (₡)",
+                    min_value=0.0,
+                    value=float(model_to_edit.base_price) if model_to_edit else 0.0,
+                    step=1000.0,
+                    format="%.2f"
+                )
+            
+            with col2:
+                image_file = st.file_uploader(
+                    "Imagen del modelo",
+                    type=["jpg", "jpeg", "png", "webp"],
+                    help=f"Se reduce a {images.MASTER_MAX_PX}px y se eliminan los metadatos"
+                )
+                
+                if model_to_edit and model_to_edit.image_path and Path(model_to_edit.image_path).exists():
+                    with perf_section("image"):
+                        st.image(images.thumbnail_path(model_to_edit.image_path), width=160)
+                    if model_to_edit.image_width:
+                        st.caption(
+                            f"{model_to_edit.image_width}x{model_to_edit.image_height}px · "
+                            f"{model_to_edit.image_bytes / 1024:.0f} KB"
+                        )
+                
+                active = st.checkbox(
+                    "Modelo activo",
+                    value=model_to_edit.active if model_to_edit else True
+                )
+            
+            description = st.text_area(
+                "Especificaciones técnicas *",
+                value=model_to_edit.description if model_to_edit else "",
+                height=200,
+                max_chars=MAX_CHARS.get("product_description", 1000),
+                placeholder="Describe las características técnicas del modelo..."
+            )
+            if description:
+                show_char_counter("product_description", len(description))
+            
+            submitted = st.form_submit_button("💾 Guardar", width="stretch")
+            
+            if submitted:
+                if not name or not description:
+                    st.error("⚠️ El nombre y las especificaciones son obligatorios")
+                else:
+                    try:
+                        upload = None
+                        if image_file:
+                            with perf_section("image"):
+                                upload = images.ingest_image(image_file.getvalue())
+                        image_path = upload.path if upload else None
+                        
+                        with SessionLocal() as db:
+                            if operation == "➕ Crear Nuevo":
+                                model = crud.create_model(
+                                    db,
+                                    brand_id=selected_brand.id,
+                                    name=name,
+                                    description=description,
+                                    base_price=base_price,
+                                    image_path=image_path or "",
+                                    active=active
+                                )
+                                if upload:
+                                    images.track_model_image(model.id, upload)
+                                st.success("✅ Modelo creado!")
+                            else:
+                                # Si no hay nueva imagen, mantener la existente
+                                if not image_path:
+                                    image_path = model_to_edit.image_path
+                                
+                                crud.update_model(
+                                    db, model_to_edit.id,
+                                    brand_id=selected_brand.id,
+                                    name=name,
+                                    description=description,
+                                    base_price=base_price,
+                                    image_path=image_path,
+                                    active=active
+                                )
+                                if upload:
+                                    images.track_model_image(model_to_edit.id, upload)
+                                st.success("✅ Modelo actualizado!")
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+        
+        # Eliminar modelo
+        if operation == "✏️ Editar Existente":
+            st.markdown("---")
+            st.markdown("### 🗑️ Eliminar Modelo")
+            st.warning("⚠️ Esta acción es permanente.")
+            
+            if st.button("🗑️ Eliminar Modelo Seleccionado", type="secondary"):
+                try:
+                    with SessionLocal() as db:
+                        crud.delete_model(db, model_to_edit.id)
+                    st.success(f"✅ Modelo eliminado")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
+    
+    with tab3:
+        st.markdown("### Importar Lista de Precios")
+        st.info(
+            "💡 Sube un archivo CSV o Excel con columnas **Marca**, **Modelo** y opcionalmente "
+            "**Tipo** (tractor/implemento, obligatorio para marcas nuevas), **Descripción**, "
+            "**Precio** y **Activo**. Los modelos se comparan por marca y nombre."
+        )
+        
+        from app.catalog_import import read_price_list, sync_catalog
+        
+        price_list_file = st.file_uploader(
+            "Lista de precios",
+            type=["csv", "xlsx"],
+            key="price_list_file"
+        )
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            deactivate_missing = st.checkbox(
+                "Desactivar modelos que no aparecen en la lista",
+                value=False,
+                help="Solo afecta a las marcas incluidas en el archivo"
+            )
+        with col2:
+            dry_run = st.checkbox("Solo previsualizar cambios", value=True)
+        with col3:
+            decimal_separator = PRICE_DECIMAL_SEPARATORS[st.selectbox(
+                "Formato de precios",
+                list(PRICE_DECIMAL_SEPARATORS),
+                help="Sin indicarlo, un precio como 15.250 (¿miles o decimales?) se reporta como error"
+            )]
+        
+        if st.button("📥 Procesar Lista", width="stretch", disabled=price_list_file is None):
+            try:
+                with st.spinner("Procesando lista de precios..."):
+                    with SessionLocal() as db:
+                        report = sync_catalog(
+                            db,
+                            read_price_list(price_list_file),
+                            deactivate_missing=deactivate_missing,
+                            dry_run=dry_run,
+                            decimal_separator=decimal_separator
+                        )
+                
+                if dry_run:
+                    st.warning("👀 Previsualización: no se aplicaron cambios.")
+                else:
+                    st.success("✅ Catálogo sincronizado!")
+                
+                cols = st.columns(5)
+                cols[0].metric("Filas", report["rows"])
+                cols[1].metric("Marcas nuevas", len(report["brands_created"]))
+                cols[2].metric("Modelos nuevos", len(report["models_created"]))
+                cols[3].metric("Actualizados", len(report["models_updated"]))
+                cols[4].metric("Desactivados", len(report["models_deactivated"]))
+                
+                if report["models_updated"]:
+                    with st.expander(f"✏️ Modelos actualizados ({len(report['models_updated'])})"):
+                        st.dataframe(
+                            [
+                                {
+                                    "Marca": change["brand"],
+                                    "Modelo": change["model"],
+                                    "Cambios": ", ".join(
+                                        f"{field}: {old} → {new}"
+                                        for field, (old, new) in change["changes"].items()
+                                    )
+                                }
+                                for change in report["models_updated"]
+                            ],
+                            width="stretch",
+                            hide_index=True
+                        )
+                if report["models_created"]:
+                    with st.expander(f"➕ Modelos nuevos ({len(report['models_created'])})"):
+                        st.dataframe(report["models_created"], width="stretch", hide_index=True)
+                if report["models_deactivated"]:
+                    with st.expander(f"⛔ Modelos desactivados ({len(report['models_deactivated'])})"):
+                        st.dataframe(report["models_deactivated"], width="stretch", hide_index=True)
+                if report["errors"]:
+                    with st.expander(f"❌ Filas con errores ({len(report['errors'])})", expanded=True):
+                        st.dataframe(report["errors"], width="stretch", hide_index=True)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ Error: {e}")
@@ -0,0 +1,67 @@
+"""
+Constantes y utilidades compartidas por las páginas de la app de Streamlit
+"""
+from pathlib import Path
+
+import streamlit as st
+
+from app.config_defaults import MAX_CHARS
+from app.db import OUTPUTS_DIR, UPLOAD_DIR
+
+
+# Configuración de directorios (subidas y PDFs: los de la base, ver db.storage_dirs)
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+MEDIA_DIR = BASE_DIR / "media"
+LOGOS_DIR = MEDIA_DIR / "logos"
+
+
+# ==================== UTILIDADES ====================
+
+def format_currency(amount: float, currency: str = "CRC") -> str:
+    """Formatea montos con símbolo de moneda"""
+    symbol = "₡" if currency == "CRC" else "$"
+    return f"{symbol}{amount:,.2f}"
+
+
+def validate_email(email: str) -> bool:
+    """Validación básica de email"""
+    if not email:
+        return True
+    return "@" in email and "." in email.split("@")[1]
+
+
+def show_char_counter(key: str, current_length: int):
+    """Muestra contador de caracteres"""
+    if key not in MAX_CHARS:
+        return
+    
+    max_length = MAX_CHARS[key]
+    percentage = (current_length / max_length) * 100
+    
+    css_class = "char-counter"
+    if percentage > 90:
+        css_class += " error"
+    elif percentage > 75:
+        css_class += " warning"
+    
+    st.markdown(
+        f'<div class="{css_class}">{current_length}/{max_length} caracteres</div>',
+        unsafe_allow_html=True
+    )
+
+
+def show_duplicate_modal(original_number: str, new_number: str):
+    """Muestra modal de confirmación de duplicación con botón de acción"""
+    modal_html = f"""
+    <div class="modal-dialog">
+        <div class="modal-success">
+            <h3 style="color: #4CAF50; margin: 0 0 10px 0;">✅ Proforma Duplicada</h3>
+            <p style="margin: 5px 0;">Se ha creado una copia de la proforma <strong>{original_number}</strong></p>
+            <p style="margin: 5px 0;">Nueva proforma generada: <strong>{new_number}</strong></p>
+            <p style="margin: 10px 0 0 0; font-size: 0.9rem; color: #666;">
+                Usa el botón de abajo para ir a la nueva proforma
+            </p>
+        </div>
+    </div>
+    """
+    st.markdown(modal_html, unsafe_allow_html=True)
@@ -0,0 +1,218 @@
+"""
+Mantenimiento de clientes
+"""
+import streamlit as st
+
+from app import crud, cache
+from app.db import SessionLocal
+from app.config_defaults import MAX_CHARS
+from app.views.common import validate_email, show_char_counter
+
+
+# ==================== MANTENIMIENTO: CLIENTES ====================
+
+def render():
+    st.markdown('<p class="main-header">👥 Gestión de Clientes</p>', unsafe_allow_html=True)
+    
+    tab1, tab2, tab3 = st.tabs(["📋 Lista de Clientes", "➕ Crear/Editar", "📥 Importar"])
+    
+    with tab1:
+        st.markdown("### Lista de Clientes")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            search = st.text_input("🔍 Buscar", placeholder="Buscar por nombre, empresa o email...")
+        with col2:
+            show_inactive = st.checkbox("Mostrar inactivos", value=False)
+        
+        customers = cache.list_customers(active_only=not show_inactive, search=search or None)
+        
+        if customers:
+            st.dataframe(
+                [
+                    {
+                        "ID": c.id,
+                        "Nombre": c.name,
+                        "Empresa": c.company or "-",
+                        "Email": c.email or "-",
+                        "Teléfono": c.phone or "-",
+                        "Estado": "✅ Activo" if c.active else "❌ Inactivo"
+                    }
+                    for c in customers
+                ],
+                width="stretch",
+                hide_index=True
+            )
+            st.caption(f"📊 Total: {len(customers)} clientes")
+        else:
+            st.info("No se encontraron clientes.")
+    
+    with tab2:
+        st.markdown("### Crear/Editar Cliente")
+        
+        operation = st.radio("Operación", ["➕ Crear Nuevo", "✏️ Editar Existente"], horizontal=True)
+        
+        with st.form("customer_form"):
+            customer_to_edit = None
+            
+            if operation == "✏️ Editar Existente":
+                all_customers = cache.list_customers(active_only=False)
+                
+                if not all_customers:
+                    st.warning("No hay clientes para editar.")
+                    st.form_submit_button("Guardar", disabled=True)
+                    st.stop()
+                
+                customer_options = {f"[{c.id}] {c.name}": c for c in all_customers}
+                selected = st.selectbox("Seleccionar cliente", list(customer_options.keys()))
+                customer_to_edit = customer_options[selected]
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name = st.text_input(
+                    "Nombre *",
+                    value=customer_to_edit.name if customer_to_edit else "",
+                    max_chars=MAX_CHARS.get("customer_name", 80)
+                )
+                if name:
+                    show_char_counter("customer_name", len(name))
+                
+                company = st.text_input(
+                    "Empresa",
+                    value=customer_to_edit.company if customer_to_edit else "",
+                    max_chars=MAX_CHARS.get("customer_company", 80)
+                )
+                if company:
+                    show_char_counter("customer_company", len(company))
+                
+                email = st.text_input(
+                    "Email",
+                    value=customer_to_edit.email if customer_to_edit else ""
+                )
+            
+            with col2:
+                phone = st.text_input(
+                    "Teléfono",
+                    value=customer_to_edit.phone if customer_to_edit else ""
+                )
+                
+                active = st.checkbox(
+                    "Cliente activo",
+                    value=customer_to_edit.active if customer_to_edit else True
+                )
+            
+            address = st.text_area(
+                "Dirección",
+                value=customer_to_edit.address if customer_to_edit else "",
+                height=100
+            )
+            
+            submitted = st.form_submit_button("💾 Guardar", width="stretch")
+            
+            if submitted:
+                if not name:
+                    st.error("⚠️ El nombre es obligatorio")
+                elif email and not validate_email(email):
+                    st.error("⚠️ Email no válido")
+                else:
+                    try:
+                        with SessionLocal() as db:
+                            if operation == "➕ Crear Nuevo":
+                                crud.create_customer(
+                                    db, name=name, company=company,
+                                    email=email, phone=phone,
+                                    address=address, active=active
+                                )
+                                st.success("✅ Cliente creado exitosamente!")
+                            else:
+                                crud.update_customer(
+                                    db, customer_to_edit.id,
+                                    name=name, company=company,
+                                    email=email, phone=phone,
+                                    address=address, active=active
+                                )
+                                st.success("✅ Cliente actualizado!")
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+        
+        # Eliminar cliente
+        if operation == "✏️ Editar Existente":
+            st.markdown("---")
+            st.markdown("### 🗑️ Eliminar Cliente")
+            st.warning("⚠️ Esta acción es permanente.")
+            
+            if st.button("🗑️ Eliminar Cliente Seleccionado", type="secondary"):
+                try:
+                    with SessionLocal() as db:
+                        crud.delete_customer(db, customer_to_edit.id)
+                    st.success(f"✅ Cliente eliminado")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
+    
+    with tab3:
+        st.markdown("### Importar Clientes")
+        st.info(
+            "💡 Sube un archivo CSV o Excel con la columna **Nombre** y opcionalmente "
+            "**Empresa**, **Email**, **Teléfono** y **Dirección**. Los clientes repetidos "
+            "(mismo email, mismo teléfono o nombre muy parecido) se fusionan completando "
+            "los datos que falten, sin sobrescribir los existentes."
+        )
+        
+        from app.customer_import import read_customer_file, import_customers
+        
+        customer_file = st.file_uploader(
+            "Archivo de clientes",
+            type=["csv", "xlsx"],
+            key="customer_import_file"
+        )
+        customers_dry_run = st.checkbox(
+            "Solo previsualizar cambios", value=True, key="customer_import_dry_run"
+        )
+        
+        if st.button("📥 Importar Clientes", width="stretch", disabled=customer_file is None):
+            try:
+                with st.spinner("Importando clientes..."):
+                    with SessionLocal() as db:
+                        report = import_customers(
+                            db,
+                            read_customer_file(customer_file),
+                            dry_run=customers_dry_run
+                        )
+                
+                if customers_dry_run:
+                    st.warning("👀 Previsualización: no se aplicaron cambios.")
+                else:
+                    st.success("✅ Clientes importados!")
+                
+                cols = st.columns(4)
+                cols[0].metric("Filas", report["rows"])
+                cols[1].metric("Nuevos", report["new"])
+                cols[2].metric("Fusionados", report["merged"])
+                cols[3].metric("Duplicados en archivo", report["merged_in_file"])
+                
+                if report["matches"]:
+                    with st.expander(f"🔗 Duplicados detectados ({report['merged'] + report['merged_in_file']})"):
+                        st.dataframe(
+                            [
+                                {
+                                    "Fila": match["row"],
+                                    "Nombre en archivo": match["name"],
+                                    "Cliente": match["matched"],
+                                    "ID": match["customer_id"],
+                                    "Motivo": match["reason"],
+                                }
+                                for match in report["matches"]
+                            ],
+                            width="stretch",
+                            hide_index=True
+                        )
+                if report["errors"]:
+                    with st.expander(f"❌ Filas con errores ({len(report['errors'])})", expanded=True):
+                        st.dataframe(report["errors"], width="stretch", hide_index=True)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ Error: {e}")
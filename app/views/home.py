@@ -0,0 +1,46 @@
+"""
+Página de inicio: estadísticas y accesos rápidos
+"""
+import streamlit as st
+
+from app import cache
+
+
+# ==================== PÁGINA PRINCIPAL ====================
+
+def render():
+    st.markdown('<p class="main-header">🚜 AgriQuote - Sistema de Cotizaciones</p>', unsafe_allow_html=True)
+    
+    st.markdown("### 📊 Estadísticas")
+    
+    stats = cache.get_stats()
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.info("**👥 Clientes**")
+        st.metric("Total registrados", stats["total_customers"])
+        st.metric("Activos", stats["active_customers"])
+    
+    with col2:
+        st.success("**📦 Catálogo**")
+        st.metric("Marcas", stats["total_brands"])
+        st.metric("Modelos", stats["total_models"])
+    
+    with col3:
+        st.warning("**📋 Proformas**")
+        st.metric("Total generadas", stats["total_proformas"])
+    
+    st.markdown("---")
+    st.markdown("### 🚀 Inicio Rápido")
+    
+    st.markdown("""
+    **Bienvenido al sistema AgriQuote.** Aquí puedes:
+    
+    1. **Crear cotizaciones:** Genera proformas profesionales para tractores e implementos
+    2. **Gestionar catálogo:** Administra marcas, modelos y precios
+    3. **Controlar clientes:** Mantén actualizada tu base de datos de clientes
+    4. **Ver historial:** Revisa todas las cotizaciones en la sección "Ver Proformas"
+    
+    👉 **Para empezar,** selecciona "Nueva Proforma" en el menú lateral.
+    """)
@@ -0,0 +1,565 @@
+"""
+Nueva Proforma: encabezado, ítems y generación del PDF
+"""
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import streamlit as st
+
+from app import crud, cache, quotes
+from app.db import SessionLocal
+from app.config_defaults import MAX_CHARS
+from app.pdf import build_proforma_pdf
+from app.perf import perf_section
+from app.views.common import format_currency
+
+
+# ==================== NUEVA PROFORMA: FRAGMENTOS ====================
+# Cada bloque es un st.fragment: sus widgets recargan solo ese bloque y no la
+# página completa (sin re-consultar clientes, asesores ni catálogo). Al pulsar
+# "Generar" se ejecuta la página completa y cada fragmento retorna sus valores.
+
+@lru_cache(maxsize=4096)
+def line_amounts(qty: int, unit_price: float, discount_percent: float, tax_rate: float) -> tuple:
+    """Montos de una línea: solo se recalcula si cambian sus valores"""
+    line_subtotal = qty * unit_price
+    discount_amount = line_subtotal * (discount_percent / 100)
+    line_subtotal_after_discount = line_subtotal - discount_amount
+    line_tax = round(line_subtotal_after_discount * (tax_rate / 100), 2)
+    line_total = line_subtotal_after_discount + line_tax
+    return line_subtotal, discount_amount, line_subtotal_after_discount, line_tax, line_total
+
+
+def models_for_template(template: str) -> List[Dict]:
+    """Opciones del selector de modelos para un tipo de cotización"""
+    return [
+        {
+            "id": m.id,
+            "label": f"[{m.id}] {m.brand_name} - {m.name}",
+            "brand_name": m.brand_name,
+            "model_name": m.name,
+            "base_price": m.base_price,
+            "description": m.description,
+            "image_path": m.image_path,
+            "brand_id": m.brand_id
+        }
+        for m in cache.list_models(active_only=True, equipment_type=template)
+    ]
+
+
+def duplicate_prefill() -> Optional[Dict]:
+    """Datos de la proforma duplicada (la sesión guarda solo su id)"""
+    proforma_id = st.session_state.get("duplicate_prefill_id")
+    return cache.get_proforma_prefill(proforma_id) if proforma_id else None
+
+
+# Los fragmentos reciben solo valores pequeños: Streamlit guarda sus argumentos
+# en la sesión para las recargas parciales, así que clientes, asesores y
+# catálogo se leen de la caché compartida dentro de cada fragmento.
+
+@st.fragment
+def proforma_header_section() -> Dict:
+    """Número, fecha, cliente y asesor de la proforma"""
+    duplicate_data = duplicate_prefill()
+    customers = cache.list_customers(active_only=True)
+    advisors = cache.list_advisors(active_only=True)
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        proforma_number = st.text_input(
+            "N° de Proforma",
+            value=duplicate_data['number'] if duplicate_data else "",
+            placeholder="Automático",
+            help="Deja vacío para asignar el siguiente número de la secuencia"
+        )
+    
+    with col2:
+        proforma_date = st.date_input(
+            "Fecha *",
+            value=datetime.now()
+        )
+    
+    # Cliente
+    st.markdown("### 👤 Cliente")
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        customer_options = {f"[{c.id}] {c.name} - {c.company or 'Sin empresa'}": c for c in customers}
+        selected_customer_label = st.selectbox(
+            "Seleccionar cliente *",
+            list(customer_options.keys()),
+            index=0 if not duplicate_data else next(
+                (i for i, key in enumerate(customer_options.keys()) 
+                 if customer_options[key].id == duplicate_data.get('customer_id')), 0
+            )
+        )
+        selected_customer = customer_options[selected_customer_label]
+    
+    with col2:
+        customer_attention = st.text_input(
+            "A la atención de",
+            value="",
+            max_chars=MAX_CHARS.get("customer_attention", 80)
+        )
+    
+    # Mostrar datos del cliente
+    with st.expander("📋 Datos del cliente seleccionado", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.text(f"Nombre: {selected_customer.name}")
+            st.text(f"Empresa: {selected_customer.company or 'N/A'}")
+            st.text(f"Email: {selected_customer.email or 'N/A'}")
+        with col2:
+            st.text(f"Teléfono: {selected_customer.phone or 'N/A'}")
+            st.text(f"Dirección: {selected_customer.address or 'N/A'}")
+    
+    # Asesor
+    st.markdown("### 👔 Asesor")
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        if advisors:
+            advisor_options = {f"[{a.id}] {a.name}": a for a in advisors}
+            advisor_options["Sin asesor"] = None
+            selected_advisor_label = st.selectbox(
+                "Seleccionar asesor",
+                list(advisor_options.keys())
+            )
+            selected_advisor = advisor_options[selected_advisor_label]
+        else:
+            st.info("No hay asesores registrados. Se generará sin asesor.")
+            selected_advisor = None
+    
+    with col2:
+        validity_days = st.number_input(
+            "Vigencia (días)",
+            min_value=1,
+            max_value=365,
+            value=15,
+            step=1
+        )
+    
+    return {
+        "number": proforma_number,
+        "date": proforma_date,
+        "customer": selected_customer,
+        "customer_attention": customer_attention,
+        "advisor": selected_advisor,
+        "validity_days": validity_days,
+    }
+
+
+@st.fragment
+def proforma_items_editor(template: str) -> Dict:
+    """Selección de modelos, configuración por línea y totales"""
+    duplicate_data = duplicate_prefill()
+    models_list = models_for_template(template)
+    
+    # Pre-cargar modelos si es duplicación
+    selected_models_labels = []
+    if duplicate_data and duplicate_data.get('items'):
+        for item in duplicate_data['items']:
+            # Buscar el label exacto en models_list
+            matching_label = next(
+                (m["label"] for m in models_list 
+                 if item['brand_name'] in m["label"] and item['model_name'] in m["label"]), 
+                None
+            )
+            if matching_label and matching_label not in selected_models_labels:
+                selected_models_labels.append(matching_label)
+    
+    # Selector de modelos
+    selected_models_labels = st.multiselect(
+        "Selecciona uno o más modelos",
+        [m["label"] for m in models_list],
+        default=selected_models_labels,
+        help="Cada modelo seleccionado ocupará una página en el PDF",
+        key=f"proforma_models_{template}"
+    )
+    
+    if not selected_models_labels:
+        st.warning("⚠️ Selecciona al menos un modelo para continuar.")
+        return {"items": [], "totals": {}}
+    
+    # Configuración de items
+    items_data = []
+    models_by_label = {m["label"]: m for m in models_list}
+    
+    st.markdown("#### Configuración de Productos")
+    
+    for model_label in selected_models_labels:
+        model_info = models_by_label[model_label]
+        
+        # Buscar datos previos si es duplicación
+        prev_item = None
+        if duplicate_data and duplicate_data.get('items'):
+            prev_item = next(
+                (item for item in duplicate_data['items'] 
+                 if item['brand_name'] == model_info['brand_name'] and 
+                    item['model_name'] == model_info['model_name']), 
+                None
+            )
+        
+        with st.expander(f"🔧 {model_info['brand_name']} - {model_info['model_name']}", expanded=True):
+            cols = st.columns([1, 1, 1, 1.2, 0.8, 0.8, 2])
+            
+            with cols[0]:
+                qty = st.number_input(
+                    "Cantidad",
+                    min_value=1,
+                    value=prev_item['qty'] if prev_item else 1,
+                    step=1,
+                    key=f"qty_{model_info['id']}"
+                )
+            
+            with cols[1]:
+                year = None
+                if template == "tractor":
+                    year = st.number_input(
+                        "Año",
+                        min_value=1900,
+                        max_value=2100,
+                        value=prev_item['year'] if prev_item and prev_item['year'] else datetime.now().year,
+                        step=1,
+                        key=f"year_{model_info['id']}"
+                    )
+            
+            with cols[2]:
+                currency = st.selectbox(
+                    "Moneda",
+                    ["CRC", "USD"],
+                    index=0 if not prev_item or prev_item['currency'] == 'CRC' else 1,
+                    key=f"currency_{model_info['id']}"
+                )
+            
+            with cols[3]:
+                unit_price = st.number_input(
+                    "Precio Unit.",
+                    min_value=0.0,
+                    value=float(prev_item['unit_price']) if prev_item else float(model_info['base_price']),
+                    step=100.0,
+                    format="%.2f",
+                    key=f"price_{model_info['id']}"
+                )
+            
+            with cols[4]:
+                discount_percent = st.number_input(
+                    "Desc %",
+                    min_value=0.0,
+                    max_value=100.0,
+                    value=float(prev_item['discount_percent']) if prev_item else 0.0,
+                    step=0.5,
+                    format="%.2f",
+                    key=f"discount_{model_info['id']}"
+                )
+            
+            with cols[5]:
+                # IVA EDITABLE
+                tax_rate = st.number_input(
+                    "IVA %",
+                    min_value=0.0,
+                    max_value=100.0,
+                    value=float(prev_item['tax_rate']) if prev_item else 13.0,
+                    step=0.5,
+                    format="%.2f",
+                    key=f"tax_{model_info['id']}",
+                    help="Ajustable para exoneraciones"
+                )
+            
+            # Calcular totales con IVA personalizado
+            (line_subtotal, discount_amount, line_subtotal_after_discount,
+             line_tax, line_total) = line_amounts(qty, unit_price, discount_percent, tax_rate)
+            
+            # Mostrar totales CON TAMAÑO DE FUENTE REDUCIDO
+            st.markdown('<div class="metric-container">', unsafe_allow_html=True)
+            col_totals = st.columns(5)
+            col_totals[0].metric("Subtotal", format_currency(line_subtotal, currency))
+            if discount_percent > 0:
+                col_totals[1].metric("Descuento", format_currency(discount_amount, currency))
+            col_totals[2].metric("Subtotal Neto", format_currency(line_subtotal_after_discount, currency))
+            col_totals[3].metric(f"IVA {tax_rate}%", format_currency(line_tax, currency))
+            col_totals[4].metric("Total Línea", format_currency(line_total, currency))
+            st.markdown('</div>', unsafe_allow_html=True)
+            
+            items_data.append({
+                "model_id": model_info['id'],
+                "brand_name": model_info['brand_name'],
+                "model_name": model_info['model_name'],
+                "year": year,
+                "description": prev_item['description'] if prev_item else model_info['description'],
+                "image_path": model_info['image_path'],
+                "qty": qty,
+                "unit_price": unit_price,
+                "discount_percent": discount_percent,
+                "discount_amount": discount_amount,
+                "line_subtotal": line_subtotal,
+                "line_total": line_total,
+                "currency": currency,
+                "tax_rate": tax_rate  # IVA personalizado
+            })
+    
+    # Totales generales CON TAMAÑO REDUCIDO
+    st.markdown("---")
+    st.markdown("### 💰 Totales")
+    
+    # Mismo cálculo que el PDF generado desde la base (app/quotes.py)
+    totals = quotes.summarize_totals(items_data)
+    
+    st.markdown('<div class="metric-container">', unsafe_allow_html=True)
+    
+    if "currency" in totals:
+        # Una sola moneda
+        cur = totals["currency"]
+        tax_label = "IVA (mixto)" if totals["tax_rate"] == "mixto" else f"IVA {totals['tax_rate']}%"
+        
+        cols = st.columns(5)
+        cols[0].metric("Subtotal", format_currency(totals["subtotal"], cur))
+        if totals["discount"] > 0:
+            cols[1].metric("Descuento", format_currency(totals["discount"], cur))
+        cols[2].metric("Subtotal Neto", format_currency(totals["subtotal_after_discount"], cur))
+        cols[3].metric(tax_label, format_currency(totals["tax"], cur))
+        cols[4].metric("**TOTAL**", format_currency(totals["total"], cur))
+    else:
+        # Múltiples monedas
+        st.warning("⚠️ Productos en diferentes monedas. Los totales se mostrarán por separado.")
+        
+        for cur, cur_totals in totals.items():
+            st.markdown(f"#### {cur}")
+            tax_label = "IVA (mixto)" if cur_totals["tax_rate"] == "mixto" else f"IVA {cur_totals['tax_rate']}%"
+            
+            cols = st.columns(5)
+            cols[0].metric("Subtotal", format_currency(cur_totals["subtotal"], cur))
+            if cur_totals["discount"] > 0:
+                cols[1].metric("Descuento", format_currency(cur_totals["discount"], cur))
+            cols[2].metric("Sub. Neto", format_currency(cur_totals["subtotal_after_discount"], cur))
+            cols[3].metric(tax_label, format_currency(cur_totals["tax"], cur))
+            cols[4].metric("Total", format_currency(cur_totals["total"], cur))
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    return {"items": items_data, "totals": totals}
+
+
+@st.fragment
+def proforma_customization_section(template: str) -> Dict:
+    """Términos y nota fiscal personalizados"""
+    with st.expander("Personalizar términos y condiciones"):
+        default_terms = cache.get_config(f"terms_{template}", "")
+        
+        custom_terms = st.text_area(
+            "Términos personalizados",
+            value="",
+            height=150,
+            placeholder="Deja vacío para usar los términos por defecto",
+            max_chars=MAX_CHARS.get(f"terms_{template}", 800)
+        )
+        
+        st.info(f"💡 Términos por defecto: {len(default_terms)} caracteres")
+    
+    with st.expander("Personalizar nota fiscal"):
+        default_fiscal = cache.get_config("fiscal_note", "")
+        
+        custom_fiscal = st.text_area(
+            "Nota fiscal personalizada",
+            value="",
+            height=100,
+            placeholder="Deja vacío para usar la nota por defecto",
+            max_chars=MAX_CHARS.get("fiscal_note", 400)
+        )
+        
+        st.info(f"💡 Nota por defecto: {len(default_fiscal)} caracteres")
+    
+    return {"custom_terms": custom_terms, "custom_fiscal": custom_fiscal}
+
+
+# ==================== NUEVA PROFORMA (CON MEJORAS EN MÉTRICAS) ====================
+
+def render():
+    st.markdown('<p class="main-header">📄 Nueva Proforma</p>', unsafe_allow_html=True)
+    
+    # Verificar si hay datos de duplicación
+    duplicate_data = duplicate_prefill()
+    
+    # Verificar datos necesarios
+    if not cache.list_customers(active_only=True):
+        st.error("❌ No hay clientes registrados.")
+        st.info("💡 Ve a Mantenimientos → Clientes para crear uno.")
+        st.stop()
+    
+    # Inicializar session_state para el PDF generado
+    if 'pdf_generated' not in st.session_state:
+        st.session_state.pdf_generated = False
+        st.session_state.pdf_path = None
+        st.session_state.pdf_info = {}
+    
+    # Header de la proforma
+    st.markdown("### 📋 Información General")
+    
+    # El tipo cambia el catálogo disponible: recarga la página completa
+    template_option = st.selectbox(
+        "Tipo de cotización *",
+        ["🚜 Tractores", "🔧 Implementos"],
+        index=0 if not duplicate_data or duplicate_data['template'] == 'tractor' else 1
+    )
+    template = "tractor" if template_option == "🚜 Tractores" else "implement"
+    
+    header = proforma_header_section()
+    
+    # Selección de modelos
+    st.markdown("### 📦 Productos")
+    
+    if not cache.list_models(active_only=True, equipment_type=template):
+        st.error(f"❌ No hay modelos de tipo {template_option} registrados.")
+        st.info("💡 Ve a Mantenimientos → Modelos para crear uno.")
+        st.button("Generar Proforma", disabled=True)
+        st.stop()
+    
+    editor = proforma_items_editor(template)
+    items_data = editor["items"]
+    totals = editor["totals"]
+    
+    # Personalización (opcional)
+    st.markdown("---")
+    st.markdown("### 📝 Personalización (Opcional)")
+    
+    customization = proforma_customization_section(template)
+    custom_terms = customization["custom_terms"]
+    custom_fiscal = customization["custom_fiscal"]
+    
+    proforma_number = header["number"]
+    proforma_date = header["date"]
+    selected_customer = header["customer"]
+    customer_attention = header["customer_attention"]
+    selected_advisor = header["advisor"]
+    validity_days = header["validity_days"]
+    
+    # Botón de generación
+    st.markdown("---")
+    submitted = st.button(
+        "📄 Generar Proforma en PDF",
+        width="stretch",
+        type="primary"
+    )
+    
+    if submitted:
+        # Validaciones
+        errors = []
+        
+        if not items_data:
+            errors.append("Debes seleccionar al menos un modelo")
+        
+        if errors:
+            for error in errors:
+                st.error(f"❌ {error}")
+        else:
+            try:
+                # Encabezado del PDF con logos configurables (igual que app/quotes.py)
+                header_data = quotes.header_data(
+                    cache.get_all_config(),
+                    template,
+                    proforma_number,
+                    proforma_date,
+                    selected_customer,
+                    selected_advisor,
+                    customer_attention=customer_attention,
+                    validity_days=validity_days,
+                    custom_terms=custom_terms,
+                    custom_fiscal_note=custom_fiscal
+                )
+                
+                # Guardar en base de datos: número, encabezado, items y ruta del PDF
+                # en una sola transacción
+                with SessionLocal() as db:
+                    created = crud.create_proforma(
+                        db,
+                        number=proforma_number,
+                        customer_id=selected_customer.id,
+                        template=template,
+                        items_data=items_data,
+                        advisor_id=selected_advisor.id if selected_advisor else None,
+                        customer_attention=customer_attention,
+                        validity_days=validity_days,
+                        date=datetime.combine(proforma_date, datetime.min.time()),
+                        custom_terms=custom_terms.strip(),
+                        custom_fiscal_note=custom_fiscal.strip(),
+                        pdf_path=quotes.PDF_PATH_TEMPLATE
+                    )
+                proforma_number = created["number"]
+                header_data["number"] = proforma_number
+                
+                # Generar PDF
+                output_path = Path(created["pdf_path"])
+                with perf_section("pdf"):
+                    build_proforma_pdf(
+                        output_path,
+                        header_data,
+                        items_data,
+                        totals,
+                        template=template
+                    )
+                
+                # Limpiar datos de duplicación si existen
+                st.session_state.pop('duplicate_prefill_id', None)
+                
+                # Guardar información en session_state
+                st.session_state.pdf_generated = True
+                st.session_state.pdf_path = output_path
+                st.session_state.pdf_info = {
+                    "number": proforma_number,
+                    "customer": selected_customer.name,
+                    "template": template_option,
+                    "date": proforma_date.strftime('%d/%m/%Y'),
+                    "products": len(items_data),
+                    "pages": len(items_data)
+                }
+                
+                st.success("✅ ¡Proforma generada exitosamente!")
+                st.balloons()
+                st.rerun()
+            
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                st.error(f"❌ Error al generar la proforma: {e}")
+                st.exception(e)
+    
+
+    # Mostrar botón de descarga si hay PDF generado
+    if st.session_state.get('pdf_generated', False) and st.session_state.get('pdf_path'):
+        st.markdown("---")
+        st.markdown("### ✅ Proforma Generada")
+        
+        # Mostrar resumen
+        with st.expander("📋 Resumen de la proforma", expanded=True):
+            info = st.session_state.pdf_info
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown(f"**N° Proforma:** {info['number']}")
+                st.markdown(f"**Cliente:** {info['customer']}")
+                st.markdown(f"**Tipo:** {info['template']}")
+            with col2:
+                st.markdown(f"**Fecha:** {info['date']}")
+                st.markdown(f"**Productos:** {info['products']}")
+                st.markdown(f"**Páginas PDF:** {info['pages']}")
+        
+        # Botón de descarga
+        with perf_section("pdf"), open(st.session_state.pdf_path, "rb") as pdf_file:
+            st.download_button(
+                label="📥 Descargar PDF",
+                data=pdf_file.read(),
+                file_name=st.session_state.pdf_path.name,
+                mime="application/pdf",
+                width="stretch",
+                type="primary"
+            )
+        
+        # Botón para crear otra proforma
+        if st.button("🆕 Crear Nueva Proforma", width="stretch"):
+            st.session_state.pdf_generated = False
+            st.session_state.pdf_path = None
+            st.session_state.pdf_info = {}
+            st.rerun()
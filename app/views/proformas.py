@@ -0,0 +1,518 @@
+"""
+Ver Proformas: búsqueda, detalle, duplicado y eliminación
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import tempfile
+
+import streamlit as st
+
+from app import crud, cache, export, media_gc, quotes
+from app.db import SessionLocal
+from app.perf import perf_section
+from app.views.common import format_currency, show_duplicate_modal
+
+
+# Etiqueta -> (orden de crud.PROFORMA_SORTS, descendente)
+SORT_OPTIONS = {
+    "📅 Fecha (más recientes)": ("date", True),
+    "📅 Fecha (más antiguas)": ("date", False),
+    "💰 Total (mayor a menor)": ("total", True),
+    "💰 Total (menor a mayor)": ("total", False),
+    "👤 Cliente (A-Z)": ("customer", False),
+    "👤 Cliente (Z-A)": ("customer", True),
+}
+PAGE_SIZES = [25, 50, 100]
+
+
+def reset_page():
+    """Al cambiar orden o tamaño de página se vuelve a la primera"""
+    st.session_state.search_page = 1
+
+
+def go_to_page(page: int):
+    st.session_state.search_page = page
+
+
+# Etiqueta -> formato / nivel de app/export.py
+EXPORT_FORMATS = {"CSV": "csv", "Excel (XLSX)": "xlsx"}
+EXPORT_LEVELS = {"Una fila por item": "items", "Una fila por proforma": "proformas"}
+# Streamlit guarda en memoria el archivo completo de cada descarga: más PDFs
+# que esto se descargan con `quotes zip`/`quotes merge` o la API
+MAX_ZIP_PDFS = 200
+# Lo mismo con el CSV/XLSX: búsquedas más grandes se exportan con
+# `quotes export` o GET /proformas/export, que escriben por bloques
+MAX_EXPORT_PROFORMAS = 5000
+
+
+def export_file(fmt: str, level: str, filters: dict) -> bytes:
+    """
+    Archivo de la exportación. Se genera al pulsar el botón de descarga (en
+    otro hilo, con su propia sesión); las filas se leen por bloques.
+    """
+    with SessionLocal() as db:
+        return b"".join(export.iter_export(db, fmt, level=level, **filters))
+
+
+def pdf_zip_file(filters: dict) -> bytes:
+    """ZIP con los PDFs de la búsqueda; se genera al pulsar el botón de descarga"""
+    with SessionLocal() as db:
+        return b"".join(export.iter_pdf_zip(db, **filters))
+
+
+def merged_pdf_file(filters: dict) -> bytes:
+    """Las proformas de la búsqueda en un solo PDF (de la más antigua a la más reciente)"""
+    with SessionLocal() as db:
+        ids = [proforma_id for proforma_id, _, _ in export.iter_pdf_refs(db, **filters)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = quotes.render_merged(db, ids[::-1], Path(tmp) / "merged.pdf")
+            return path.read_bytes()
+
+
+def render_export(filters: dict, total: int):
+    """Descarga de todos los resultados de la búsqueda (no solo la página visible)"""
+    with st.expander("📤 Exportar resultados"):
+        if total <= MAX_EXPORT_PROFORMAS:
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col1:
+                fmt = EXPORT_FORMATS[st.radio("Formato", list(EXPORT_FORMATS), horizontal=True, key="export_format")]
+            with col2:
+                level = EXPORT_LEVELS[st.radio("Detalle", list(EXPORT_LEVELS), horizontal=True, key="export_level")]
+            with col3:
+                st.download_button(
+                    "📥 Descargar",
+                    data=lambda: export_file(fmt, level, filters),
+                    file_name=export.export_filename(fmt, level),
+                    mime=export.FORMATS[fmt],
+                    on_click="ignore",
+                    key="export_download",
+                    width='stretch'
+                )
+        else:
+            st.caption(
+                f"La exportación CSV/Excel está disponible hasta {MAX_EXPORT_PROFORMAS} proformas: afina "
+                "la búsqueda o usa `python -m app.cli quotes export` / `GET /proformas/export` de la API."
+            )
+
+        st.markdown("---")
+        if total <= MAX_ZIP_PDFS:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    f"🗜️ Descargar los PDFs en un ZIP ({total})",
+                    data=lambda: pdf_zip_file(filters),
+                    file_name=export.export_filename("zip", "pdf"),
+                    mime="application/zip",
+                    on_click="ignore",
+                    key="export_pdf_zip",
+                    width='stretch'
+                )
+            with col2:
+                st.download_button(
+                    f"📑 Un solo PDF con marcadores ({total})",
+                    data=lambda: merged_pdf_file(filters),
+                    file_name=export.export_filename("pdf", "combinadas"),
+                    mime="application/pdf",
+                    on_click="ignore",
+                    key="export_pdf_merged",
+                    width='stretch'
+                )
+        else:
+            st.caption(
+                f"Los PDFs (ZIP o combinados) están disponibles hasta {MAX_ZIP_PDFS} proformas: afina "
+                "la búsqueda o usa `python -m app.cli quotes zip` / `quotes merge`."
+            )
+
+
+# ==================== VER PROFORMAS (GRILLA PAGINADA EN LA BASE) ====================
+
+def render():
+    st.markdown('<p class="main-header">📊 Historial de Proformas</p>', unsafe_allow_html=True)
+    
+    # Session state: solo filtros y número de página; las filas vienen de
+    # cache.page_proformas (compartida entre sesiones)
+    if 'search_performed' not in st.session_state:
+        st.session_state.search_performed = False
+    if 'search_page' not in st.session_state:
+        st.session_state.search_page = 1
+    
+    # Formulario de búsqueda MEJORADO
+    with st.form("search_proformas_form"):
+        st.markdown("### 🔍 Buscar Proformas")
+        st.info("💡 **Carga Inteligente:** Las proformas se cargan solo cuando realizas una búsqueda. "
+                "Esto mejora el rendimiento de la aplicación.")
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        
+        with col1:
+            customer_search = st.text_input(
+                "Cliente",
+                placeholder="Nombre o empresa..."
+            )
+        
+        with col2:
+            model_search = st.text_input(
+                "Modelo/Marca", 
+                placeholder="Buscar equipo..."
+            )
+        
+        with col3:
+            proforma_number_search = st.text_input(
+                "Número Proforma",
+                placeholder="Ej: PF-2025-00042 o solo 00042",
+                help="Busca por cualquier parte del número de proforma"
+            )
+        
+        with col4:
+            date_from = st.date_input(
+                "Fecha desde",
+                value=datetime.now() - timedelta(days=30)
+            )
+        
+        with col5:
+            date_to = st.date_input(
+                "Fecha hasta",
+                value=datetime.now()
+            )
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            # Filtro por asesor
+            advisors = cache.list_advisors(active_only=False)
+            advisor_options = ["Todos"] + [f"[{a.id}] {a.name}" for a in advisors]
+            advisor_filter = st.selectbox("Asesor", advisor_options)
+        
+        with col2:
+            # Filtro por tipo
+            template_filter = st.selectbox(
+                "Tipo de equipo",
+                ["Todos", "Tractores", "Implementos"]
+            )
+        
+        with col3:
+            st.markdown("<br>", unsafe_allow_html=True)  # Spacer
+            search_submitted = st.form_submit_button(
+                "🔍 Buscar Proformas",
+                width='stretch',
+                type="primary"
+            )
+    
+    # Procesar búsqueda SOLO cuando se envía el formulario
+    if search_submitted:
+        # Preparar filtros
+        advisor_id = None
+        if advisor_filter != "Todos":
+            advisor_id = int(advisor_filter.split("]")[0].replace("[", ""))
+        
+        template = None
+        if template_filter == "Tractores":
+            template = "tractor"
+        elif template_filter == "Implementos":
+            template = "implement"
+        
+        st.session_state.search_filters = {
+            "customer_search": customer_search.strip() if customer_search else None,
+            "model_search": model_search.strip() if model_search else None,
+            "proforma_number": proforma_number_search.strip() if proforma_number_search else None,
+            "date_from": datetime.combine(date_from, datetime.min.time()) if date_from else None,
+            "date_to": datetime.combine(date_to, datetime.max.time()) if date_to else None,
+            "advisor_id": advisor_id,
+            "template": template,
+        }
+        st.session_state.search_performed = True
+        reset_page()
+    
+    # Mostrar resultados de búsqueda SOLO si se ha realizado una búsqueda
+    if st.session_state.search_performed:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            sort_label = st.selectbox(
+                "Ordenar por", list(SORT_OPTIONS), key="proformas_sort", on_change=reset_page
+            )
+        with col2:
+            page_size = st.selectbox(
+                "Filas por página", PAGE_SIZES, key="proformas_page_size", on_change=reset_page
+            )
+        sort, descending = SORT_OPTIONS[sort_label]
+        
+        with st.spinner("🔍 Buscando proformas..."):
+            results = cache.page_proformas(
+                st.session_state.search_filters,
+                sort=sort,
+                descending=descending,
+                page=st.session_state.search_page,
+                page_size=page_size
+            )
+        st.session_state.search_page = results["page"]
+        rows = results["rows"]
+        
+        if rows:
+            first = (results["page"] - 1) * results["page_size"] + 1
+            st.markdown(f"### 📋 Resultados: {results['total']} proformas encontradas")
+            st.caption(
+                f"Mostrando {first}-{first + len(rows) - 1} · "
+                f"página {results['page']} de {results['pages']}"
+            )
+            render_export(dict(st.session_state.search_filters), results['total'])
+            
+            # Mostrar dataframe con selección (la clave cambia con la página)
+            df_display = st.dataframe(
+                [
+                    {
+                        "📌 Número": row["number"],
+                        "📅 Fecha": row["date"].strftime("%d/%m/%Y"),
+                        "👤 Cliente": row["customer_name"],
+                        "👔 Asesor": row["advisor_name"] or "Sin asesor",
+                        "🚜 Tipo": "Tractores" if row["template"] == "tractor" else "Implementos",
+                        "💰 Total": format_currency(row["total"], row["currency"]) if row["currency"] != "MIXED" else "Mixto",
+                        "📦 Items": row["items_count"],
+                        "ID": row["id"]
+                    }
+                    for row in rows
+                ],
+                width='stretch',
+                hide_index=True,
+                selection_mode="single-row",
+                on_select="rerun",
+                key=f"proformas_grid_{sort}_{descending}_{page_size}_{results['page']}"
+            )
+            
+            # Navegación (los callbacks cambian la página antes de la próxima recarga)
+            if results["pages"] > 1:
+                col1, col2, _ = st.columns([1, 1, 4])
+                with col1:
+                    st.button(
+                        "◀ Anterior", width="stretch",
+                        disabled=results["page"] <= 1,
+                        on_click=go_to_page, args=(results["page"] - 1,)
+                    )
+                with col2:
+                    st.button(
+                        "Siguiente ▶", width="stretch",
+                        disabled=results["page"] >= results["pages"],
+                        on_click=go_to_page, args=(results["page"] + 1,)
+                    )
+            
+            # ACCIONES PARA PROFORMA SELECCIONADA (se busca por id en la base)
+            selected_proforma = None
+            if df_display.selection.rows:
+                selected_id = rows[df_display.selection.rows[0]]["id"]
+                with SessionLocal() as db:
+                    proforma = crud.get_proforma(db, selected_id)
+                    if proforma:
+                        selected_proforma = {
+                            "id": proforma.id,
+                            "number": proforma.number,
+                            "pdf_path": proforma.pdf_path
+                        }
+                if selected_proforma is None:
+                    st.warning("⚠️ La proforma seleccionada ya no existe")
+            
+            if selected_proforma:
+                st.markdown("---")
+                st.markdown(f"### ✅ Proforma seleccionada: {selected_proforma['number']}")
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    # DESCARGAR PDF
+                    if selected_proforma['pdf_path'] and Path(selected_proforma['pdf_path']).exists():
+                        with perf_section("pdf"), open(selected_proforma['pdf_path'], "rb") as pdf_file:
+                            st.download_button(
+                                label="📥 Descargar PDF",
+                                data=pdf_file.read(),
+                                file_name=f"Proforma_{selected_proforma['number']}.pdf",
+                                mime="application/pdf",
+                                width='stretch'
+                            )
+                    else:
+                        st.warning("📄 PDF no disponible")
+                
+                with col2:
+                    # DUPLICAR PROFORMA - FUERA DEL FORM
+                    if st.button("📋 Duplicar Proforma", width='stretch'):
+                        st.session_state.show_duplicate_dialog = True
+                        st.session_state.duplicate_proforma_id = selected_proforma['id']
+                        st.session_state.duplicate_original_number = selected_proforma['number']
+                        st.rerun()
+                
+                with col3:
+                    # ELIMINAR PROFORMA - FUERA DEL FORM
+                    if st.button("🗑️ Eliminar Proforma", width='stretch', type="secondary"):
+                        st.session_state.show_delete_dialog = True
+                        st.session_state.delete_proforma_id = selected_proforma['id']
+                        st.session_state.delete_proforma_number = selected_proforma['number']
+                        st.rerun()
+        else:
+            st.info("🔍 No se encontraron proformas con los criterios de búsqueda especificados.")
+            
+            # Información de debug para el usuario
+            search_info = []
+            if customer_search:
+                search_info.append(f"Cliente: '{customer_search}'")
+            if model_search:
+                search_info.append(f"Modelo/Marca: '{model_search}'")
+            if proforma_number_search:
+                search_info.append(f"Número: '{proforma_number_search}'")
+            if advisor_filter != "Todos":
+                search_info.append(f"Asesor: {advisor_filter}")
+            if template_filter != "Todos":
+                search_info.append(f"Tipo: {template_filter}")
+            
+            if search_info:
+                st.caption(f"**Criterios usados:** {' | '.join(search_info)}")
+            
+            st.markdown("""
+            **Sugerencias:**
+            - Verifica que las fechas sean correctas
+            - Intenta con términos de búsqueda más amplios
+            - Revisa los filtros de asesor y tipo de equipo
+            - Para número de proforma, usa solo parte del número (ej: "00042")
+            """)
+    else:
+        # Mensaje inicial (sin carga automática) - ESTO ES LO IMPORTANTE
+        st.markdown("### 🎯 Búsqueda Inteligente")
+        st.info("""
+        **¡Nueva funcionalidad!** Para mejorar el rendimiento, las proformas se cargan 
+        únicamente cuando realizas una búsqueda específica.
+        
+        **Busca por:**
+        - 👤 **Cliente:** Nombre o empresa
+        - 🚜 **Modelo/Marca:** Cualquier equipo
+        - 📌 **Número de Proforma:** Búsqueda exacta por número
+        - 📅 **Fechas:** Rango personalizable
+        - 👔 **Asesor:** Filtro por vendedor
+        - 📋 **Tipo:** Tractores o implementos
+        
+        👆 **Utiliza el formulario de búsqueda de arriba para comenzar**
+        """)
+
+    # MODAL DE DUPLICACIÓN MEJORADO - FUERA DE CUALQUIER FORM
+    if st.session_state.get("show_duplicate_dialog", False):
+        st.markdown("---")
+        
+        with st.container():
+            # Ventana modal estilizada
+            st.markdown("""
+            <div class="modal-dialog">
+                <h3 style="color: #2E7D32; margin-bottom: 15px;">📋 Duplicar Proforma</h3>
+                <p>Se creará una copia exacta con un nuevo número y fecha.</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            with st.form("duplicate_proforma_form"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    new_number = st.text_input(
+                        "Nuevo número de proforma",
+                        value="",
+                        placeholder="Automático",
+                        help="Deja vacío para asignar el siguiente número de la secuencia"
+                    )
+                
+                with col2:
+                    new_date = st.date_input(
+                        "Nueva fecha",
+                        value=datetime.now(),
+                        help="Fecha de la proforma duplicada"
+                    )
+                
+                st.markdown("💡 **Nota:** La nueva proforma mantendrá todos los productos, precios, descuentos y configuración de la original.")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    if st.form_submit_button("✅ Confirmar Duplicación", width='stretch', type="primary"):
+                        try:
+                            with SessionLocal() as db:
+                                # Duplicar proforma (el número se reserva y verifica en la misma transacción)
+                                new_proforma = crud.duplicate_proforma(
+                                    db,
+                                    st.session_state.duplicate_proforma_id,
+                                    new_number.strip() or None,
+                                    datetime.combine(new_date, datetime.min.time())
+                                )
+                                
+                                if new_proforma:
+                                    # Mostrar modal de éxito
+                                    show_duplicate_modal(
+                                        st.session_state.duplicate_original_number,
+                                        new_proforma["number"]
+                                    )
+                                    
+                                    # Limpiar estado del diálogo
+                                    st.session_state.show_duplicate_dialog = False
+                                    
+                                    # Nueva Proforma precarga los datos por id (cache.get_proforma_prefill)
+                                    st.session_state.duplicate_prefill_id = new_proforma["id"]
+                                    
+                                    st.success(f"✅ Proforma {new_proforma['number']} creada exitosamente")
+                                    
+                                    # ACTIVAR REDIRECCIÓN AUTOMÁTICA
+                                    st.session_state.redirect_to_new_proforma = True
+                                    
+                                    # Información para el usuario
+                                    st.info("🔄 **Redirigiendo automáticamente a 'Nueva Proforma'...**")
+                                    
+                                    # Forzar recarga para aplicar redirección
+                                    st.rerun()
+                                else:
+                                    st.error("❌ Error al duplicar la proforma")
+                        except ValueError as e:
+                            st.error(f"❌ {e}")
+                        except Exception as e:
+                            st.error(f"❌ Error: {e}")
+                
+                with col2:
+                    if st.form_submit_button("❌ Cancelar", width='stretch'):
+                        st.session_state.show_duplicate_dialog = False
+                        st.rerun()
+
+    # MODAL DE ELIMINACIÓN - FUERA DE CUALQUIER FORM
+    if st.session_state.get("show_delete_dialog", False):
+        st.markdown("---")
+        
+        with st.container():
+            st.markdown("""
+            <div class="modal-dialog">
+                <h3 style="color: #F44336; margin-bottom: 15px;">🗑️ Eliminar Proforma</h3>
+                <p style="color: #F44336;"><strong>¡ATENCIÓN!</strong> Esta acción es irreversible.</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            st.warning(f"⚠️ **Vas a eliminar la proforma:** {st.session_state.delete_proforma_number}")
+            if media_gc.GC_INTERVAL_HOURS > 0:
+                pdf_note = (
+                    "El archivo PDF (si existe) queda sin referencia y la limpieza automática de "
+                    f"archivos lo elimina si tiene más de {media_gc.GC_GRACE_HOURS / 24:g} días. "
+                    "Descárgalo antes si lo necesitas."
+                )
+            else:
+                pdf_note = (
+                    "El archivo PDF (si existe) queda sin referencia y se elimina al ejecutar "
+                    "`python -m app.cli media gc`. Descárgalo antes si lo necesitas."
+                )
+            st.info(f"📝 **Nota:** Se eliminará el registro de la base de datos. {pdf_note}")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if st.button("🗑️ Confirmar Eliminación", width='stretch', type="primary"):
+                    try:
+                        with SessionLocal() as db:
+                            success = crud.delete_proforma(db, st.session_state.delete_proforma_id)
+                            if success:
+                                st.success("✅ Proforma eliminada correctamente")
+                                st.session_state.show_delete_dialog = False
+                                st.rerun()
+                            else:
+                                st.error("❌ No se pudo eliminar la proforma")
+                    except Exception as e:
+                        st.error(f"❌ Error al eliminar: {e}")
+            
+            with col2:
+                if st.button("❌ Cancelar", width='stretch'):
+                    st.session_state.show_delete_dialog = False
+                    st.rerun()
@@ -0,0 +1,296 @@
+"""
+Configuración: empresa, logos, términos y notas
+"""
+from pathlib import Path
+
+import streamlit as st
+
+from app import crud, cache, images
+from app.db import SessionLocal
+from app.config_defaults import MAX_CHARS
+from app.perf import perf_section
+from app.views.common import LOGOS_DIR, show_char_counter
+
+
+# ==================== CONFIGURACIÓN ====================
+
+def render():
+    st.markdown('<p class="main-header">⚙️ Configuración del Sistema</p>', unsafe_allow_html=True)
+    
+    tabs = st.tabs(["🏢 Datos de la Empresa", "🖼️ Logos", "🚜 Términos Tractores", "🔧 Términos Implementos", "📄 Nota Fiscal"])
+    
+    # Tab: Datos de la empresa
+    with tabs[0]:
+        st.markdown("### Datos de la Empresa")
+        st.info("💡 Esta información aparecerá en todas las proformas.")
+        
+        with st.form("company_form"):
+            company_name = cache.get_config("company_name", "Colono")
+            company_address = cache.get_config("company_address", "")
+            company_phone = cache.get_config("company_phone", "")
+            company_email = cache.get_config("company_email", "")
+            company_web = cache.get_config("company_web", "")
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name_input = st.text_input(
+                    "Nombre de la empresa",
+                    value=company_name,
+                    max_chars=MAX_CHARS.get("company_name", 60)
+                )
+                if name_input:
+                    show_char_counter("company_name", len(name_input))
+                
+                address_input = st.text_area(
+                    "Dirección",
+                    value=company_address,
+                    height=80,
+                    max_chars=MAX_CHARS.get("company_address", 150)
+                )
+                if address_input:
+                    show_char_counter("company_address", len(address_input))
+            
+            with col2:
+                phone_input = st.text_input(
+                    "Teléfono",
+                    value=company_phone,
+                    max_chars=MAX_CHARS.get("company_phone", 30)
+                )
+                if phone_input:
+                    show_char_counter("company_phone", len(phone_input))
+                
+                email_input = st.text_input(
+                    "Email",
+                    value=company_email,
+                    max_chars=MAX_CHARS.get("company_email", 50)
+                )
+                if email_input:
+                    show_char_counter("company_email", len(email_input))
+                
+                web_input = st.text_input(
+                    "Sitio web",
+                    value=company_web,
+                    max_chars=MAX_CHARS.get("company_web", 50)
+                )
+                if web_input:
+                    show_char_counter("company_web", len(web_input))
+            
+            if st.form_submit_button("💾 Guardar Cambios", width="stretch"):
+                try:
+                    with SessionLocal() as db:
+                        crud.set_config(db, "company_name", name_input, "company")
+                        crud.set_config(db, "company_address", address_input, "company")
+                        crud.set_config(db, "company_phone", phone_input, "company")
+                        crud.set_config(db, "company_email", email_input, "company")
+                        crud.set_config(db, "company_web", web_input, "company")
+                    st.success("✅ Configuración guardada!")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
+    
+    # Tab: Logos
+    with tabs[1]:
+        st.markdown("### Configuración de Logos")
+        st.info("💡 Los logos aparecerán en el encabezado de las proformas (tamaño recomendado: 300x80px)")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("#### Logo Izquierdo")
+            
+            current_left = cache.get_config("logo_left_path", "")
+            
+            # Mostrar logo actual si existe
+            if current_left and Path(current_left).exists():
+                with perf_section("image"):
+                    st.image(images.thumbnail_path(current_left), width=200)
+                st.caption("Logo actual")
+            
+            # Subir nuevo logo
+            logo_left_file = st.file_uploader(
+                "Subir nuevo logo izquierdo",
+                type=["jpg", "jpeg", "png", "webp"],
+                key="logo_left"
+            )
+            
+            if st.button("💾 Actualizar Logo Izquierdo", width="stretch"):
+                if logo_left_file:
+                    try:
+                        with perf_section("image"):
+                            upload = images.ingest_image(logo_left_file.getvalue())
+                            # El PDF lee el logo: esperar a que esté escrito
+                            upload.wait()
+                    except (ValueError, OSError) as e:
+                        st.error(f"❌ Error: {e}")
+                    else:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "logo_left_path", upload.path, "logos")
+                        st.success("✅ Logo izquierdo actualizado!")
+                        st.rerun()
+                else:
+                    st.warning("Selecciona un archivo primero")
+        
+        with col2:
+            st.markdown("#### Logo Derecho")
+            
+            current_right = cache.get_config("logo_right_path", "")
+            
+            # Mostrar logo actual si existe
+            if current_right and Path(current_right).exists():
+                with perf_section("image"):
+                    st.image(images.thumbnail_path(current_right), width=200)
+                st.caption("Logo actual")
+            
+            # Subir nuevo logo
+            logo_right_file = st.file_uploader(
+                "Subir nuevo logo derecho",
+                type=["jpg", "jpeg", "png", "webp"],
+                key="logo_right"
+            )
+            
+            if st.button("💾 Actualizar Logo Derecho", width="stretch"):
+                if logo_right_file:
+                    try:
+                        with perf_section("image"):
+                            upload = images.ingest_image(logo_right_file.getvalue())
+                            # El PDF lee el logo: esperar a que esté escrito
+                            upload.wait()
+                    except (ValueError, OSError) as e:
+                        st.error(f"❌ Error: {e}")
+                    else:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "logo_right_path", upload.path, "logos")
+                        st.success("✅ Logo derecho actualizado!")
+                        st.rerun()
+                else:
+                    st.warning("Selecciona un archivo primero")
+        
+        # Opción para usar logos predeterminados
+        st.markdown("---")
+        if st.button("🔄 Restablecer logos predeterminados"):
+            with SessionLocal() as db:
+                default_left = str(LOGOS_DIR / "colono.png")
+                default_right = str(LOGOS_DIR / "massey.png")
+                
+                crud.set_config(db, "logo_left_path", default_left, "logos")
+                crud.set_config(db, "logo_right_path", default_right, "logos")
+            st.success("✅ Logos restablecidos!")
+            st.rerun()
+    
+    # Tab: Términos Tractores
+    with tabs[2]:
+        st.markdown("### Términos y Condiciones - Tractores")
+        st.info("💡 Estos términos aparecerán por defecto en proformas de tractores.")
+        
+        with st.form("terms_tractor_form"):
+            terms_tractor = cache.get_config("terms_tractor", "")
+            
+            terms_input = st.text_area(
+                "Términos para tractores",
+                value=terms_tractor,
+                height=300,
+                max_chars=MAX_CHARS.get("terms_tractor", 800)
+            )
+            if terms_input:
+                show_char_counter("terms_tractor", len(terms_input))
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.form_submit_button("💾 Guardar", width="stretch"):
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "terms_tractor", terms_input, "tractor")
+                        st.success("✅ Términos guardados!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+            
+            with col2:
+                if st.form_submit_button("📄 Restablecer", width="stretch"):
+                    from app.config_defaults import DEFAULT_CONFIG
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "terms_tractor", DEFAULT_CONFIG["terms_tractor"], "tractor")
+                        st.success("✅ Términos restablecidos!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+    
+    # Tab: Términos Implementos
+    with tabs[3]:
+        st.markdown("### Términos y Condiciones - Implementos")
+        st.info("💡 Estos términos aparecerán por defecto en proformas de implementos.")
+        
+        with st.form("terms_implement_form"):
+            terms_implement = cache.get_config("terms_implement", "")
+            
+            terms_input = st.text_area(
+                "Términos para implementos",
+                value=terms_implement,
+                height=300,
+                max_chars=MAX_CHARS.get("terms_implement", 800)
+            )
+            if terms_input:
+                show_char_counter("terms_implement", len(terms_input))
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.form_submit_button("💾 Guardar", width="stretch"):
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "terms_implement", terms_input, "implement")
+                        st.success("✅ Términos guardados!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+            
+            with col2:
+                if st.form_submit_button("📄 Restablecer", width="stretch"):
+                    from app.config_defaults import DEFAULT_CONFIG
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "terms_implement", DEFAULT_CONFIG["terms_implement"], "implement")
+                        st.success("✅ Términos restablecidos!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+    
+    # Tab: Nota Fiscal
+    with tabs[4]:
+        st.markdown("### Nota Fiscal")
+        st.info("💡 Esta nota aparecerá en el footer de todas las proformas.")
+        
+        with st.form("fiscal_note_form"):
+            fiscal_note = cache.get_config("fiscal_note", "")
+            
+            note_input = st.text_area(
+                "Nota fiscal",
+                value=fiscal_note,
+                height=200,
+                max_chars=MAX_CHARS.get("fiscal_note", 400)
+            )
+            if note_input:
+                show_char_counter("fiscal_note", len(note_input))
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.form_submit_button("💾 Guardar", width="stretch"):
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "fiscal_note", note_input, "general")
+                        st.success("✅ Nota fiscal guardada!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+            
+            with col2:
+                if st.form_submit_button("📄 Restablecer", width="stretch"):
+                    from app.config_defaults import DEFAULT_CONFIG
+                    try:
+                        with SessionLocal() as db:
+                            crud.set_config(db, "fiscal_note", DEFAULT_CONFIG["fiscal_note"], "general")
+                        st.success("✅ Nota fiscal restablecida!")
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
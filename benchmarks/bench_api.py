@@ -0,0 +1,174 @@
+"""
+Benchmark de throughput de la API HTTP (app/api.py)
+
+Uso:
+    python benchmarks/bench_api.py [--concurrency 8] [--duration 5] [--workers 1]
+
+Copia la app a un directorio temporal con una base de prueba (ver
+bench_rerun.prepare), levanta uvicorn y, para cada escenario, mantiene
+`concurrency` clientes (hilos con conexión keep-alive) haciendo peticiones
+durante `duration` segundos. Reporta peticiones por segundo, errores y
+latencia p50/p95/p99:
+
+- search: búsqueda paginada de proformas por cliente
+- pdf: descarga de un PDF ya dibujado (respuesta en streaming desde disco)
+- create: alta de proforma con dos items del catálogo
+- create+pdf: alta y dibujo del PDF en la misma petición
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+from bench_rerun import ROOT, percentile, prepare
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("La API no respondió a tiempo")
+
+
+def request(conn: http.client.HTTPConnection, method: str, path: str, body=None) -> int:
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    # Leer en bloques (el PDF llega en streaming)
+    while response.read(64 * 1024):
+        pass
+    return response.status
+
+
+def run_scenario(port: int, make_request, concurrency: int, duration: float) -> dict:
+    """`make_request(i)` -> (método, ruta, cuerpo); i es un contador global"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    counter = iter(range(10 ** 9))
+    deadline = time.perf_counter() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while time.perf_counter() < deadline:
+            with lock:
+                i = next(counter)
+            method, path, body = make_request(i)
+            start = time.perf_counter()
+            try:
+                status = request(conn, method, path, body)
+            except (OSError, http.client.HTTPException) as e:
+                status = type(e).__name__
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if status in (200, 201):
+                    latencies.append(elapsed)
+                else:
+                    errors.append(status)
+        conn.close()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_types": sorted({str(e) for e in errors}),
+        "rps": len(latencies) / wall,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def scenarios(port: int) -> dict:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    conn.request("GET", "/catalog/models?" + urlencode({"equipment_type": "tractor"}))
+    models = [model["id"] for model in json.loads(conn.getresponse().read())]
+    conn.request("GET", "/proformas?" + urlencode({"page_size": 20}))
+    proforma_ids = [row["id"] for row in json.loads(conn.getresponse().read())["rows"]]
+    # PDFs ya dibujados para el escenario de descarga
+    for proforma_id in proforma_ids:
+        request(conn, "GET", f"/proformas/{proforma_id}/pdf")
+    conn.close()
+
+    def spec(i):
+        return {
+            "customer_id": 1 + i % 200,
+            "advisor_id": 1 + i % 5,
+            "template": "tractor",
+            "items": [
+                {"product_id": models[i % len(models)], "qty": 1, "year": 2025},
+                {"product_id": models[(i + 7) % len(models)], "qty": 2, "year": 2025, "discount_percent": 5},
+            ],
+        }
+
+    return {
+        "search": lambda i: ("GET", "/proformas?" + urlencode({"customer": f"Cliente {i % 50}"}), None),
+        "pdf": lambda i: ("GET", f"/proformas/{proforma_ids[i % len(proforma_ids)]}/pdf", None),
+        "create": lambda i: ("POST", "/proformas", spec(i)),
+        "create+pdf": lambda i: ("POST", "/proformas?render_pdf=true", spec(i)),
+    }
+
+
+def run(source: Path, concurrency: int, duration: float, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        prepare(source, workdir)
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "app.api", "--port", str(port), "--workers", str(workers)],
+            cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+        try:
+            wait_ready(port)
+            print(f"concurrencia {concurrency}, {duration:.0f} s por escenario, {workers} proceso(s) uvicorn")
+            print(f"{'escenario':<12} {'peticiones':>10} {'errores':>8} {'req/s':>8} "
+                  f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for name, make_request in scenarios(port).items():
+                result = run_scenario(port, make_request, concurrency, duration)
+                print(
+                    f"{name:<12} {result['requests']:>10} {result['errors']:>8} {result['rps']:>8.1f} "
+                    f"{result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f}"
+                )
+                if result["error_types"]:
+                    print(f"  errores: {', '.join(result['error_types'])}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes simultáneos")
+    parser.add_argument("--duration", type=float, default=5, help="Segundos por escenario")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos de uvicorn")
+    parser.add_argument("--source", type=Path, default=ROOT, help="Directorio de la app a medir")
+    args = parser.parse_args()
+    run(args.source.resolve(), args.concurrency, args.duration, args.workers)
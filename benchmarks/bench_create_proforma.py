@@ -0,0 +1,98 @@
+"""
+Benchmark de crud.create_proforma para cotizaciones de 1 a 200 items
+
+Uso:
+    python benchmarks/bench_create_proforma.py [--repeat 30]
+
+Usa una base de datos temporal (no toca data/agriquote.db) y reporta la
+latencia media/p95 y la cantidad de sentencias SQL por proforma creada.
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.db import Base, create_db_engine
+from app import crud
+from bench_rerun import percentile
+
+SIZES = (1, 10, 50, 100, 200)
+
+
+def make_items(n: int) -> list:
+    """Items de prueba con monedas y tasas de IVA variadas"""
+    return [
+        {
+            "model_id": None,
+            "brand_name": "MASSEY FERGUSON",
+            "model_name": f"MF {2600 + i}",
+            "year": 2025,
+            "description": "Motor diésel 4 cilindros, 75 HP, tracción 4x4. " * 4,
+            "image_path": "",
+            "qty": 1 + i % 3,
+            "unit_price": 15_000_000.0 + i * 1000,
+            "discount_percent": 5.0 if i % 4 == 0 else 0.0,
+            "currency": "CRC" if i % 5 else "USD",
+            "tax_rate": 13.0 if i % 7 else 0.0,
+        }
+        for i in range(n)
+    ]
+
+
+def run(repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        statements = {"count": 0}
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements["count"] += 1
+
+        with Session() as db:
+            customer_id = crud.create_customer(db, name="Cliente Benchmark").id
+
+        print(f"{'items':>6} {'media ms':>10} {'p95 ms':>10} {'SQL/proforma':>13}")
+        for size in SIZES:
+            items = make_items(size)
+            timings = []
+            statements["count"] = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with Session() as db:
+                    crud.create_proforma(
+                        db,
+                        number=None,
+                        customer_id=customer_id,
+                        template="tractor",
+                        items_data=items,
+                        pdf_path="outputs/Proforma_{number}.pdf"
+                    )
+                timings.append((time.perf_counter() - start) * 1000)
+
+            timings.sort()
+            p95 = percentile(timings, 0.95)
+            print(
+                f"{size:>6} {statistics.mean(timings):>10.2f} {p95:>10.2f} "
+                f"{statements['count'] / repeat:>13.1f}"
+            )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=30, help="Repeticiones por tamaño")
+    args = parser.parse_args()
+    run(args.repeat)
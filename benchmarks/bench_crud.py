@@ -0,0 +1,239 @@
+"""
+Benchmark de las funciones de app/crud.py sobre bases de distintos tamaños
+
+Uso:
+    python benchmarks/bench_crud.py [--sizes 1000 10000 100000] [--repeat 30]
+    python benchmarks/bench_crud.py --save-baseline      # actualizar la línea base
+    python benchmarks/bench_crud.py --threshold 0.5      # tolerancia +50 %
+
+Para cada tamaño genera (una vez, con app/seed.py y semilla fija) una base de
+ese número de proformas y la guarda en `--cache-dir`; cada ejecución trabaja
+sobre una copia. Mide `repeat` llamadas de cada operación, cada una con su
+propia sesión como en la app, y reporta la latencia p50/p95/p99 y la cantidad
+de consultas SQL por llamada (app/instrumentation.py).
+
+Los resultados se comparan con benchmarks/baselines/crud.json: se marca
+regresión si la métrica (`--metric`, p50 por defecto) supera la línea base en
+más de `--threshold` y de `--min-ms`, o si aumenta la cantidad de consultas.
+Con regresiones el código de salida es 1. Las líneas base solo son
+comparables en la misma máquina.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app import crud
+from app.db import create_db_engine
+from app.instrumentation import collect_queries, instrument_engine
+from app.models import Customer, Model, Proforma
+from app.seed import prepare_database, seed_database
+from bench_rerun import percentile
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "crud.json"
+DEFAULT_SIZES = (1000, 10000, 100000)
+SEED = 42
+WARMUP = 2
+
+
+def seeded_db(cache_dir: Path, size: int) -> Path:
+    """Base con `size` proformas (se genera la primera vez y se reutiliza)"""
+    path = cache_dir / f"crud-seed{SEED}-{size}.db"
+    if path.exists():
+        return path
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    print(f"Generando base de {size} proformas en {path} ...", flush=True)
+    engine = create_db_engine(tmp_path)
+    try:
+        prepare_database(engine)
+        seed_database(
+            engine,
+            seed=SEED,
+            customers=min(50000, max(500, size // 10)),
+            proformas=size,
+            images=0
+        )
+    finally:
+        engine.dispose()
+    os.replace(tmp_path, path)
+    return path
+
+
+def operations(db) -> dict:
+    """
+    {nombre: fn(db, i)} con parámetros que rotan según el número de llamada
+    `i` (búsquedas distintas, proformas distintas para duplicar).
+    """
+    customer_id = db.scalar(select(func.min(Customer.id)))
+    customer_names = [name.split()[1] for name in db.scalars(select(Customer.name).limit(20))]
+    model_names = [name.split()[0] for name in db.scalars(select(Model.name).limit(20))]
+    max_id = db.scalar(select(func.max(Proforma.id)))
+    items = [
+        {
+            "model_id": model.id,
+            "brand_name": model.brand.name,
+            "model_name": model.name,
+            "year": 2025,
+            "description": model.description,
+            "image_path": model.image_path,
+            "qty": 1 + n,
+            "unit_price": model.base_price,
+            "discount_percent": 5.0 * n,
+            "currency": "CRC",
+            "tax_rate": 13.0,
+        }
+        for n, model in enumerate(crud.list_models(db, equipment_type="tractor")[:2])
+    ]
+
+    return {
+        "list_customers": lambda db, i: crud.list_customers(db),
+        "list_customers_search": lambda db, i: crud.list_customers(db, search=customer_names[i % len(customer_names)]),
+        "list_models": lambda db, i: crud.list_models(db, equipment_type="tractor"),
+        "search_proformas": lambda db, i: crud.search_proformas(db),
+        "search_proformas_customer": lambda db, i: crud.search_proformas(
+            db, customer_search=customer_names[i % len(customer_names)]
+        ),
+        "search_proformas_model": lambda db, i: crud.search_proformas(
+            db, model_search=model_names[i % len(model_names)]
+        ),
+        "get_stats": lambda db, i: crud.get_stats(db),
+        "create_proforma": lambda db, i: crud.create_proforma(
+            db, number=None, customer_id=customer_id, template="tractor",
+            items_data=items, pdf_path="outputs/Proforma_{number}.pdf"
+        ),
+        "duplicate_proforma": lambda db, i: crud.duplicate_proforma(db, 1 + (i * 7919) % max_id),
+    }
+
+
+def measure(db_path: Path, repeat: int) -> dict:
+    engine = create_db_engine(db_path)
+    instrument_engine(engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        with Session() as db:
+            ops = operations(db)
+
+        results = {}
+        counter = itertools.count()
+        for name, fn in ops.items():
+            timings, queries = [], []
+            for n in range(WARMUP + repeat):
+                with collect_queries(name) as collected:
+                    start = time.perf_counter()
+                    with Session() as db:
+                        fn(db, next(counter))
+                    elapsed = (time.perf_counter() - start) * 1000
+                if n >= WARMUP:
+                    timings.append(elapsed)
+                    queries.append(len(collected.queries))
+            timings.sort()
+            results[name] = {
+                "p50": round(percentile(timings, 0.50), 3),
+                "p95": round(percentile(timings, 0.95), 3),
+                "p99": round(percentile(timings, 0.99), 3),
+                "queries": max(queries),
+            }
+        return results
+    finally:
+        engine.dispose()
+
+
+def compare(results: dict, baseline: dict, metric: str, threshold: float, min_ms: float) -> list:
+    """Regresiones de `results` respecto a `baseline` ({tamaño: {operación: métricas}})"""
+    regressions = []
+    for size, operations_ in results.items():
+        for name, current in operations_.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            if current[metric] > base[metric] * (1 + threshold) and current[metric] - base[metric] > min_ms:
+                regressions.append(
+                    f"{name} ({size} proformas): {metric} {current[metric]:.2f} ms "
+                    f"vs {base[metric]:.2f} ms (+{current[metric] / base[metric] - 1:.0%})"
+                )
+            if current["queries"] > base["queries"]:
+                regressions.append(
+                    f"{name} ({size} proformas): {current['queries']} consultas vs {base['queries']}"
+                )
+    return regressions
+
+
+def run(args) -> int:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            work_path = Path(tmp) / f"work-{size}.db"
+            shutil.copyfile(seeded_db(args.cache_dir, size), work_path)
+            results[str(size)] = measure(work_path, args.repeat)
+
+    print(f"{args.repeat} llamadas por operación")
+    print(f"{'operación':<27} {'proformas':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'SQL':>5}")
+    for size, operations_ in results.items():
+        for name, result in operations_.items():
+            print(
+                f"{name:<27} {size:>9} {result['p50']:>9.2f} {result['p95']:>9.2f} "
+                f"{result['p99']:>9.2f} {result['queries']:>5}"
+            )
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline = {
+            "meta": {
+                "repeat": args.repeat,
+                "seed": SEED,
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+            },
+            "results": results,
+        }
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n", encoding="utf-8")
+        print(f"\nLínea base guardada en {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nSin línea base ({args.baseline}); usa --save-baseline para crearla")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline["results"], args.metric, args.threshold, args.min_ms)
+    print(f"\nLínea base: {baseline['meta']['machine']}, Python {baseline['meta']['python']}")
+    if not regressions:
+        print(f"Sin regresiones ({args.metric}, tolerancia +{args.threshold:.0%})")
+        return 0
+    print(f"{len(regressions)} regresión(es) ({args.metric}, tolerancia +{args.threshold:.0%}):")
+    for regression in regressions:
+        print(f"  {regression}")
+    return 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Proformas por base")
+    parser.add_argument("--repeat", type=int, default=30, help="Llamadas medidas por operación")
+    parser.add_argument(
+        "--cache-dir", type=Path, default=Path(tempfile.gettempdir()) / "agriquote-bench",
+        help="Directorio de las bases generadas"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Archivo de línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como línea base")
+    parser.add_argument("--metric", choices=("p50", "p95", "p99"), default="p50", help="Métrica a comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Aumento tolerado (0.25 = +25 %%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Diferencia mínima en ms para marcar regresión")
+    sys.exit(run(parser.parse_args()))
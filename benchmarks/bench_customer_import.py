@@ -0,0 +1,202 @@
+"""
+Escalamiento de la detección de duplicados de la importación de clientes
+
+Uso:
+    python benchmarks/bench_customer_import.py [--sizes 5000 10000 50000] [--recall-size 2000]
+
+Para cada tamaño N genera (app/seed.py, semilla fija) una base con N clientes
+y un archivo de N filas: una parte son clientes existentes con cambios
+(mayúsculas, tildes, una letra cambiada, sin email) y el resto clientes
+nuevos. Mide app.customer_import.import_customers en modo simulación y
+cuenta las comparaciones de nombres (name_similarity) por fila.
+
+El bloqueo debe mantener las comparaciones por fila casi constantes al
+crecer N (comparar contra todos crece linealmente: x8.4 de 5.000 a 50.000).
+Los bloques guardan nombres distintos, así que las comparaciones crecen
+hasta cubrir la variedad de nombres de app/seed.py (unos 15.000) y luego se
+estabilizan: x2.4 de 5.000 a 50.000, x1.0 de 50.000 a 100.000. El código de
+salida es 1 si con el tamaño mayor las comparaciones por fila superan
+`--max-growth` veces las del menor, o si la prueba de exhaustividad falla: con
+`--recall-size` clientes se compara cada fila contra todos y toda fila que
+tiene un nombre con similitud >= NAME_MATCH_THRESHOLD (sin conflicto de
+email/teléfono) debe encontrar un duplicado también con el índice.
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import customer_import
+from app.db import create_db_engine
+from app.models import Customer
+from app.seed import END_DATE, customer_rows, prepare_database
+
+SEED = 42
+DUPLICATE_SHARE = 0.3
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _typo(rng: random.Random, text: str) -> str:
+    """Una letra cambiada en una palabra larga"""
+    words = text.split()
+    candidates = [i for i, word in enumerate(words) if len(word) >= 6]
+    if not candidates:
+        return text
+    i = rng.choice(candidates)
+    word = words[i]
+    position = rng.randrange(1, len(word) - 1)
+    words[i] = word[:position] + rng.choice("aeiourslmn") + word[position + 1:]
+    return " ".join(words)
+
+
+def incoming_rows(rng: random.Random, existing: list, count: int) -> list:
+    """Archivo a importar: duplicados modificados de `existing` y clientes nuevos"""
+    fresh = customer_rows(random.Random(SEED + 1), count, END_DATE)
+    rows = []
+    for index in range(count):
+        if rng.random() < DUPLICATE_SHARE:
+            source = dict(rng.choice(existing))
+            change = rng.random()
+            if change < 0.3:
+                source["name"] = source["name"].upper()
+            elif change < 0.6:
+                source["name"] = _strip_accents(source["name"])
+            else:
+                source["name"] = _typo(rng, source["name"])
+            if rng.random() < 0.5:
+                source["email"] = ""
+        else:
+            source = fresh[index]
+        rows.append({
+            "_row": index + 2,
+            **{field: source[field] for field in ("name", "company", "email", "phone", "address")},
+        })
+    return rows
+
+
+def seeded_session(tmp: Path, size: int):
+    engine = create_db_engine(tmp / f"customers-{size}.db")
+    prepare_database(engine)
+    existing = customer_rows(random.Random(SEED), size, END_DATE)
+    with engine.begin() as conn:
+        conn.execute(insert(Customer.__table__), existing)
+    return engine, existing
+
+
+class CountingSimilarity:
+    """Envuelve name_similarity para contar las comparaciones"""
+
+    def __init__(self):
+        self.calls = 0
+        self.original = customer_import.name_similarity
+
+    def __call__(self, a, b):
+        self.calls += 1
+        return self.original(a, b)
+
+    def __enter__(self):
+        customer_import.name_similarity = self
+        return self
+
+    def __exit__(self, *exc):
+        customer_import.name_similarity = self.original
+
+
+def measure(tmp: Path, size: int) -> dict:
+    engine, existing = seeded_session(tmp, size)
+    rows = incoming_rows(random.Random(SEED + 2), existing, size)
+    try:
+        with Session(engine) as db, CountingSimilarity() as counter:
+            start = time.perf_counter()
+            report = customer_import.import_customers(db, rows, dry_run=True)
+            seconds = time.perf_counter() - start
+    finally:
+        engine.dispose()
+    return {
+        "size": size,
+        "seconds": seconds,
+        "comparisons_per_row": counter.calls / size,
+        "merged": report["merged"] + report["merged_in_file"],
+        "new": report["new"],
+    }
+
+
+def check_recall(tmp: Path, size: int) -> list:
+    """Filas con un nombre parecido (comparando contra todos) que el índice no encuentra"""
+    engine, existing = seeded_session(tmp, size)
+    rows = incoming_rows(random.Random(SEED + 3), existing, size)
+    engine.dispose()
+
+    existing_records = [customer_import._normalized(row) for row in existing]
+    index = customer_import.BlockingIndex()
+    for key, record in enumerate(existing_records, start=1):
+        index.add(key, record)
+    missed = []
+    for row in rows:
+        record = customer_import._normalized(row)
+        if not record["name_norm"] or index.find(record) is not None:
+            continue
+        for other in existing_records:
+            if (customer_import.name_similarity(record["grams"], other["grams"])
+                    >= customer_import.NAME_MATCH_THRESHOLD
+                    and not customer_import.BlockingIndex._conflict(record, other)):
+                missed.append((record["name"], other["name"]))
+                break
+    return missed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 10000, 50000],
+                        help="Clientes en la base (y filas del archivo)")
+    parser.add_argument("--recall-size", type=int, default=2000,
+                        help="Clientes de la prueba de exhaustividad (0: omitir)")
+    parser.add_argument("--max-growth", type=float, default=3.0,
+                        help="Crecimiento máximo de comparaciones por fila del menor al mayor tamaño")
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{'clientes':>9} {'segundos':>9} {'filas/s':>9} {'comp/fila':>10} {'fusionados':>11} {'nuevos':>8}")
+        results = []
+        for size in sorted(args.sizes):
+            result = measure(tmp, size)
+            results.append(result)
+            print(f"{size:>9} {result['seconds']:>9.2f} {size / result['seconds']:>9.0f} "
+                  f"{result['comparisons_per_row']:>10.1f} {result['merged']:>11} {result['new']:>8}")
+
+        if len(results) > 1:
+            first, last = results[0]["comparisons_per_row"], results[-1]["comparisons_per_row"]
+            growth = last / first if first else 0.0
+            print(f"Comparaciones por fila: x{growth:.2f} de {results[0]['size']} a {results[-1]['size']}")
+            if growth > args.max_growth:
+                print(f"ERROR: crecen más de x{args.max_growth} (el bloqueo no acota los candidatos)")
+                failed = True
+
+        if args.recall_size:
+            missed = check_recall(tmp, args.recall_size)
+            print(f"Exhaustividad ({args.recall_size} clientes): {len(missed)} duplicados no encontrados")
+            for name, other in missed[:10]:
+                print(f"  {name!r} ~ {other!r}")
+            failed = failed or bool(missed)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+Prueba de carga: N vendedores simultáneos usando la app de Streamlit
+
+Uso:
+    python benchmarks/bench_load.py [--sessions 8] [--duration 60] [--db base.db]
+
+Copia la app a un directorio temporal (ver bench_rerun.prepare; con `--db`
+usa esa base, p. ej. una generada con `python -m app.cli seed`) y abre
+`sessions` sesiones de streamlit.testing.AppTest que trabajan a la vez sobre
+la misma base y la misma carpeta outputs/. Cada sesión repite flujos elegidos
+al azar (semilla fija por sesión) durante `duration` segundos:
+
+- search: Ver Proformas, buscar por cliente y pasar a la página siguiente
+- quote: Nueva Proforma, agregar 1-3 modelos y generar el PDF
+- duplicate: duplicar una proforma, abrirla precargada en Nueva Proforma y
+  generar el PDF
+
+Reporta flujos por minuto, latencia p50/p95/p99 de cada recarga, errores de
+bloqueo de la base ("database is locked"), otros errores y el crecimiento de
+memoria (RSS) por sesión.
+
+AppTest reemplaza el runtime global de Streamlit en cada ejecución, así que
+dos sesiones no pueden correr en el mismo proceso: cada vendedor es un
+proceso. La contención de la base es la real; la caché (st.cache_data) no se
+comparte entre sesiones como en un servidor, y con más sesiones que CPUs las
+latencias incluyen la espera por CPU.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import warnings
+from pathlib import Path
+
+from bench_rerun import ROOT, percentile, prepare
+
+FLOWS = {"search": 5, "quote": 3, "duplicate": 1}
+SEARCH_TERMS = ("Cliente 1", "Cliente 2", "Empresa", "Rodr", "Mora", "")
+
+
+def rss_mb() -> float:
+    """Memoria residente del proceso (Linux); 0 si no está disponible"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class FlowError(Exception):
+    pass
+
+
+class Seller:
+    """Una sesión de la app (un navegador) con sus latencias y errores"""
+
+    def __init__(self, index: int):
+        self.rng = random.Random(index)
+        self.stats = {"reruns": [], "lock_errors": 0, "errors": [], "flows": {}, "failed_flows": {}}
+        self.open()
+
+    def open(self) -> None:
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(os.path.join(os.getcwd(), "streamlit_app.py"), default_timeout=300)
+        self.rerun(self.at.run)
+
+    def rerun(self, action) -> None:
+        """Ejecuta una recarga (`action()` llama a .run()) y registra su latencia y errores"""
+        start = time.perf_counter()
+        action()
+        self.stats["reruns"].append((time.perf_counter() - start) * 1000)
+        errors = [str(e.value) for e in self.at.exception] + [str(e.value) for e in self.at.error]
+        for error in errors:
+            if "database is locked" in error:
+                self.stats["lock_errors"] += 1
+            else:
+                self.stats["errors"].append(error[:200])
+        if errors:
+            raise FlowError(errors[0])
+
+    def go(self, page: str) -> None:
+        if self.at.sidebar.radio[0].value != page:
+            self.rerun(lambda: self.at.sidebar.radio[0].set_value(page).run())
+
+    def button(self, text: str):
+        return next((b for b in self.at.button if text in b.label), None)
+
+    # ==================== FLUJOS ====================
+
+    def search(self) -> None:
+        self.go("📊 Ver Proformas")
+        self.at.text_input[0].set_value(self.rng.choice(SEARCH_TERMS))
+        self.rerun(lambda: self.button("Buscar").click().run())
+        next_page = self.button("Siguiente")
+        if next_page is not None and not next_page.disabled:
+            self.rerun(lambda: next_page.click().run())
+
+    def generate_pdf(self) -> None:
+        self.rerun(lambda: self.button("Generar").click().run())
+        if self.button("Crear Nueva Proforma") is None:
+            raise FlowError("No se generó el PDF")
+        self.rerun(lambda: self.button("Crear Nueva Proforma").click().run())
+
+    def quote(self) -> None:
+        self.go("📄 Nueva Proforma")
+        models = self.at.multiselect[0]
+        selection = self.rng.sample(models.options, min(len(models.options), self.rng.randint(1, 3)))
+        self.rerun(lambda: models.set_value(selection).run())
+        self.generate_pdf()
+
+    def duplicate(self) -> None:
+        from sqlalchemy import func, select
+
+        from app.db import SessionLocal
+        from app.models import Proforma
+
+        self.go("📊 Ver Proformas")
+        with SessionLocal() as db:
+            max_id = db.scalar(select(func.max(Proforma.id)))
+            original = db.get(Proforma, self.rng.randint(1, max_id))
+            original_id, number = original.id, original.number
+        # Mismo estado que deja el botón "Duplicar" de la grilla
+        self.at.session_state["duplicate_proforma_id"] = original_id
+        self.at.session_state["duplicate_original_number"] = number
+        self.at.session_state["show_duplicate_dialog"] = True
+        self.rerun(self.at.run)
+        self.rerun(lambda: self.button("Confirmar Duplicación").click().run())
+        if self.at.sidebar.radio[0].value != "📄 Nueva Proforma":
+            raise FlowError("La duplicación no abrió Nueva Proforma")
+        # La copia ya está guardada con el número precargado: el PDF se
+        # genera con número automático
+        self.at.text_input[0].set_value("")
+        self.generate_pdf()
+
+    def run(self, deadline: float) -> None:
+        names, weights = list(FLOWS), list(FLOWS.values())
+        while time.time() < deadline:
+            flow = self.rng.choices(names, weights=weights)[0]
+            try:
+                getattr(self, flow)()
+                outcome = "flows"
+            except Exception as e:
+                outcome = "failed_flows"
+                if not isinstance(e, FlowError):
+                    self.stats["errors"].append("".join(traceback.format_exception_only(e)).strip()[:200])
+                # Empezar de nuevo en una sesión limpia
+                self.open()
+            self.stats[outcome][flow] = self.stats[outcome].get(flow, 0) + 1
+
+
+def worker(index: int, start_at: float, duration: float) -> dict:
+    """Un vendedor; corre dentro del directorio de la copia (cwd)"""
+    warnings.filterwarnings("ignore")
+    sys.path.insert(0, os.getcwd())
+
+    # Primera ejecución fuera de la medición (imports de la app)
+    seller = Seller(index)
+    seller.stats["reruns"].clear()
+    rss_start = rss_mb()
+    peak = {"rss": rss_start}
+    done = threading.Event()
+
+    def sample_memory():
+        while not done.wait(0.5):
+            peak["rss"] = max(peak["rss"], rss_mb())
+
+    threading.Thread(target=sample_memory, daemon=True).start()
+    time.sleep(max(0.0, start_at - time.time()))
+    seller.run(start_at + duration)
+    done.set()
+
+    rss_end = rss_mb()
+    return {
+        **seller.stats,
+        "seconds": time.time() - start_at,
+        "rss_start_mb": rss_start,
+        "rss_peak_mb": max(peak["rss"], rss_end),
+        "rss_end_mb": rss_end,
+    }
+
+
+def merge(results: list) -> dict:
+    """Reporte conjunto de los vendedores"""
+    reruns = sorted(ms for result in results for ms in result["reruns"])
+    wall = max(result["seconds"] for result in results)
+    flows, failed = {}, {}
+    for result in results:
+        for name, count in result["flows"].items():
+            flows[name] = flows.get(name, 0) + count
+        for name, count in result["failed_flows"].items():
+            failed[name] = failed.get(name, 0) + count
+    return {
+        "sessions": len(results),
+        "seconds": wall,
+        "flows": flows,
+        "failed_flows": failed,
+        "flows_per_min": sum(flows.values()) / wall * 60,
+        "reruns": len(reruns),
+        "reruns_per_s": len(reruns) / wall,
+        "p50": percentile(reruns, 0.50),
+        "p95": percentile(reruns, 0.95),
+        "p99": percentile(reruns, 0.99),
+        "lock_errors": sum(result["lock_errors"] for result in results),
+        "errors": [error for result in results for error in result["errors"]],
+        "rss_start_mb": sum(result["rss_start_mb"] for result in results) / len(results),
+        "rss_end_mb": sum(result["rss_end_mb"] for result in results) / len(results),
+        "rss_peak_mb": max(result["rss_peak_mb"] for result in results),
+    }
+
+
+def run(source: Path, sessions: int, duration: float, db: Path = None) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        prepare(source, workdir)
+        if db is not None:
+            shutil.copyfile(db, workdir / "data" / "agriquote.db")
+
+        # Todos empiezan a la vez, después de su primera ejecución
+        start_at = time.time() + 10 + sessions
+        processes = [
+            subprocess.Popen(
+                [sys.executable, __file__, "--worker", str(index),
+                 "--start-at", str(start_at), "--duration", str(duration)],
+                cwd=workdir, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            for index in range(sessions)
+        ]
+        results = []
+        for process in processes:
+            stdout, stderr = process.communicate()
+            if process.returncode != 0:
+                print(f"Error en una sesión:\n{stderr[-3000:]}")
+                return 1
+            results.append(json.loads(stdout.strip().splitlines()[-1]))
+
+    report = merge(results)
+    flows = ", ".join(f"{name} {count}" for name, count in sorted(report["flows"].items()))
+    failed = ", ".join(f"{name} {count}" for name, count in sorted(report["failed_flows"].items()))
+    print(f"{report['sessions']} sesiones durante {report['seconds']:.0f} s")
+    print(f"Flujos completados:   {sum(report['flows'].values())} ({flows or '-'})")
+    print(f"Flujos fallidos:      {sum(report['failed_flows'].values())} ({failed or '-'})")
+    print(f"Throughput:           {report['flows_per_min']:.1f} flujos/min, {report['reruns_per_s']:.1f} recargas/s")
+    print(f"Recarga p50/p95/p99:  {report['p50']:.0f} / {report['p95']:.0f} / {report['p99']:.0f} ms "
+          f"({report['reruns']} recargas)")
+    print(f"Bloqueos de la base:  {report['lock_errors']}")
+    print(f"Otros errores:        {len(report['errors'])}")
+    for error in report["errors"][:10]:
+        print(f"  {error}")
+    print(f"Memoria por sesión:   {report['rss_start_mb']:.0f} MB -> {report['rss_end_mb']:.0f} MB "
+          f"(+{report['rss_end_mb'] - report['rss_start_mb']:.1f} MB, pico {report['rss_peak_mb']:.0f} MB)")
+    return 1 if report["lock_errors"] or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8, help="Sesiones simultáneas")
+    parser.add_argument("--duration", type=float, default=60, help="Segundos de carga")
+    parser.add_argument("--db", type=Path, help="Base a usar (se copia; por defecto una de prueba)")
+    parser.add_argument("--source", type=Path, default=ROOT, help="Directorio de la app a medir")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--start-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker is not None:
+        print(json.dumps(worker(args.worker, args.start_at, args.duration)))
+    else:
+        sys.exit(run(args.source.resolve(), args.sessions, args.duration, args.db))
@@ -0,0 +1,139 @@
+"""
+Benchmark de latencia de recarga (rerun) de Streamlit por página
+
+Uso:
+    python benchmarks/bench_rerun.py [--repeat 20] [--source DIR]
+
+Copia la app (`--source`, por defecto este repositorio) a un directorio
+temporal con una base de datos de prueba, y para cada página mide con
+streamlit.testing.AppTest:
+
+- arranque: primera ejecución de la app en un proceso nuevo (página Inicio)
+- 1ª visita: navegar a la página por primera vez (incluye sus imports)
+- recarga: media y p95 de `repeat` recargas con la página ya abierta
+
+Con `--source` se puede medir otra versión (p. ej. un `git worktree`).
+"""
+import argparse
+import json
+import math
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = [
+    ("🏠 Inicio", None),
+    ("📊 Ver Proformas", None),
+    ("📄 Nueva Proforma", None),
+    ("📋 Mantenimientos", "👥 Clientes"),
+    ("📋 Mantenimientos", "👔 Asesores"),
+    ("📋 Mantenimientos", "🏭 Marcas"),
+    ("📋 Mantenimientos", "📦 Modelos"),
+    ("⚙️ Configuración", None),
+]
+
+SEED = """
+from app.db import SessionLocal, init_db
+from app import crud
+init_db()
+with SessionLocal() as db:
+    customers = [crud.create_customer(db, name=f"Cliente {i}", company=f"Empresa {i}") for i in range(200)]
+    for i in range(5):
+        crud.create_advisor(db, name=f"Asesor {i}")
+    models = []
+    for b in range(10):
+        brand = crud.create_brand(db, name=f"Marca {b}", equipment_type="tractor" if b % 2 else "implement")
+        models += [crud.create_model(db, brand_id=brand.id, name=f"Modelo {b}-{m}", base_price=1000.0 * m)
+                   for m in range(20)]
+    for i in range(100):
+        model = models[i % len(models)]
+        crud.create_proforma(
+            db, number=None, customer_id=customers[i % len(customers)].id,
+            template=model.brand.equipment_type,
+            items_data=[{"model_id": model.id, "brand_name": model.brand.name,
+                         "model_name": model.name, "qty": 1, "unit_price": model.base_price,
+                         "currency": "CRC", "year": 2025, "description": "", "image_path": ""}]
+        )
+"""
+
+# Se ejecuta en un proceso nuevo por página: argv = [menu, submenu, repeat]
+MEASURE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+
+menu, submenu, repeat = sys.argv[1], sys.argv[2] or None, int(sys.argv[3])
+
+at = AppTest.from_file("streamlit_app.py", default_timeout=120)
+start = time.perf_counter()
+at.run()
+startup_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+at.sidebar.radio[0].set_value(menu).run()
+if submenu:
+    at.sidebar.radio[1].set_value(submenu).run()
+first_ms = (time.perf_counter() - start) * 1000
+assert not at.exception, [e.value for e in at.exception]
+
+timings = []
+for _ in range(repeat):
+    start = time.perf_counter()
+    at.run()
+    timings.append((time.perf_counter() - start) * 1000)
+print(json.dumps({"startup_ms": startup_ms, "first_ms": first_ms, "timings": timings}))
+"""
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Percentil por rango más cercano de `values` ordenados (p95 de 20 valores: el 19º)"""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(len(values) * fraction) - 1)]
+
+
+def prepare(source: Path, workdir: Path) -> None:
+    for name in ("app", "media", "streamlit_app.py"):
+        src = source / name
+        if src.is_dir():
+            shutil.copytree(src, workdir / name, ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            shutil.copy2(src, workdir / name)
+    subprocess.run([sys.executable, "-c", SEED], cwd=workdir, check=True)
+
+
+def run(source: Path, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        prepare(source, workdir)
+
+        print(f"{'página':<32} {'arranque ms':>12} {'1ª visita ms':>13} {'media ms':>10} {'p95 ms':>10}")
+        for menu, submenu in PAGES:
+            result = subprocess.run(
+                [sys.executable, "-c", MEASURE, menu, submenu or "", str(repeat)],
+                cwd=workdir, capture_output=True, text=True
+            )
+            if result.returncode != 0:
+                print(f"{menu} {submenu or ''}: error\n{result.stderr[-2000:]}")
+                continue
+            data = json.loads(result.stdout.strip().splitlines()[-1])
+            timings = sorted(data["timings"])
+            p95 = percentile(timings, 0.95)
+            label = f"{menu} / {submenu}" if submenu else menu
+            print(
+                f"{label:<32} {data['startup_ms']:>12.1f} {data['first_ms']:>13.1f} "
+                f"{statistics.mean(timings):>10.1f} {p95:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Recargas por página")
+    parser.add_argument("--source", type=Path, default=ROOT, help="Directorio de la app a medir")
+    args = parser.parse_args()
+    run(args.source.resolve(), args.repeat)
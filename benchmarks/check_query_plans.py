@@ -0,0 +1,164 @@
+"""
+Verifica con EXPLAIN QUERY PLAN que cada combinación de filtros de la
+búsqueda de proformas, cada orden de la grilla paginada y los bloques de la
+exportación usan índices
+
+Uso:
+    python benchmarks/check_query_plans.py [--db data/agriquote.db]
+
+Sin --db crea una base temporal con el esquema anterior (índices de una
+columna), aplica app.migrations dos veces (la segunda no debe cambiar nada)
+y revisa los planes. Termina con código 1 si algún plan recorre la tabla
+proformas completa (sin índice) o necesita un B-tree temporal para ordenar,
+salvo en las rutas de SORTED_RANGE_PATHS.
+"""
+import argparse
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import text
+
+from app.db import Base, create_db_engine
+from app import crud, models  # noqa: F401  (registra las tablas)
+from app.migrations import run_migrations
+
+DATE_FROM = datetime(2025, 1, 1)
+DATE_TO = datetime(2025, 1, 31)
+
+# Combinaciones reales de la pantalla "Ver Proformas"
+SEARCH_PATHS = {
+    "sin filtros": {},
+    "template": {"template": "tractor"},
+    "template + fechas": {"template": "tractor", "date_from": DATE_FROM, "date_to": DATE_TO},
+    "asesor": {"advisor_id": 1},
+    "asesor + fechas": {"advisor_id": 1, "date_from": DATE_FROM, "date_to": DATE_TO},
+    "asesor + template": {"advisor_id": 1, "template": "tractor"},
+    "fechas": {"date_from": DATE_FROM, "date_to": DATE_TO},
+    "cliente": {"customer_search": "ana"},
+    "cliente + template": {"customer_search": "ana", "template": "implement"},
+    "número": {"proforma_number": "00042"},
+}
+
+# Rango de fechas sin otro filtro: se busca por ix_proformas_date y solo se
+# ordenan las filas del rango, lo que es aceptable
+SORTED_RANGE_PATHS = {"fechas"}
+
+# Grilla paginada (crud.page_proformas): cada orden sin filtros debe salir
+# del índice, en ambas direcciones
+PAGE_PATHS = {
+    f"página por {sort} {'desc' if descending else 'asc'}": {"sort": sort, "descending": descending, "page": 3}
+    for sort in crud.PROFORMA_SORTS
+    for descending in (True, False)
+}
+PAGE_PATHS["página por fecha + modelo"] = {"sort": "date", "model_search": "mf", "page": 3}
+
+# Bloques de la exportación (crud.build_proforma_keys_query): primero y siguientes
+EXPORT_PATHS = {
+    "exportación": {},
+    "exportación, siguiente bloque": {"after": (DATE_TO, 1000)},
+    "exportación + template, siguiente bloque": {"template": "tractor", "after": (DATE_TO, 1000)},
+    "exportación + asesor, siguiente bloque": {"advisor_id": 1, "after": (DATE_TO, 1000)},
+    "exportación + fechas, siguiente bloque": {"date_from": DATE_FROM, "date_to": DATE_TO, "after": (DATE_TO, 1000)},
+}
+
+OLD_INDEXES = (
+    "CREATE INDEX ix_proformas_customer_id ON proformas (customer_id)",
+    "CREATE INDEX ix_proformas_advisor_id ON proformas (advisor_id)",
+    "CREATE INDEX ix_proformas_template ON proformas (template)",
+)
+
+
+def explain(conn, query) -> list:
+    compiled = query.compile(dialect=conn.dialect)
+    params = tuple(
+        str(value) if isinstance(value, datetime) else value
+        for value in (compiled.params[name] for name in compiled.positiontup)
+    )
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+    return [row[3] for row in rows]
+
+
+def is_regression(plan: list, allow_temp_sort: bool = False) -> bool:
+    """Recorrido completo de proformas o B-tree temporal para el ORDER BY"""
+    full_scan = any(step == "SCAN proformas" for step in plan)
+    temp_sort = any("USE TEMP B-TREE FOR ORDER BY" in step for step in plan)
+    return full_scan or (temp_sort and not allow_temp_sort)
+
+
+def build_legacy_db(db_path: Path):
+    """Base con el esquema previo a los índices compuestos"""
+    engine = create_db_engine(db_path)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in models.Proforma.__table__.indexes:
+            if index.name.endswith("_created_at"):
+                conn.execute(text(f"DROP INDEX {index.name}"))
+        for ddl in OLD_INDEXES:
+            conn.execute(text(ddl))
+    return engine
+
+
+def check_migrations(engine) -> bool:
+    first = run_migrations(engine)
+    second = run_migrations(engine)
+    print(f"Migración: creados {first['created']}, eliminados {first['dropped']}")
+    if second["created"] or second["dropped"] or second["added"]:
+        print(f"  FALLA: la segunda ejecución no es idempotente: {second}")
+        return False
+    return True
+
+
+def check_plans(engine) -> bool:
+    ok = True
+    with engine.connect() as conn:
+        for name, filters in SEARCH_PATHS.items():
+            plan = explain(conn, crud.build_search_proformas_query(**filters))
+            failed = is_regression(plan, allow_temp_sort=name in SORTED_RANGE_PATHS)
+            ok = ok and not failed
+            print(f"[{'FALLA' if failed else 'ok'}] {name}")
+            for step in plan:
+                print(f"        {step}")
+        for name, params in PAGE_PATHS.items():
+            plan = explain(conn, crud.build_page_proformas_query(**params))
+            failed = is_regression(plan)
+            ok = ok and not failed
+            print(f"[{'FALLA' if failed else 'ok'}] {name}")
+            for step in plan:
+                print(f"        {step}")
+        for name, params in EXPORT_PATHS.items():
+            plan = explain(conn, crud.build_proforma_keys_query(**params))
+            failed = is_regression(plan, allow_temp_sort="fechas" in name)
+            ok = ok and not failed
+            print(f"[{'FALLA' if failed else 'ok'}] {name}")
+            for step in plan:
+                print(f"        {step}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Revisa los planes de la búsqueda de proformas")
+    parser.add_argument("--db", type=Path, help="Base existente a revisar (no se modifica)")
+    args = parser.parse_args()
+
+    if args.db:
+        engine = create_db_engine(args.db)
+        ok = check_plans(engine)
+        engine.dispose()
+        return 0 if ok else 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_legacy_db(Path(tmp) / "plans.db")
+        ok = check_migrations(engine)
+        ok = check_plans(engine) and ok
+        engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())